@@ -1,14 +1,17 @@
 import streamlit as st
-import pandas as pd
 from data import fetch_stock_data
 from plots import plot_chart_with_bollinger, chart_type_selector
-from predictions import StockPredictor
+from predictions import SELECT_BY, feature_matrix, get_predictor
 from news import fetch_news_and_sentiment
+from newsstore import sentiment_asof
 from metrics import fetch_stock_metrics, company_name
-from streamlit_autorefresh import st_autorefresh
-from streamlit.web.server import Server
+from concurrency import submit
+from prefetch import start_prefetcher
+from warmup import start_warmup
 from datetime import datetime, date, timedelta
 
+start_prefetcher()
+
 if 'app_started' not in st.session_state:
     st.session_state.app_started = False
 
@@ -25,6 +28,9 @@ if not st.session_state.app_started:
             st.rerun()
         else:
             st.warning("Please enter a ticker symbol to start.")
+    # The screen above is already out; the analysis run's slow imports load
+    # while the user types.
+    start_warmup()
 else:
     st.set_page_config(page_title="Stock Analyzer", layout="wide", initial_sidebar_state="expanded")
     st.title("📈 Stock Analyzer Dashboard")
@@ -53,41 +59,122 @@ else:
         selected_period = None
         selected_tf = f"{start_date} to {end_date}"
 
+    bar_sizes = {"Auto": None, "5 Minutes": "5m", "15 Minutes": "15m", "1 Hour": "1h", "1 Day": "1d", "1 Week": "1wk"}
+    selected_bar_size = bar_sizes[st.sidebar.selectbox("Bar Size", list(bar_sizes.keys()))]
+
     refresh_interval = st.sidebar.slider("Auto Refresh Interval (seconds)", 10, 600, 60)
     refresh_now = st.sidebar.button("Refresh Now")
 
     if refresh_now:
         st.rerun()
-    else:
-        st_autorefresh(interval=refresh_interval * 1000, key="refresh_key")
-
-    with st.spinner("Fetching data and running prediction..."):
-        data = fetch_stock_data(
-            ticker=ticker,
-            period=selected_period,
-            start_date=start_date,
-            end_date=end_date)
-
-        if data is None or data.empty:
-            st.error("No data available for the selected timeframe or custom date range.")
-            st.stop()
-
-        metrics = fetch_stock_metrics(ticker)
 
+    # Ticks rerun only these two fragments; the metrics, summary and the
+    # rest of the page are rendered once per full run.
+    header_lookups = {}
+
+    @st.fragment(run_every=refresh_interval)
+    def live_price_header():
+        # The full run's render reads the lookups it already started; ticks
+        # look the metrics up again.
+        if header_lookups:
+            metrics = header_lookups.pop("metrics").result()
+            name = header_lookups.pop("name").result()
+        else:
+            metrics = fetch_stock_metrics(ticker)
+            name = company_name(ticker)
         current_price = metrics.get("Current Price")
         prev_close = metrics.get("Previous Close")
         if isinstance(current_price, (int, float)) and isinstance(prev_close, (int, float)):
             price_change = current_price - prev_close
             percent_change = (price_change / prev_close) * 100
             st.metric(
-                label=company_name(ticker),
+                label=name,
                 value=f"{current_price:.2f}",
                 delta=f"{price_change:.2f} ({percent_change:.2f}%)")
         else:
-            st.metric(label=company_name(ticker), value="Price data not available")
+            st.metric(label=name, value="Price data not available")
+
+    @st.fragment(run_every=refresh_interval)
+    def live_chart():
+        data = fetch_stock_data(
+            ticker=ticker,
+            period=selected_period,
+            start_date=start_date,
+            end_date=end_date,
+            interval=selected_bar_size)
+        if data is None or data.empty:
+            st.error("No data available for the selected timeframe or custom date range.")
+            return
+
+        # The models learn from the whole stored series at this bar size,
+        # not just the period on screen. Its features are cached per data
+        # version and the models are only revalidated every few new bars.
+        interval = data.attrs.get("interval")
+        history = fetch_stock_data(ticker=ticker, period="max", interval=interval)
+        features = feature_matrix(
+            history, sentiment_asof(ticker, history.index, interval), key=(ticker, interval))
+        predictor = get_predictor(ticker, interval, features)
+        last_bar = features.loc[data.index[-1]] if data.index[-1] in features.index else features.iloc[-1]
+        predicted_price = predictor.predict_next(last_bar) if predictor.model is not None else None
+
+        chart_selector_col, _ = st.columns([0.15, 0.85])
+        with chart_selector_col:
+            chart_type = chart_type_selector()
+        _, fig = st.columns([0.001, 1])
+        with fig:
+            fig = plot_chart_with_bollinger(data, ticker, selected_tf, chart_type=chart_type, predicted_price=predicted_price)
+            st.plotly_chart(fig, use_container_width=True)
+
+        if predictor.metrics is not None and not predictor.metrics.empty:
+            chosen = predictor.metrics.loc[predictor.name]
+            baseline = predictor.metrics.loc["Last Close"]
+            if predictor.name == "Last Close":
+                verdict = "no model beat the last close out of sample, so it is the prediction"
+            else:
+                verdict = (f"{predictor.name} errs by {chosen[SELECT_BY]:.2f}% on average against "
+                           f"{baseline[SELECT_BY]:.2f}% for the last close, and calls the direction "
+                           f"{chosen['Direction %']:.0f}% of the time")
+            st.caption(f"Predicted next close: {predicted_price:.2f}. In walk-forward validation, {verdict}.")
+            with st.expander("Prediction models"):
+                st.dataframe(
+                    predictor.metrics,
+                    use_container_width=True,
+                    column_config={
+                        "MAE": st.column_config.NumberColumn(format="%.2f"),
+                        "RMSE %": st.column_config.NumberColumn(format="%.2f%%"),
+                        "MAPE %": st.column_config.NumberColumn(format="%.2f%%"),
+                        "Direction %": st.column_config.NumberColumn(format="%.1f%%")})
+
+        last_update = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        st.caption(f"Last updated: {last_update}")
+
+    with st.spinner("Fetching data and running prediction..."):
+        # Independent upstream calls run concurrently; each section below
+        # renders as soon as the results it needs are in.
+        news_api_key = st.secrets["NEWS_API_KEY"]
+        data_future = submit(
+            fetch_stock_data,
+            ticker=ticker,
+            period=selected_period,
+            start_date=start_date,
+            end_date=end_date,
+            interval=selected_bar_size)
+        metrics_future = submit(fetch_stock_metrics, ticker)
+        name_future = submit(company_name, ticker)
+        news_future = submit(lambda: fetch_news_and_sentiment(ticker, company_name(ticker), news_api_key))
+
+        header_lookups.update(metrics=metrics_future, name=name_future)
+        live_price_header()
+        metrics = metrics_future.result()
+        name = name_future.result()
 
         st.markdown("---")
 
+        data = data_future.result()
+        if data is None or data.empty:
+            st.error("No data available for the selected timeframe or custom date range.")
+            st.stop()
+
         def format_metric(value, key):
             if isinstance(value, (int, float)):
                 if "Cap" in key or "Value" in key or "Revenue" in key or "Cash" in key or "Income" in key:
@@ -105,7 +192,7 @@ else:
                     return f"${value:,.2f}"
             return str(value) if value is not None else "N/A"
 
-        st.subheader(f"Financial Metrics for {company_name(ticker)}")
+        st.subheader(f"Financial Metrics for {name}")
 
         prev_close = format_metric(metrics.get("Previous Close"), "Previous Close")
         market_cap = format_metric(metrics.get("Market Cap"), "Market Cap")
@@ -114,8 +201,9 @@ else:
         trailing_pe = format_metric(metrics.get("Trailing P/E"), "Trailing P/E")
         forward_pe = format_metric(metrics.get("Forward P/E"), "Forward P/E")
 
-        day_low = data['Low'].iloc[-1] if 'Low' in data.columns and not data.empty else "N/A"
-        day_high = data['High'].iloc[-1] if 'High' in data.columns and not data.empty else "N/A"
+        # Bars are stored as float32, which is not a float; cast before the check.
+        day_low = float(data['Low'].iloc[-1]) if 'Low' in data.columns and not data.empty else "N/A"
+        day_high = float(data['High'].iloc[-1]) if 'High' in data.columns and not data.empty else "N/A"
         days_range = f"{day_low:.2f} - {day_high:.2f}" if isinstance(day_low, (int, float)) and isinstance(day_high, (int, float)) else "N/A"
 
         fifty_two_w_high = format_metric(metrics.get("52W High"), "52W High")
@@ -146,18 +234,7 @@ else:
         if st.button("View All Financial Fundamentals"):
             st.switch_page(r"pages\Fundamentals.py")
 
-        last_update = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         st.markdown("---")
-        st.caption(f"Last updated: {last_update}")
-
-        avg_sentiment, articles = fetch_news_and_sentiment(ticker, company_name(ticker), st.secrets["NEWS_API_KEY"])
-        data['Sentiment'] = avg_sentiment
-        data['Close_lag1'] = data['Close'].shift(1)
-
-        predictor = StockPredictor()
-        predictor.train(data)
-        last_close = float(data['Close'].iloc[-1])
-        predicted_price = predictor.predict_next(last_close, avg_sentiment)
 
         st.markdown("""
         <style>
@@ -166,10 +243,11 @@ else:
         [data-testid="stPlotlyChart"] {overflow-x: auto !important;}
         </style>""", unsafe_allow_html=True)
 
-        chart_selector_col, _ = st.columns([0.15, 0.85])
-        with chart_selector_col:
-            chart_type = chart_type_selector()
-        _, fig = st.columns([0.001, 1])
-        with fig:
-            fig = plot_chart_with_bollinger(data, ticker, selected_tf, chart_type=chart_type, predicted_price=predicted_price)
-            st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+        live_chart()
+
+        # The news call only tops up the sentiment store the chart's
+        # predictor reads, so the chart does not wait for it; the next tick
+        # predicts with the fresh articles.
+        _, _, news_error = news_future.result()
+        if news_error:
+            st.error(news_error)
\ No newline at end of file
@@ -0,0 +1,205 @@
+import hashlib
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from frames import frame_bytes
+from indicators import ema, rsi_from_averages
+from sharedcache import MemoryBackend
+from telemetry import span, record_cache
+
+# Configurations evaluated per array pass; bounds the (bars x configs)
+# temporaries at a few tens of MB for 20 years of daily bars.
+CHUNK_CONFIGS = 256
+# Grids smaller than this run inline, where the pool would cost more
+# than it saves.
+PARALLEL_MIN_CONFIGS = 1024
+MAX_PROCESSES = min(4, (os.cpu_count() or 1) - 1)
+RESULT_CACHE_BYTES = 64 * 1024 * 1024
+KEEP_SECONDS = 86400
+
+PERIODS_PER_YEAR = {"5m": 252 * 78, "15m": 252 * 26, "1h": 252 * 7, "1d": 252, "1wk": 52}
+METRIC_COLUMNS = ["Total Return %", "CAGR %", "Sharpe", "Max Drawdown %", "Trades", "Exposure %"]
+
+def _sma_table(x, windows):
+    # Simple moving averages of x for every window at once, NaN until full.
+    sums = np.concatenate(([0.0], np.cumsum(x)))
+    n = len(x)
+    out = np.full((n, len(windows)), np.nan)
+    for j, w in enumerate(windows):
+        if w <= n:
+            out[w - 1:, j] = (sums[w:] - sums[:-w]) / w
+    return out
+
+def _columns(windows, wanted):
+    return np.searchsorted(windows, wanted)
+
+def _hold(entries, exits):
+    # Long from an entry bar until the next exit bar, found by carrying
+    # the last signal forward with a running max of its row number.
+    signal = np.where(entries, 1.0, np.where(exits, 0.0, np.nan))
+    rows = np.where(np.isnan(signal), 0, np.arange(len(signal))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return np.nan_to_num(np.take_along_axis(signal, rows, axis=0))
+
+def _sma_positions(close, configs):
+    windows = np.unique(configs)
+    sma = _sma_table(close, windows)
+    fast = sma[:, _columns(windows, configs[:, 0])]
+    slow = sma[:, _columns(windows, configs[:, 1])]
+    return (fast > slow).astype(float)
+
+def _rsi_positions(close, configs):
+    delta = np.diff(close, prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    windows = np.unique(configs[:, 0])
+    # Same simple-average RSI as the indicator panel; the first bar has no
+    # change and stays out of the averages.
+    rsi = rsi_from_averages(_sma_table(gain[1:], windows), _sma_table(loss[1:], windows))
+    rsi = np.vstack([np.full((1, len(windows)), np.nan), rsi])[:, _columns(windows, configs[:, 0])]
+    return _hold(rsi < configs[:, 1], rsi > configs[:, 2])
+
+def _macd_positions(close, configs):
+    spans = np.unique(configs[:, :2])
+    lines = {span: ema(close, 2 / (span + 1)) for span in spans}
+    positions = np.empty((len(close), len(configs)))
+    for j, (fast, slow, signal) in enumerate(configs):
+        macd = lines[fast] - lines[slow]
+        positions[:, j] = macd > ema(macd, 2 / (signal + 1))
+    return positions
+
+# Strategy name -> (parameter names, positions(close, configs), valid(configs)).
+# Positions are 1 (long) or 0 (flat) at each bar's close.
+STRATEGIES = {
+    "SMA Crossover": (("fast", "slow"), _sma_positions, lambda c: c[:, 0] < c[:, 1]),
+    "RSI Thresholds": (("window", "lower", "upper"), _rsi_positions, lambda c: c[:, 1] < c[:, 2]),
+    "MACD Signal Cross": (("fast", "slow", "signal"), _macd_positions, lambda c: c[:, 0] < c[:, 1])}
+
+def grid(strategy, ranges):
+    """Every valid combination of the parameter values in ranges, one per row."""
+    names, _, valid = STRATEGIES[strategy]
+    configs = np.array(list(itertools.product(*(ranges[name] for name in names))), dtype=np.int64)
+    configs = configs.reshape(-1, len(names))
+    return configs[valid(configs)]
+
+def strategy_returns(close, positions, cost):
+    """Per-bar returns of holding positions, net of cost per unit traded.
+
+    The position taken at a bar's close earns the next bar's return.
+    """
+    change = close[1:] / close[:-1] - 1
+    held = positions[:-1]
+    trades = np.abs(np.diff(held, axis=0, prepend=0.0))
+    return held * change[:, None] - cost * trades, trades
+
+def evaluate(close, positions, cost, periods_per_year):
+    """METRIC_COLUMNS for every column of positions, as a (configs x metrics) array."""
+    returns, trades = strategy_returns(close, positions, cost)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        growth = np.log1p(returns)
+        equity = np.exp(np.cumsum(growth, axis=0))
+        drawdown = (equity / np.maximum.accumulate(equity, axis=0) - 1).min(axis=0)
+        total = equity[-1] - 1
+        years = len(returns) / periods_per_year
+        cagr = np.exp(growth.sum(axis=0) / years) - 1
+        sharpe = returns.mean(axis=0) / returns.std(axis=0) * np.sqrt(periods_per_year)
+    return np.column_stack([
+        total * 100, cagr * 100, sharpe, drawdown * 100, trades.sum(axis=0), positions[:-1].mean(axis=0) * 100])
+
+def _evaluate_chunks(close, strategy, configs, cost, periods_per_year):
+    positions_for = STRATEGIES[strategy][1]
+    return np.vstack([
+        evaluate(close, positions_for(close, configs[i:i + CHUNK_CONFIGS]), cost, periods_per_year)
+        for i in range(0, len(configs), CHUNK_CONFIGS)])
+
+def _run_shared(name, length, strategy, configs, cost, periods_per_year):
+    # Runs in a pool worker on the parent's close array, mapped read-only
+    # from shared memory instead of pickled into every task.
+    shm = shared_memory.SharedMemory(name=name)
+    close = np.ndarray((length,), dtype=np.float64, buffer=shm.buf)
+    close.flags.writeable = False
+    try:
+        return _evaluate_chunks(close, strategy, configs, cost, periods_per_year)
+    finally:
+        # The view must go before the mapping can be closed.
+        del close
+        shm.close()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawned, not forked: the server process is multi-threaded.
+            _executor = ProcessPoolExecutor(
+                max_workers=MAX_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+def sweep(close, strategy, configs, cost=0.0, periods_per_year=252):
+    """Backtests every configuration of strategy on close; one row each.
+
+    Large grids are split across the process pool, which reads close from
+    a single shared-memory copy.
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    configs = np.asarray(configs, dtype=np.int64)
+    if MAX_PROCESSES < 1 or len(configs) < PARALLEL_MIN_CONFIGS:
+        metrics = _evaluate_chunks(close, strategy, configs, cost, periods_per_year)
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(close.nbytes, 1))
+        try:
+            np.ndarray(close.shape, dtype=close.dtype, buffer=shm.buf)[:] = close
+            parts = np.array_split(configs, MAX_PROCESSES * 4)
+            futures = [_pool().submit(_run_shared, shm.name, len(close), strategy, part, cost, periods_per_year)
+                       for part in parts if len(part)]
+            metrics = np.vstack([future.result() for future in futures])
+        finally:
+            shm.close()
+            shm.unlink()
+
+    table = pd.DataFrame(configs, columns=list(STRATEGIES[strategy][0]))
+    return pd.concat([table, pd.DataFrame(metrics, columns=METRIC_COLUMNS)], axis=1)
+
+def equity_curve(data, strategy, config, cost=0.0):
+    """Equity of one configuration and of buy-and-hold, both starting at 1."""
+    close = _closes(data)
+    positions = STRATEGIES[strategy][1](close, np.asarray([config], dtype=np.int64))
+    returns, _ = strategy_returns(close, positions, cost)
+    index = data['Close'].dropna().index[1:]
+    return pd.DataFrame({
+        "Strategy": np.cumprod(1 + returns[:, 0]),
+        "Buy & Hold": close[1:] / close[0]}, index=index)
+
+def _closes(data):
+    return data['Close'].dropna().to_numpy(dtype=np.float64)
+
+_results = MemoryBackend(RESULT_CACHE_BYTES, sizeof=frame_bytes)
+
+def run_grid(data, version, strategy, ranges, cost=0.0):
+    """sweep over grid(strategy, ranges) on data's closes, cached per data version.
+
+    version identifies the bars, e.g. figcache.frame_version(data); a new
+    bar gives a new version and a fresh sweep.
+    """
+    interval = data.attrs.get("interval", "1d")
+    ranges = {name: tuple(int(value) for value in values) for name, values in ranges.items()}
+    key = hashlib.sha1(repr((version, interval, strategy, sorted(ranges.items()), cost)).encode("utf-8")).hexdigest()
+    entry = _results.get(key)
+    record_cache("backtest", "hit" if entry is not None else "miss")
+    if entry is not None:
+        return entry[1]
+
+    configs = grid(strategy, ranges)
+    with span("backtest.sweep", strategy=strategy, configs=len(configs)):
+        table = sweep(_closes(data), strategy, configs, cost, PERIODS_PER_YEAR.get(interval, 252))
+    now = time.time()
+    _results.set(key, now, table, now + KEEP_SECONDS)
+    return table
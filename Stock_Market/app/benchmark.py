@@ -0,0 +1,361 @@
+"""Offline benchmarks of the data, indicator, plotting and prediction hot paths.
+
+Every case runs on synthetic data at each requested size (1K, 100K and 5M
+bars by default), is timed without tracing and then re-run under
+tracemalloc for its peak Python and NumPy allocation. Results are written
+as JSON; pass an earlier file with --compare to flag regressions.
+
+    python benchmark.py
+    python benchmark.py --sizes 1000 100000 --cases rsi_macd plot_bollinger
+    python benchmark.py --compare .cache/benchmarks/baseline.json
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+# Benchmarks run on generated data only, whatever the environment says.
+os.environ["DATA_PROVIDER"] = "synthetic"
+os.environ["METRICS_PORT"] = "0"
+os.environ["TELEMETRY_LOG"] = "0"
+# Results are kept in the usual cache directory. Everything the cases store
+# (bars, the fundamentals warehouse, models, sentiment and other caches)
+# goes to a scratch one, removed on exit, so no synthetic rows are left
+# behind for the app and no earlier state skews the timings.
+RESULTS_DIR = os.path.join(os.environ.get(
+    "STOCK_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")), "benchmarks")
+_scratch = tempfile.TemporaryDirectory(prefix="stock-benchmark-")
+os.environ["STOCK_CACHE_DIR"] = _scratch.name
+
+from streamlit import logger
+# Cached functions warn on every call outside a Streamlit runtime.
+logger.set_log_level("error")
+
+from providers import synthetic_bars, get_provider, set_provider
+from data import _normalize, _present
+from frames import compact
+from markets import EXCHANGES
+from pyramid import resample
+from indicators import compute_indicators
+from streaming import update_indicators
+from plots import _build_chart_with_bollinger
+from predictions import StockPredictor, feature_matrix
+from metrics import fetch_quarterly_financials
+import fundamentals
+from sentiment import get_scorer
+from risk import returns_matrix, rolling_beta, rolling_covariance
+from backtest import grid, sweep
+
+DEFAULT_SIZES = (1_000, 100_000, 5_000_000)
+# Ratio of new to baseline time above which --compare reports a regression.
+REGRESSION_RATIO = 1.2
+# Line items per synthetic statement; yfinance returns a few dozen.
+STATEMENT_ROWS = 40
+# Ten years of trading days per holding in the portfolio case.
+RISK_DAYS = 2520
+
+_WORDS = np.array(
+    "the company reported strong growth in revenue while analysts warned of "
+    "weak guidance poor margins and a serious lawsuit but the new product "
+    "launch was a great success and profit beat estimates".split())
+
+def _raw_download(n):
+    # yf.download shape: (Price, Ticker) columns and a naive index.
+    bars = synthetic_bars(n, "1m", seed=n)
+    bars.index = bars.index.tz_localize(None)
+    bars.columns = pd.MultiIndex.from_product([bars.columns, ["BENCH"]], names=["Price", "Ticker"])
+    return bars
+
+def _bars(n):
+    bars = synthetic_bars(n, "1m", seed=n).tz_convert("Asia/Kolkata")
+    bars.attrs = {"ticker": f"BENCH{n}", "interval": "1m"}
+    return bars
+
+def _texts(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [" ".join(words) for words in rng.choice(_WORDS, size=(n, 20))]
+
+class _StatementProvider:
+    # Feeds fetch_quarterly_financials statements with n cells each.
+    name = "benchmark"
+
+    def __init__(self, n):
+        quarters = max(1, n // STATEMENT_ROWS)
+        columns = pd.date_range(end="2026-06-30", periods=quarters, freq="QE")[::-1]
+        rng = np.random.default_rng(n)
+        items = ["Total Revenue", "Gross Profit", "Operating Income", "EBITDA", "EBIT",
+                 "Net Income", "Diluted EPS"] + [f"Line Item {i}" for i in range(STATEMENT_ROWS - 7)]
+        self.financials = pd.DataFrame(rng.normal(size=(len(items), quarters)), index=items, columns=columns)
+        self.balance_sheet = self.financials.rename(index=lambda item: f"Balance {item}")
+
+    def info(self, ticker):
+        return {"marketCap": 1e12, "mostRecentQuarter": int(self.financials.columns[0].timestamp())}
+
+    def quarterly_financials(self, ticker):
+        return self.financials
+
+    def quarterly_balance_sheet(self, ticker):
+        return self.balance_sheet
+
+# A case builds its inputs for n items outside the timed region and returns
+# the callable to time, which may return extra measurements. CASES pairs
+# each with an item limit for cases that would take hours at 5M.
+
+def _case_normalize(n):
+    # Download post-processing: flatten, UTC, compact, then a period view.
+    raw = _raw_download(n)
+
+    def run():
+        bars = compact(_normalize(raw.copy()))
+        _present(bars, "BENCH", "1m", "1y")
+    return run
+
+def _case_resample(n):
+    # One pyramid level built from the finest bars.
+    bars = compact(synthetic_bars(n, "1m", seed=n))
+
+    def run():
+        resample(bars, "1h", EXCHANGES["NYSE"])
+    return run
+
+def _case_plot(n):
+    data = _bars(n)
+    data.attrs = {}
+
+    def run():
+        fig = _build_chart_with_bollinger(data, "BENCH", "Max", "Candlestick", None)
+        return {"json_bytes": len(fig.to_json())}
+    return run
+
+def _case_rsi_macd(n):
+    data = _bars(n)
+
+    def run():
+        compute_indicators(data, ["RSI14", "MACD"])
+    return run
+
+def _case_stream_append(n):
+    # One new bar on a series whose indicator state is already built.
+    data = _bars(n + 1)
+    update_indicators(data.iloc[:-1], ["RSI14", "MACD", "BB50"])
+
+    def run():
+        update_indicators(data, ["RSI14", "MACD", "BB50"])
+    return run
+
+def _features(n):
+    data = _bars(n)
+    rng = np.random.default_rng(n)
+    return feature_matrix(data, rng.uniform(-1, 1, n))
+
+def _case_features(n):
+    data = _bars(n)
+    sentiment = np.zeros(n)
+
+    def run():
+        feature_matrix(data, sentiment)
+    return run
+
+def _case_train(n):
+    # Walk-forward validation of every model on n rows, then the final fit.
+    features = _features(n)
+    # The first fit imports scikit-learn.
+    StockPredictor().train(features.iloc[:-2])
+
+    def run():
+        StockPredictor().train(features.iloc[:-2])
+    return run
+
+def _case_predict(n):
+    features = _features(n)
+    predictor = StockPredictor()
+    predictor.train(features.iloc[:-2])
+
+    def run():
+        predictor.predict_next(features.iloc[-1])
+    return run
+
+def _case_financials(n):
+    # A repeat visit: the warehouse already holds the quarter.
+    set_provider(_StatementProvider(n))
+    ticker = f"BENCH{n}"
+    fetch_quarterly_financials(ticker)
+
+    def run():
+        fetch_quarterly_financials(ticker)
+    return run
+
+def _case_peers(n):
+    # Ratios for n companies already in the warehouse.
+    statements = _StatementProvider(STATEMENT_ROWS * 8)
+    tickers = [f"PEER{i}" for i in range(n)]
+    rows = fundamentals._statement_rows("PEER", statements.financials, statements.balance_sheet).droplevel("ticker")
+    fundamentals._write(
+        {ticker: statements.info(ticker) for ticker in tickers},
+        {ticker: pd.concat({ticker: rows}, names=["ticker", "quarter"]) for ticker in tickers})
+
+    def run():
+        fundamentals.peer_table(tickers)
+    return run
+
+def _case_backtest(n):
+    # A default-sized SMA crossover grid over n daily closes.
+    close = synthetic_bars(n, "1d", seed=n)["Close"].to_numpy()
+    configs = grid("SMA Crossover", {"fast": range(5, 51), "slow": range(20, 201, 5)})
+
+    def run():
+        sweep(close, "SMA Crossover", configs, 0.0005)
+        return {"configs": len(configs)}
+    return run
+
+def _case_risk(n):
+    # n holdings and an index, aligned and run through the portfolio
+    # page's rolling statistics.
+    frames = {f"R{i}": synthetic_bars(RISK_DAYS, "1d", seed=i) for i in range(n + 1)}
+
+    def run():
+        returns = returns_matrix(frames)
+        rolling_beta(returns.to_numpy()[:, 1:], returns.to_numpy()[:, 0], 60)
+        rolling_covariance(returns.iloc[:, 1:], 60).cov()
+    return run
+
+def _case_sentiment(scorer_name):
+    def case(n):
+        scorer = get_scorer(scorer_name)
+        texts = _texts(n)
+        scorer.score(texts[:10])
+
+        def run():
+            scorer.score(texts)
+        return run
+    return case
+
+CASES = {
+    "normalize_present": (_case_normalize, None),
+    "resample_1h": (_case_resample, None),
+    "plot_bollinger": (_case_plot, None),
+    "rsi_macd": (_case_rsi_macd, None),
+    "stream_append": (_case_stream_append, None),
+    "predictor_features": (_case_features, None),
+    "predictor_train": (_case_train, 20_000),
+    "predictor_predict_next": (_case_predict, None),
+    "quarterly_financials": (_case_financials, None),
+    "peer_table": (_case_peers, 5_000),
+    "backtest_sma_grid": (_case_backtest, 100_000),
+    "portfolio_risk": (_case_risk, 1_000),
+    "sentiment_lexicon": (_case_sentiment("lexicon"), 1_000_000),
+    "sentiment_textblob": (_case_sentiment("textblob"), 20_000)}
+
+def _time(run, repeat):
+    best, extra = float("inf"), None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        extra = run()
+        best = min(best, time.perf_counter() - start)
+    return best, extra
+
+def _peak(run):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def run_case(name, size, repeat=3):
+    make, limit = CASES[name]
+    items = min(size, limit) if limit else size
+    # Some cases swap in their own provider; the next starts from the usual one.
+    provider = get_provider()
+    try:
+        run = make(items)
+        # Large inputs are timed once; small ones take the best of repeat runs.
+        seconds, extra = _time(run, repeat if items <= 100_000 else 1)
+        peak = _peak(run)
+    finally:
+        set_provider(provider)
+    result = {
+        "case": name, "size": size, "items": items, "seconds": seconds,
+        "items_per_second": items / seconds if seconds > 0 else None,
+        "peak_bytes": peak}
+    result.update(extra or {})
+    return result
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def _environment():
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(), "python": platform.python_version(),
+        "platform": platform.platform(), "cpus": os.cpu_count(),
+        "numpy": np.__version__, "pandas": pd.__version__}
+
+def compare(results, baseline, ratio=REGRESSION_RATIO):
+    """Lines describing each case/size whose time grew by more than ratio."""
+    previous = {(r["case"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get((result["case"], result["size"]))
+        if old is None or not old["seconds"]:
+            continue
+        change = result["seconds"] / old["seconds"]
+        if change > ratio:
+            regressions.append(
+                f"{result['case']} @ {result['size']:,}: {old['seconds']:.4f}s -> "
+                f"{result['seconds']:.4f}s ({change:.2f}x)")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", help="result file (default: a timestamped file in .cache/benchmarks)")
+    parser.add_argument("--compare", help="earlier result file to check for regressions")
+    parser.add_argument("--ratio", type=float, default=REGRESSION_RATIO)
+    args = parser.parse_args(argv)
+
+    results = []
+    for name in args.cases:
+        for size in args.sizes:
+            result = run_case(name, size, args.repeat)
+            results.append(result)
+            extra = f"  json {result['json_bytes']:,} B" if "json_bytes" in result else ""
+            print(f"{name:24} {size:>10,} {result['seconds']:10.4f}s "
+                  f"{result['peak_bytes'] / 2**20:9.1f} MiB{extra}", flush=True)
+
+    report = {"environment": _environment(), "results": results}
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"bench-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.ratio)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+import os
+
+CACHE_DIR = os.environ.get(
+    "STOCK_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+
+# "textblob" (default) or "lexicon", see sentiment.SCORERS.
+SENTIMENT_SCORER = os.environ.get("SENTIMENT_SCORER", "textblob")
+
+# Where prices, fundamentals and news come from, see providers.PROVIDERS:
+# "live" (default), "record", "replay" or "synthetic". Point STOCK_CACHE_DIR
+# somewhere else when not running live, so the stores are kept apart.
+DATA_PROVIDER = os.environ.get("DATA_PROVIDER", "live")
+RECORDINGS_DIR = os.environ.get("RECORDINGS_DIR", os.path.join(CACHE_DIR, "recordings"))
+# Seconds added to every provider call, plus or minus a uniform jitter.
+PROVIDER_LATENCY = float(os.environ.get("PROVIDER_LATENCY", "0"))
+PROVIDER_JITTER = float(os.environ.get("PROVIDER_JITTER", "0"))
+# Fraction of provider calls that fail with a ConnectionError, to exercise
+# the gateway's retries against a local provider.
+PROVIDER_ERRORS = float(os.environ.get("PROVIDER_ERRORS", "0"))
+# Bars per synthetic series, capped at 250 years for daily bars.
+SYNTHETIC_BARS = int(os.environ.get("SYNTHETIC_BARS", "2000000"))
+
+# Prometheus text metrics are served on http://METRICS_HOST:METRICS_PORT/metrics;
+# port 0 turns the endpoint off. TELEMETRY_LOG=0 silences the JSON span lines.
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9464"))
+TELEMETRY_LOG = os.environ.get("TELEMETRY_LOG", "1") != "0"
+
+# Backend of the shared result cache, see sharedcache.BACKENDS: "memory"
+# (per process, default), "sqlite" (every process on the host) or "redis"
+# (every replica), the latter at CACHE_URL.
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory")
+CACHE_URL = os.environ.get("CACHE_URL", "redis://localhost:6379/0")
+
+# Background refresh of the most requested entries, see prefetch.py.
+# PREFETCH=0 turns it off; PREFETCH_PER_MINUTE caps its upstream calls.
+PREFETCH = os.environ.get("PREFETCH", "1") != "0"
+PREFETCH_TOP = int(os.environ.get("PREFETCH_TOP", "20"))
+PREFETCH_PER_MINUTE = float(os.environ.get("PREFETCH_PER_MINUTE", "30"))
+
+# Background import of the slow dependencies after the first screen, see
+# warmup.py. WARMUP=0 leaves each one to the code path that first needs it.
+WARMUP = os.environ.get("WARMUP", "1") != "0"
+
+# Every provider call goes through the gateway, see gateway.py. Calls per
+# second and burst allowed for each upstream, retries of a failed call, and
+# how long a price download waits for others to merge with (0 turns
+# merging off).
+UPSTREAM_RATES = {
+    "yfinance": float(os.environ.get("YFINANCE_PER_SECOND", "4")),
+    "newsapi": float(os.environ.get("NEWSAPI_PER_SECOND", "1"))}
+UPSTREAM_BURST = int(os.environ.get("UPSTREAM_BURST", "20"))
+UPSTREAM_RETRIES = int(os.environ.get("UPSTREAM_RETRIES", "3"))
+BATCH_WINDOW = float(os.environ.get("BATCH_WINDOW", "0.05"))
+
+# Memory budget of the in-process cache of compact OHLCV series, in bytes.
+FRAME_CACHE_BYTES = int(os.environ.get("FRAME_CACHE_BYTES", str(256 * 1024 * 1024)))
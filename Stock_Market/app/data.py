@@ -1,31 +1,250 @@
-import yfinance as yf
 import streamlit as st
+from sharedcache import cache_data
+import pandas as pd
 from datetime import date
+from store import load_bars, save_bars, merge_bars, covers, covered_from, bars_lock
+from providers import get_provider, split
+from frames import FRAME_CACHE, compact
+import pyramid
 
-@st.cache_data(ttl=300)
-def fetch_stock_data(ticker: str, period: str = None, start_date: date = None, end_date: date = None):
-    interval = "1d"
-    if period:
-        if period in ["1d", "5d"]:
-            interval = "15m"
-    if period:
-        data = yf.download(ticker, period=period, interval=interval)
-    elif start_date and end_date:
-        data = yf.download(
-            ticker,
-            start=start_date.strftime('%Y-%m-%d'),
-            end=end_date.strftime('%Y-%m-%d'),
-            interval=interval)
+PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1), "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6), "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2), "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10)}
+
+SESSION_PERIODS = {"1d": 1, "5d": 5}
+
+# Symbols per multi-ticker download.
+BATCH_SIZE = 100
+
+def _interval_for(period):
+    if period in SESSION_PERIODS:
+        return "15m"
+    return "1d"
+
+def _history_start(source, now):
+    # Where a full download of the source bar size starts; None is max.
+    history = pyramid.HISTORY[source]
+    return None if history is None else (now - history).normalize()
+
+def _within_history(source, start, now):
+    # Intraday bars only go back so far upstream; asking for more would
+    # never be covered and re-download on every call.
+    oldest = _history_start(source, now)
+    if oldest is None:
+        return start
+    return oldest if start is None else max(start, oldest)
+
+def _normalize(data):
+    if data is None or data.empty:
+        return None
+    data.columns = data.columns.get_level_values(0)
+    if data.index.tz is None:
+        data.index = data.index.tz_localize('UTC')
     else:
+        data.index = data.index.tz_convert('UTC')
+    return data
+
+def _requested_start(period, start_date, now):
+    if start_date is not None:
+        return pd.Timestamp(start_date, tz='UTC')
+    if period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(now.year, 1, 1, tz='UTC')
+    if period in SESSION_PERIODS:
+        # Sessions are counted locally; a week of calendar days always
+        # contains the last five of them.
+        return (now - pd.Timedelta(days=SESSION_PERIODS[period] + 7)).normalize()
+    return (now - PERIOD_OFFSETS[period]).normalize()
+
+def _widened_coverage(stored, start):
+    if start is None:
+        return "max"
+    previous = covered_from(stored)
+    if previous is not None and previous != "max":
+        return min(pd.Timestamp(previous), start).isoformat()
+    return start.isoformat()
+
+def _download_range(tickers, interval, start):
+    if start is None:
+        return get_provider().download(tickers, interval=interval)
+    return get_provider().download(tickers, start=start.strftime('%Y-%m-%d'), interval=interval)
+
+def _download_missing(ticker, interval, start, stored):
+    if not covers(stored, start):
+        fresh = _download_range(ticker, interval, start)
+        return _normalize(fresh), _widened_coverage(stored, start)
+
+    # Re-fetch from the day of the last stored bar so a bar that was still
+    # forming at the previous save gets its final values.
+    last_day = stored.index[-1].strftime('%Y-%m-%d')
+    fresh = get_provider().download(ticker, start=last_day, interval=interval)
+    return _normalize(fresh), covered_from(stored)
+
+def _bounds(bars, period, start_date, end_date):
+    # Positional bounds, so the period is a view of the base series.
+    index = bars.index
+    if period in SESSION_PERIODS:
+        sessions = index[-1].tz_convert('UTC').normalize()
+        tail = index[index.searchsorted(sessions - pd.Timedelta(days=SESSION_PERIODS[period] + 7)):]
+        days = tail.tz_convert('UTC').normalize().unique()
+        return index.searchsorted(days[-SESSION_PERIODS[period]:][0]), len(index)
+    if period == "max":
+        return 0, len(index)
+    if period is not None:
+        last = index[-1].tz_convert('UTC')
+        if period == "ytd":
+            start = pd.Timestamp(last.year, 1, 1, tz='UTC')
+        else:
+            start = last.normalize() - PERIOD_OFFSETS[period]
+        return index.searchsorted(start), len(index)
+    start = pd.Timestamp(start_date, tz='UTC')
+    end = pd.Timestamp(end_date, tz='UTC')
+    return index.searchsorted(start), index.searchsorted(end)
+
+def _covered_start(bars):
+    covered = covered_from(bars)
+    return None if covered in (None, "max") else pd.Timestamp(covered)
+
+def _refreshed(ticker, interval, stored, start):
+    # Callers hold bars_lock(ticker, interval) from loading stored to here.
+    fresh, covered = _download_missing(ticker, interval, start, stored)
+    if fresh is not None:
+        stored = merge_bars(stored, fresh)
+        save_bars(ticker, interval, stored, covered)
+        # The merge drops attrs; compact() carries coverage into the cache.
+        stored.attrs["covered_from"] = covered
+    return stored
+
+@cache_data(ttl=300, backend=FRAME_CACHE, pickled=False)
+def fetch_series(ticker: str, interval: str):
+    """The compact base series of ticker at interval, as far back as has been stored.
+
+    One entry per ticker and interval, shared read-only by every period
+    and session in the process; fetch_stock_data widens it on demand.
+    """
+    with bars_lock(ticker, interval):
+        stored = load_bars(ticker, interval)
+        if stored is None or stored.empty:
+            return None
+        # A delta download from the last stored bar; coverage stays as it was.
+        bars = compact(_refreshed(ticker, interval, stored, _covered_start(stored)))
+    pyramid.update(ticker, interval, bars)
+    return bars
+
+def _publish(ticker, source, stored):
+    # Replaces the cached base series and the aggregates built from it.
+    bars = None if stored is None or stored.empty else compact(stored)
+    fetch_series.set(bars, ticker, source)
+    pyramid.update(ticker, source, bars)
+    return bars
+
+def fetch_stock_data(ticker: str, period: str = None, start_date: date = None, end_date: date = None,
+                     interval: str = None):
+    """Bars of ticker for a period or custom range, at interval (by default
+    15m for session periods and 1d otherwise).
+
+    Bar sizes in pyramid.SOURCES are built locally from the 5m or daily
+    series, which is downloaded as far back as upstream serves the first
+    time it is needed, so later period and interval switches stay local.
+    """
+    interval = interval or _interval_for(period)
+    if not period and not (start_date and end_date):
         st.error("Please provide either a timeframe (period) or a custom date range.")
         return None
 
-    if data.empty:
+    source = pyramid.SOURCES[interval]
+    now = pd.Timestamp.now(tz='UTC')
+    start = _within_history(source, _requested_start(period, start_date, now), now)
+    bars = fetch_series(ticker, source)
+    if bars is None or not covers(bars, start):
+        with bars_lock(ticker, source):
+            # Sessions that asked at the same time wait here and find the
+            # history the first one downloaded already stored.
+            stored = load_bars(ticker, source)
+            if not covers(stored, start):
+                stored = _refreshed(ticker, source, stored, _history_start(source, now))
+            bars = _publish(ticker, source, stored)
+
+    if bars is None or bars.empty:
         return None
 
-    data.columns = data.columns.get_level_values(0)
-    if data.index.tz is None:
-        data.index = data.index.tz_localize('UTC')
-    data.index = data.index.tz_convert('Asia/Kolkata')
+    return _present(pyramid.level(ticker, interval, bars), ticker, interval, period, start_date, end_date)
+
+def _present(bars, ticker, interval, period, start_date=None, end_date=None):
+    lo, hi = _bounds(bars, period, start_date, end_date)
+    if lo >= hi:
+        return None
+
+    data = bars.iloc[lo:hi]
+    data.attrs = {"ticker": ticker, "interval": interval}
+    return data
+
+def _split_batch(raw, tickers):
+    frames = {}
+    for ticker, frame in split(raw, tickers).items():
+        frame = _normalize(frame)
+        if frame is not None:
+            frames[ticker] = frame
+    return frames
+
+def fetch_many(tickers: tuple, period: str = "6mo", interval: str = None):
+    """Batched fetch_stock_data for a list of symbols; returns {ticker: frame}.
+
+    Symbols whose base series is cached, fresh and long enough are served
+    from it. Of the rest, those missing from the store share multi-ticker
+    range downloads of just the period, and the stored ones a single delta
+    download from the oldest last bar.
+    """
+    interval = interval or _interval_for(period)
+    source = pyramid.SOURCES[interval]
+    now = pd.Timestamp.now(tz='UTC')
+    start = _within_history(source, _requested_start(period, None, now), now)
+    series = {}
+    for ticker in tickers:
+        age = fetch_series.age(ticker, source)
+        if age is not None and age < fetch_series.ttl:
+            bars = fetch_series(ticker, source)
+            if bars is not None and covers(bars, start):
+                series[ticker] = bars
+
+    pending = [ticker for ticker in tickers if ticker not in series]
+    stored = {ticker: load_bars(ticker, source) for ticker in pending}
+    cold = [ticker for ticker in pending if not covers(stored[ticker], start)]
+    warm = [ticker for ticker in pending if ticker not in cold]
+
+    downloads = []
+    for i in range(0, len(cold), BATCH_SIZE):
+        chunk = cold[i:i + BATCH_SIZE]
+        downloads.append((chunk, _download_range(chunk, source, start), True))
+    for i in range(0, len(warm), BATCH_SIZE):
+        chunk = warm[i:i + BATCH_SIZE]
+        since = min(stored[ticker].index[-1] for ticker in chunk).strftime('%Y-%m-%d')
+        downloads.append((chunk, get_provider().download(chunk, start=since, interval=source), False))
+
+    for chunk, raw, widen in downloads:
+        for ticker, fresh in _split_batch(raw, chunk).items():
+            with bars_lock(ticker, source):
+                # Reloaded, as another session may have saved since.
+                current = load_bars(ticker, source)
+                if current is None:
+                    current = stored[ticker]
+                covered = _widened_coverage(current, start) if widen else covered_from(current)
+                stored[ticker] = merge_bars(current, fresh)
+                save_bars(ticker, source, stored[ticker], covered)
+                stored[ticker].attrs["covered_from"] = covered
+
+    for ticker in pending:
+        bars = _publish(ticker, source, stored[ticker])
+        if bars is not None:
+            series[ticker] = bars
 
-    return data
\ No newline at end of file
+    frames = {}
+    for ticker in tickers:
+        if ticker in series:
+            data = _present(pyramid.level(ticker, interval, series[ticker]), ticker, interval, period)
+            if data is not None:
+                frames[ticker] = data
+    return frames
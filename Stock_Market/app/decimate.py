@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Points kept per trace. Beyond a few thousand the browser cannot resolve
+# more detail on a dashboard-sized chart anyway.
+MAX_POINTS = 3000
+# Traces with more points than this are drawn with WebGL.
+WEBGL_THRESHOLD = 1500
+
+def _numeric_x(x):
+    if isinstance(x, pd.DatetimeIndex):
+        return x.asi8.astype(float)
+    return np.asarray(x, dtype=float)
+
+def lttb_indices(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: indices of threshold representative points."""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    # Mean of each middle bucket plus the final point, so bucket i is
+    # compared against the average of bucket i + 1.
+    starts = np.append(edges[:-1], n - 1)
+    counts = np.diff(np.append(starts, n))
+    avg_x = np.add.reduceat(x, starts) / counts
+    avg_y = np.add.reduceat(y, starts) / counts
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - avg_x[i + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[i + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+def decimate_line(x, y, max_points=MAX_POINTS):
+    y = np.asarray(y, dtype=float)
+    if len(y) <= max_points:
+        return x, y
+    # Warm-up NaNs of indicator overlays carry no shape; LTTB runs on the rest.
+    finite = np.flatnonzero(~np.isnan(y))
+    keep = finite[lttb_indices(_numeric_x(x)[finite], y[finite], max_points)]
+    return x[keep], y[keep]
+
+def _bucket_starts(n, max_points):
+    return np.unique(np.linspace(0, n, max_points, endpoint=False).astype(int))
+
+def decimate_ohlc(x, open_, high, low, close, max_points=MAX_POINTS):
+    """Merges consecutive bars so each bucket keeps its first open, last close and extremes."""
+    open_, high, low, close = (np.asarray(v, dtype=float) for v in (open_, high, low, close))
+    n = len(close)
+    if n <= max_points:
+        return x, open_, high, low, close
+    starts = _bucket_starts(n, max_points)
+    ends = np.append(starts[1:], n) - 1
+    return (x[starts], open_[starts], np.fmax.reduceat(high, starts),
+            np.fmin.reduceat(low, starts), close[ends])
+
+def decimate_bars(x, y, max_points=MAX_POINTS):
+    """Keeps the largest-magnitude value of each bucket so peaks survive."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= max_points:
+        return x, y
+    starts = _bucket_starts(n, max_points)
+    bucket = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n)))
+    # Sorting by bucket, then by descending magnitude, puts each bucket's
+    # peak at the bucket's own start position.
+    order = np.lexsort((-np.nan_to_num(np.abs(y), nan=-1.0), bucket))
+    keep = order[starts]
+    return x[keep], y[keep]
+
+def _plot_x(x):
+    # Plotly draws wall-clock time and drops the offset anyway; naive
+    # datetime64 serializes without a Timestamp object per point.
+    if isinstance(x, pd.DatetimeIndex) and x.tz is not None:
+        return x.tz_localize(None).to_numpy()
+    return x
+
+def line_trace(x, y, **kwargs):
+    x, y = decimate_line(x, y)
+    trace = go.Scattergl if len(y) > WEBGL_THRESHOLD else go.Scatter
+    return trace(x=_plot_x(x), y=y, **kwargs)
+
+def ohlc_trace(trace, x, open, high, low, close, **kwargs):
+    x, open, high, low, close = decimate_ohlc(x, open, high, low, close)
+    return trace(x=_plot_x(x), open=open, high=high, low=low, close=close, **kwargs)
+
+def bar_trace(x, y, **kwargs):
+    x, y = decimate_bars(x, y)
+    return go.Bar(x=_plot_x(x), y=y, **kwargs)
@@ -0,0 +1,67 @@
+import json
+import threading
+from collections import OrderedDict
+import pandas as pd
+import plotly.graph_objects as go
+from telemetry import span, record_cache, record_payload
+
+MAX_BYTES = 64 * 1024 * 1024
+# Frames longer than this are versioned by shape, endpoints and last rows;
+# bars before the newest are not rewritten in place.
+_FULL_HASH_ROWS = 1000
+
+class FigureCache:
+    """LRU of serialized figures, bounded by the total size of their JSON."""
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+            return text
+
+    def put(self, key, text):
+        size = len(text)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old)
+            while self._entries and self.bytes + size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+            self._entries[key] = text
+            self.bytes += size
+
+_cache = FigureCache()
+
+def frame_version(frame):
+    if frame is None or frame.empty:
+        return None
+    if len(frame) <= _FULL_HASH_ROWS:
+        rows = frame
+    else:
+        rows = frame.tail(2)
+    digest = int(pd.util.hash_pandas_object(rows).sum())
+    return (frame.shape, frame.index[0], frame.index[-1], digest)
+
+def cached_figure(key, build):
+    """Returns the figure cached under key, calling build() only on a miss."""
+    text = _cache.get(key)
+    record_cache("figure", "hit" if text is not None else "miss")
+    if text is None:
+        with span("figure.build", figure=key[0]):
+            fig = build()
+        with span("figure.serialize", figure=key[0]) as fields:
+            text = fig.to_json()
+            fields["bytes"] = record_payload("figure", size=len(text))
+        _cache.put(key, text)
+    # The JSON came from a validated figure, so skip re-validation.
+    return go.Figure(json.loads(text), _validate=False)
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+from config import FRAME_CACHE_BYTES
+from sharedcache import MemoryBackend
+
+PRICE_COLUMNS = ["Close", "High", "Low", "Open"]
+DISPLAY_TZ = "Asia/Kolkata"
+
+def compact(bars, tz=DISPLAY_TZ):
+    """OHLCV only, float32 prices and the narrowest integer volume that fits.
+
+    The index is converted to the display time zone once here, so period
+    views of the series need no per-request conversion.
+    """
+    columns = {col: bars[col].to_numpy(dtype=np.float32) for col in PRICE_COLUMNS if col in bars}
+    if "Volume" in bars:
+        volume = np.nan_to_num(bars["Volume"].to_numpy(dtype=float))
+        dtype = np.uint32 if len(volume) == 0 or (volume.min() >= 0 and volume.max() < 2 ** 32) else np.int64
+        columns["Volume"] = volume.astype(dtype)
+    frame = pd.DataFrame(columns, index=bars.index.tz_convert(tz))
+    frame.attrs = dict(bars.attrs)
+    return frame
+
+def frame_bytes(frame):
+    if frame is None:
+        return 0
+    return int(frame.memory_usage(index=True, deep=False).sum())
+
+# Live base series shared by every session in the process, evicted least
+# recently used by their in-memory size.
+FRAME_CACHE = MemoryBackend(FRAME_CACHE_BYTES, sizeof=frame_bytes)
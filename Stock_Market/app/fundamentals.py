@@ -0,0 +1,217 @@
+import numbers
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from config import CACHE_DIR
+from store import file_lock, write_atomic
+from snapshot import get_info, get_quarterly_financials, get_quarterly_balance_sheet
+from telemetry import span, emit
+
+WAREHOUSE_DIR = os.path.join(CACHE_DIR, "fundamentals")
+# Info carries prices too, so it is re-read daily; statements are only
+# re-fetched when it reports a new mostRecentQuarter.
+INFO_MAX_AGE = 86400
+# Tickers fetched concurrently, and written to the warehouse together.
+FETCH_WORKERS = 8
+BATCH_SIZE = 50
+
+FLOW_ITEMS = ["Total Revenue", "Gross Profit", "Operating Income", "EBITDA", "Net Income"]
+BALANCE_ITEMS = ["Total Debt", "Stockholders Equity"]
+PEER_COLUMNS = [
+    "Market Cap ($B)", "Revenue TTM ($B)", "Net Income TTM ($B)", "Gross Margin %",
+    "Operating Margin %", "Net Margin %", "Revenue Growth YoY %", "P/E TTM", "P/S TTM",
+    "EV/EBITDA TTM", "Debt/Equity", "Latest Quarter"]
+
+_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="fundamentals")
+
+def _is_number(value):
+    return isinstance(value, numbers.Real)
+
+def _columnar(frame):
+    # Parquet needs one type per column. A field that holds numbers is
+    # numeric, with NaN for any cell that is not one, so a single odd value
+    # from upstream cannot turn the whole column into text.
+    columns = {}
+    for col in frame.columns:
+        values = frame[col]
+        if pd.api.types.is_numeric_dtype(values) or values.map(_is_number, na_action="ignore").any():
+            columns[col] = pd.to_numeric(values, errors="coerce").astype(float)
+        else:
+            columns[col] = values.astype(str).where(values.notna()).astype("string")
+    return pd.DataFrame(columns, index=frame.index)
+
+class _Table:
+    """One parquet file of the warehouse, kept in memory until it changes on disk."""
+
+    def __init__(self, name, index):
+        self.path = os.path.join(WAREHOUSE_DIR, f"{name}.parquet")
+        self.index = index
+        self._frame = None
+        self._mtime = None
+        self._lock = threading.RLock()
+
+    def _empty(self):
+        if len(self.index) == 1:
+            return pd.DataFrame(index=pd.Index([], name=self.index[0]))
+        return pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=self.index))
+
+    def load(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return self._empty()
+        with self._lock:
+            if mtime != self._mtime:
+                try:
+                    self._frame = pd.read_parquet(self.path)
+                except Exception:
+                    # A torn file is rebuilt by the next sync.
+                    return self._empty()
+                self._mtime = mtime
+            return self._frame
+
+    def replace(self, tickers, rows):
+        """Swaps every row of tickers for rows.
+
+        Held across processes from the read to the write, so concurrent
+        syncs of different tickers never drop each other's rows.
+        """
+        with self._lock, file_lock(self.path + ".lock"):
+            current = self.load()
+            kept = current[~current.index.get_level_values("ticker").isin(tickers)]
+            frame = _columnar(pd.concat([kept, rows]) if len(kept) else rows)
+            if len(self.index) > 1:
+                frame = frame.sort_index(level=self.index, ascending=[True, False])
+            else:
+                frame = frame.sort_index()
+            write_atomic(self.path, frame.to_parquet)
+            self._frame = frame
+            self._mtime = os.stat(self.path).st_mtime_ns
+
+INFO = _Table("info", ["ticker"])
+# One row per ticker and quarter, newest quarter first, one column per
+# statement line item.
+STATEMENTS = _Table("statements", ["ticker", "quarter"])
+
+def _info_row(info):
+    return {key: value for key, value in info.items() if not isinstance(value, (list, tuple, dict))}
+
+def _statement_rows(ticker, financials, balance_sheet):
+    combined = pd.concat([financials, balance_sheet])
+    combined = combined[~combined.index.duplicated()]
+    rows = combined.T
+    rows.index = pd.DatetimeIndex(rows.index).tz_localize(None)
+    rows.columns = rows.columns.astype(str)
+    return pd.concat({ticker: rows}, names=["ticker", "quarter"])
+
+def _try(fn, ticker):
+    try:
+        return fn(ticker)
+    except Exception as e:
+        emit("fundamentals_fetch_failed", ticker=ticker, error=type(e).__name__)
+        return None
+
+def _statements(ticker):
+    return _statement_rows(ticker, get_quarterly_financials(ticker), get_quarterly_balance_sheet(ticker))
+
+def _stored_quarter(info, ticker):
+    if ticker not in info.index or "mostRecentQuarter" not in info.columns:
+        return None
+    value = info.at[ticker, "mostRecentQuarter"]
+    return None if pd.isna(value) else float(value)
+
+def _quarter(info):
+    value = info.get("mostRecentQuarter")
+    return None if value is None else float(value)
+
+def _write(infos, statements):
+    """Stores fetched info dicts and statement rows, both keyed by ticker."""
+    if statements:
+        STATEMENTS.replace(list(statements), pd.concat(statements.values()))
+    if infos:
+        rows = pd.DataFrame.from_dict({ticker: _info_row(info) for ticker, info in infos.items()}, orient="index")
+        rows.index.name = "ticker"
+        rows["fetched_at"] = time.time()
+        INFO.replace(list(infos), rows)
+
+def sync(tickers, now=None):
+    """Brings the warehouse up to date for tickers; returns those re-fetched.
+
+    Info is read again once a day, in parallel batches, and a ticker's
+    statements only when its mostRecentQuarter differs from the stored one.
+    """
+    now = time.time() if now is None else now
+    known = INFO.load()
+    fetched_at = known["fetched_at"] if "fetched_at" in known.columns else pd.Series(dtype=float)
+    stored = set(STATEMENTS.load().index.get_level_values("ticker"))
+    stale = [t for t in dict.fromkeys(tickers)
+             if t not in fetched_at.index or now - fetched_at[t] >= INFO_MAX_AGE]
+
+    refetched = []
+    for i in range(0, len(stale), BATCH_SIZE):
+        chunk = stale[i:i + BATCH_SIZE]
+        with span("fundamentals.sync", tickers=len(chunk)):
+            infos = {t: value for t, value in zip(chunk, _executor.map(lambda t: _try(get_info, t), chunk))
+                     if value is not None}
+            changed = [t for t, value in infos.items()
+                       if t not in stored or _stored_quarter(known, t) != _quarter(value)]
+            statements = {t: rows for t, rows in zip(changed, _executor.map(lambda t: _try(_statements, t), changed))
+                          if rows is not None}
+            _write(infos, statements)
+        refetched.extend(statements)
+    return refetched
+
+def info(ticker):
+    """The stored info of ticker as a dict, without missing fields."""
+    table = INFO.load()
+    if ticker not in table.index:
+        return {}
+    row = table.loc[ticker].drop("fetched_at", errors="ignore")
+    return {key: value for key, value in row.items() if not pd.isna(value)}
+
+def statements(ticker):
+    """ticker's stored statements as line items by quarter, newest first."""
+    table = STATEMENTS.load()
+    if ticker not in table.index.get_level_values("ticker"):
+        return pd.DataFrame()
+    return table.xs(ticker, level="ticker").dropna(axis=1, how="all").T
+
+def peer_table(tickers):
+    """Valuation, margin and growth ratios for tickers, from the warehouse only.
+
+    Computed for all tickers at once on the stored columns: TTM sums over
+    each ticker's latest four quarters, growth against the fifth.
+    """
+    table = STATEMENTS.load()
+    table = table[table.index.get_level_values("ticker").isin(tickers)]
+    items = table.reindex(columns=FLOW_ITEMS + BALANCE_ITEMS).astype(float)
+    quarters = items.groupby(level="ticker", sort=False)
+    ttm = quarters.head(4).groupby(level="ticker")[FLOW_ITEMS].sum(min_count=4)
+    latest = quarters.nth(0).droplevel("quarter")
+    year_ago = quarters.nth(4).droplevel("quarter")
+
+    index = pd.Index(list(dict.fromkeys(tickers)), name="Ticker")
+    ttm, latest, year_ago = ttm.reindex(index), latest.reindex(index), year_ago.reindex(index)
+    info = INFO.load().reindex(index=index, columns=["marketCap", "enterpriseValue"]).astype(float)
+    revenue, net_income = ttm["Total Revenue"], ttm["Net Income"]
+    last_quarter = pd.Series(table.index.get_level_values("quarter"), index=table.index.get_level_values("ticker"))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        peers = pd.DataFrame({
+            "Market Cap ($B)": info["marketCap"] / 1e9,
+            "Revenue TTM ($B)": revenue / 1e9,
+            "Net Income TTM ($B)": net_income / 1e9,
+            "Gross Margin %": ttm["Gross Profit"] / revenue * 100,
+            "Operating Margin %": ttm["Operating Income"] / revenue * 100,
+            "Net Margin %": net_income / revenue * 100,
+            "Revenue Growth YoY %": (latest["Total Revenue"] / year_ago["Total Revenue"] - 1) * 100,
+            "P/E TTM": info["marketCap"] / net_income,
+            "P/S TTM": info["marketCap"] / revenue,
+            "EV/EBITDA TTM": info["enterpriseValue"] / ttm["EBITDA"],
+            "Debt/Equity": latest["Total Debt"] / latest["Stockholders Equity"],
+            "Latest Quarter": last_quarter.groupby(level=0).max().reindex(index)},
+            index=index, columns=PEER_COLUMNS)
+    return peers.replace([np.inf, -np.inf], np.nan)
@@ -0,0 +1,162 @@
+import random
+import threading
+import time
+from config import UPSTREAM_RATES, UPSTREAM_BURST, UPSTREAM_RETRIES, BATCH_WINDOW
+from telemetry import span, emit, GATEWAY_QUEUE
+from throttle import TokenBucket
+
+# Provider call -> the upstream service whose rate limit it counts against.
+UPSTREAMS = {
+    "download": "yfinance", "info": "yfinance", "quarterly_financials": "yfinance",
+    "quarterly_balance_sheet": "yfinance", "news": "newsapi"}
+# Symbols per merged download; a batch this large stops taking requests.
+MAX_BATCH_TICKERS = 100
+# Full-jitter backoff: retry n sleeps up to BACKOFF_BASE * 2**n seconds,
+# capped at BACKOFF_MAX.
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+# Answers that a retry cannot change, e.g. ReplayProvider's missing recordings.
+PERMANENT_ERRORS = (LookupError,)
+# A caller whose part of a download came back empty asks again alone,
+# after a jittered wait of up to this many seconds.
+EMPTY_RETRY_DELAY = 0.5
+
+def _empty(frame):
+    # yf.download reports a failure with an empty frame rather than raising.
+    return frame is None or frame.empty
+
+def _tickers(tickers):
+    return [tickers] if isinstance(tickers, str) else list(tickers)
+
+class _Batch:
+    def __init__(self, tickers):
+        self.tickers = dict.fromkeys(_tickers(tickers))
+        self.first = tickers
+        self.requests = 1
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class Gateway:
+    """Sits in front of another provider and shares its upstreams between sessions.
+
+    Price downloads asking for the same interval and start within window
+    seconds are merged into one multi-symbol download, and every call
+    takes a token from its upstream's bucket and is retried with jittered
+    backoff when it raises.
+
+    A failed download and an unknown symbol both answer with an empty
+    frame, so a caller whose part of a download is empty asks for its own
+    symbols once more, unbatched; whatever that returns is its answer.
+    The other callers of the batch are answered without waiting for it.
+    queue_depth() reports the calls waiting.
+    """
+
+    def __init__(self, inner, rates=None, burst=UPSTREAM_BURST, window=BATCH_WINDOW,
+                 retries=UPSTREAM_RETRIES):
+        self.inner = inner
+        self.name = inner.name
+        rates = UPSTREAM_RATES if rates is None else rates
+        self.buckets = {upstream: TokenBucket(rate, burst) for upstream, rate in rates.items()}
+        self.window = window
+        self.retries = retries
+        self._open = {}
+        self._lock = threading.Lock()
+
+    def queue_depth(self, upstream=None):
+        upstreams = set(UPSTREAMS.values()) if upstream is None else [upstream]
+        return sum(GATEWAY_QUEUE.get(name) for name in upstreams)
+
+    def _call(self, call, *args, **kwargs):
+        upstream = UPSTREAMS.get(call)
+        bucket = self.buckets.get(upstream)
+        for attempt in range(self.retries + 1):
+            if bucket is not None:
+                bucket.acquire()
+            try:
+                return getattr(self.inner, call)(*args, **kwargs)
+            except PERMANENT_ERRORS:
+                raise
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+                emit("gateway_retry", upstream=upstream, call=call, attempt=attempt + 1,
+                     delay=round(delay, 3), error=type(e).__name__)
+                time.sleep(delay)
+
+    def _queued(self, call, fn):
+        upstream = UPSTREAMS.get(call, "other")
+        GATEWAY_QUEUE.add(upstream)
+        try:
+            return fn()
+        finally:
+            GATEWAY_QUEUE.add(upstream, amount=-1)
+
+    def download(self, tickers, start=None, interval="1d"):
+        return self._queued("download", lambda: self._download(tickers, start, interval))
+
+    def _download(self, tickers, start, interval):
+        key = (interval, start)
+        with self._lock:
+            batch = self._open.get(key) if self.window > 0 else None
+            leader = batch is None
+            if leader:
+                batch = _Batch(tickers)
+                if self.window > 0:
+                    self._open[key] = batch
+            else:
+                batch.tickers.update(dict.fromkeys(_tickers(tickers)))
+                batch.requests += 1
+            if len(batch.tickers) >= MAX_BATCH_TICKERS and self._open.get(key) is batch:
+                del self._open[key]
+                batch.full.set()
+
+        if leader:
+            if self.window > 0:
+                batch.full.wait(self.window)
+                with self._lock:
+                    if self._open.get(key) is batch:
+                        del self._open[key]
+            # A request for a single symbol goes upstream exactly as it was made.
+            merged = list(batch.tickers) if len(batch.tickers) > 1 else batch.first
+            try:
+                with span("gateway.batch", interval=interval, requests=batch.requests, tickers=len(batch.tickers)):
+                    batch.result = self._call("download", merged, start=start, interval=interval)
+            except Exception as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        part = self._part(batch, tickers)
+        if _empty(part):
+            delay = random.uniform(0, EMPTY_RETRY_DELAY)
+            emit("gateway_retry", upstream=UPSTREAMS["download"], call="download", attempt=1,
+                 delay=round(delay, 3), error="EmptyResponse")
+            time.sleep(delay)
+            part = self._call("download", tickers, start=start, interval=interval)
+        return part
+
+    def _part(self, batch, tickers):
+        # Each caller gets its own frame, as callers rename columns in place.
+        raw = batch.result
+        if batch.requests == 1:
+            return raw
+        if raw is None or raw.empty or raw.columns.nlevels == 1:
+            return None if raw is None else raw.copy()
+        wanted = raw.columns.get_level_values(1).isin(_tickers(tickers))
+        return raw.loc[:, wanted].dropna(how="all")
+
+    def __getattr__(self, attr):
+        method = getattr(self.inner, attr)
+        if not callable(method) or attr not in UPSTREAMS:
+            return method
+
+        def gated(*args, **kwargs):
+            return self._queued(attr, lambda: self._call(attr, *args, **kwargs))
+        return gated
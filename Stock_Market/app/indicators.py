@@ -0,0 +1,376 @@
+import re
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+DEFAULT_WINDOWS = {
+    "SMA": 50, "EMA": 12, "WMA": 20, "HMA": 20, "ENV": 20, "STOCH": 14,
+    "ROC": 12, "CCI": 20, "ATR": 14, "KC": 20, "DC": 20, "CMF": 20,
+    "VOLSMA": 20, "RSI": 14, "BB": 20, "FIB": 100}
+
+ENVELOPE_PCT = 0.025
+FIB_RATIOS = (0.236, 0.382, 0.5, 0.618, 0.786)
+_CHUNK = 1 << 16
+
+def _rolling_windows(x, window, fn):
+    # Reduces each full window of x with fn(view, axis=1), a chunk of rows at
+    # a time so the temporaries stay bounded on multi-million-bar series.
+    out = np.full(len(x), np.nan)
+    if len(x) < window:
+        return out
+    view = sliding_window_view(x, window)
+    for start in range(0, len(view), _CHUNK):
+        out[window - 1 + start:window - 1 + start + _CHUNK] = fn(view[start:start + _CHUNK])
+    return out
+
+def ema(x, alpha):
+    # Matches pandas ewm(adjust=False): y[0] = x[0],
+    # y[t] = (1 - alpha) * y[t-1] + alpha * x[t]. The recursion is unrolled
+    # in closed form per block; the block length keeps decay**-k finite.
+    x = np.asarray(x, dtype=float)
+    out = np.full(len(x), np.nan)
+    valid = np.flatnonzero(~np.isnan(x))
+    if len(valid) == 0:
+        return out
+    first = valid[0]
+    x = pd.Series(x[first:]).ffill().to_numpy()
+    decay = 1.0 - alpha
+    if decay <= 0:
+        out[first:] = x
+        return out
+    block = int(min(_CHUNK, max(1, 300 / -np.log(decay))))
+    level = out[first] = x[0]
+    for start in range(1, len(x), block):
+        seg = x[start:start + block]
+        powers = decay ** np.arange(1, len(seg) + 1)
+        ys = powers * (level + np.cumsum(alpha * seg / powers))
+        out[first + start:first + start + len(seg)] = ys
+        level = ys[-1]
+    return out
+
+class Workspace:
+    """OHLCV arrays plus memoized intermediates shared between indicators."""
+
+    def __init__(self, data):
+        self.index = data.index
+        self.arrays = {
+            "open": data["Open"].to_numpy(dtype=float),
+            "high": data["High"].to_numpy(dtype=float),
+            "low": data["Low"].to_numpy(dtype=float),
+            "close": data["Close"].to_numpy(dtype=float)}
+        if "Volume" in data.columns:
+            self.arrays["volume"] = data["Volume"].to_numpy(dtype=float)
+        self._memo = {}
+
+    def add(self, name, values):
+        self.arrays[name] = values
+        return values
+
+    def __len__(self):
+        return len(self.index)
+
+    def _cached(self, key, fn):
+        if key not in self._memo:
+            self._memo[key] = fn()
+        return self._memo[key]
+
+    def series(self, name):
+        if name in self.arrays:
+            return self.arrays[name]
+        return self._cached(("series", name), lambda: _DERIVED[name](self))
+
+    def _centered_cumsums(self, name):
+        def build():
+            x = self.series(name)
+            finite = ~np.isnan(x)
+            center = x[finite].mean() if finite.any() else 0.0
+            xc = np.where(finite, x - center, 0.0)
+            zero = np.zeros(1)
+            return (center,
+                    np.concatenate([zero, np.cumsum(xc)]),
+                    np.concatenate([zero, np.cumsum(xc * xc)]),
+                    np.concatenate([zero, np.cumsum(~finite)]))
+        return self._cached(("cumsums", name), build)
+
+    def _window_sums(self, name, window):
+        def build():
+            center, s1, s2, nans = self._centered_cumsums(name)
+            n = len(self)
+            sum_c = np.full(n, np.nan)
+            sq_c = np.full(n, np.nan)
+            if n >= window:
+                complete = (nans[window:] - nans[:-window]) == 0
+                sum_c[window - 1:] = np.where(complete, s1[window:] - s1[:-window], np.nan)
+                sq_c[window - 1:] = np.where(complete, s2[window:] - s2[:-window], np.nan)
+            return center, sum_c, sq_c
+        return self._cached(("window_sums", name, window), build)
+
+    def rolling_sum(self, name, window):
+        def build():
+            center, sum_c, _ = self._window_sums(name, window)
+            return sum_c + window * center
+        return self._cached(("sum", name, window), build)
+
+    def rolling_mean(self, name, window):
+        return self._cached(("mean", name, window), lambda: self.rolling_sum(name, window) / window)
+
+    def rolling_std(self, name, window):
+        def build():
+            _, sum_c, sq_c = self._window_sums(name, window)
+            var = (sq_c - sum_c * sum_c / window) / (window - 1)
+            return np.sqrt(np.maximum(var, 0.0))
+        return self._cached(("std", name, window), build)
+
+    def rolling_max(self, name, window):
+        return self._cached(("max", name, window),
+                            lambda: _rolling_windows(self.series(name), window, lambda v: v.max(axis=1)))
+
+    def rolling_min(self, name, window):
+        return self._cached(("min", name, window),
+                            lambda: _rolling_windows(self.series(name), window, lambda v: v.min(axis=1)))
+
+    def ema(self, name, alpha):
+        return self._cached(("ema", name, alpha), lambda: ema(self.series(name), alpha))
+
+    def wma(self, name, window):
+        def build():
+            x = self.series(name)
+            out = np.full(len(x), np.nan)
+            if len(x) >= window:
+                weights = np.arange(1, window + 1, dtype=float)
+                out[window - 1:] = np.convolve(x, weights[::-1], "valid") / weights.sum()
+            return out
+        return self._cached(("wma", name, window), build)
+
+def _typical_price(ws):
+    return (ws.series("high") + ws.series("low") + ws.series("close")) / 3
+
+def _prev_close(ws):
+    close = ws.series("close")
+    return np.concatenate([[np.nan], close[:-1]])
+
+def _true_range(ws):
+    high, low, prev = ws.series("high"), ws.series("low"), ws.series("prev_close")
+    return np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+
+def _delta(ws):
+    return np.concatenate([[np.nan], np.diff(ws.series("close"))])
+
+def _gain(ws):
+    delta = ws.series("delta")
+    return np.where(delta > 0, delta, 0.0)
+
+def _loss(ws):
+    delta = ws.series("delta")
+    return np.where(delta < 0, -delta, 0.0)
+
+def _money_flow_volume(ws):
+    high, low, close = ws.series("high"), ws.series("low"), ws.series("close")
+    span = high - low
+    with np.errstate(invalid="ignore", divide="ignore"):
+        multiplier = np.where(span > 0, ((close - low) - (high - close)) / span, 0.0)
+    return multiplier * ws.series("volume")
+
+_DERIVED = {
+    "typical": _typical_price,
+    "prev_close": _prev_close,
+    "true_range": _true_range,
+    "delta": _delta,
+    "gain": _gain,
+    "loss": _loss,
+    "mfv": _money_flow_volume}
+
+def _sma(ws, n):
+    return {f"SMA{n}": ws.rolling_mean("close", n)}
+
+def _ema(ws, n):
+    return {f"EMA{n}": ws.ema("close", 2 / (n + 1))}
+
+def _wma(ws, n):
+    return {f"WMA{n}": ws.wma("close", n)}
+
+def _hma(ws, n):
+    half = ws.wma("close", max(n // 2, 1))
+    full = ws.wma("close", n)
+    raw = 2 * half - full
+    sqrt_n = max(int(np.sqrt(n)), 1)
+    out = np.full(len(ws), np.nan)
+    valid = np.flatnonzero(~np.isnan(raw))
+    if len(valid) >= sqrt_n:
+        weights = np.arange(1, sqrt_n + 1, dtype=float)
+        smoothed = np.convolve(raw[valid[0]:], weights[::-1], "valid") / weights.sum()
+        out[valid[0] + sqrt_n - 1:] = smoothed
+    return {f"HMA{n}": out}
+
+def _envelope(ws, n):
+    mid = ws.rolling_mean("close", n)
+    return {f"ENV{n}_Upper": mid * (1 + ENVELOPE_PCT), f"ENV{n}_Lower": mid * (1 - ENVELOPE_PCT)}
+
+def _psar(ws, step=0.02, max_step=0.2):
+    # Parabolic SAR flips on its own output, so it is inherently sequential.
+    high = ws.series("high").tolist()
+    low = ws.series("low").tolist()
+    n = len(high)
+    out = [np.nan] * n
+    if n < 2:
+        return {"PSAR": np.array(out)}
+    rising = True
+    sar, extreme, af = low[0], high[0], step
+    out[0] = sar
+    for i in range(1, n):
+        sar = sar + af * (extreme - sar)
+        if rising:
+            sar = min(sar, low[i - 1], low[i - 2] if i > 1 else low[i - 1])
+            if low[i] < sar:
+                rising, sar, extreme, af = False, extreme, low[i], step
+            elif high[i] > extreme:
+                extreme, af = high[i], min(af + step, max_step)
+        else:
+            sar = max(sar, high[i - 1], high[i - 2] if i > 1 else high[i - 1])
+            if high[i] > sar:
+                rising, sar, extreme, af = True, extreme, high[i], step
+            elif low[i] < extreme:
+                extreme, af = low[i], min(af + step, max_step)
+        out[i] = sar
+    return {"PSAR": np.array(out, dtype=float)}
+
+def _stochastic(ws, n, smooth=3):
+    highest = ws.rolling_max("high", n)
+    lowest = ws.rolling_min("low", n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fast_k = 100 * (ws.series("close") - lowest) / (highest - lowest)
+    ws.add(f"stoch{n}_fast", fast_k)
+    slow_k = ws.add(f"stoch{n}_k", ws.rolling_mean(f"stoch{n}_fast", smooth))
+    return {f"STOCH{n}_K": slow_k, f"STOCH{n}_D": ws.rolling_mean(f"stoch{n}_k", smooth)}
+
+def _roc(ws, n):
+    close = ws.series("close")
+    out = np.full(len(close), np.nan)
+    out[n:] = 100 * (close[n:] / close[:-n] - 1)
+    return {f"ROC{n}": out}
+
+def _cci(ws, n):
+    tp = ws.series("typical")
+    mean = ws.rolling_mean("typical", n)
+    deviation = np.full(len(tp), np.nan)
+    if len(tp) >= n:
+        view = sliding_window_view(tp, n)
+        for start in range(0, len(view), _CHUNK):
+            rows = view[start:start + _CHUNK]
+            centers = mean[n - 1 + start:n - 1 + start + len(rows)]
+            deviation[n - 1 + start:n - 1 + start + len(rows)] = np.abs(rows - centers[:, None]).mean(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {f"CCI{n}": (tp - mean) / (0.015 * deviation)}
+
+def _atr(ws, n):
+    return {f"ATR{n}": ws.ema("true_range", 1 / n)}
+
+def _keltner(ws, n, mult=2):
+    mid = ws.ema("close", 2 / (n + 1))
+    atr = ws.ema("true_range", 1 / n)
+    return {f"KC{n}_Middle": mid, f"KC{n}_Upper": mid + mult * atr, f"KC{n}_Lower": mid - mult * atr}
+
+def _donchian(ws, n):
+    upper = ws.rolling_max("high", n)
+    lower = ws.rolling_min("low", n)
+    return {f"DC{n}_Upper": upper, f"DC{n}_Lower": lower, f"DC{n}_Middle": (upper + lower) / 2}
+
+def _obv(ws):
+    direction = np.sign(np.nan_to_num(ws.series("delta")))
+    return {"OBV": np.cumsum(direction * np.nan_to_num(ws.series("volume")))}
+
+def _vwap(ws):
+    pv = np.nan_to_num(ws.series("typical") * ws.series("volume"))
+    volume = np.nan_to_num(ws.series("volume"))
+    cum_pv = np.cumsum(pv)
+    cum_v = np.cumsum(volume)
+    index = ws.index
+    if len(index) > 1 and isinstance(index, pd.DatetimeIndex) and np.median(np.diff(index.asi8)) < pd.Timedelta(days=1).value:
+        # Intraday bars: the average resets at the start of every session.
+        day = index.normalize().asi8
+        starts = np.flatnonzero(np.concatenate([[True], day[1:] != day[:-1]]))
+        lengths = np.diff(np.append(starts, len(index)))
+        base_pv = np.repeat(np.concatenate([[0.0], cum_pv])[starts], lengths)
+        base_v = np.repeat(np.concatenate([[0.0], cum_v])[starts], lengths)
+        cum_pv, cum_v = cum_pv - base_pv, cum_v - base_v
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {"VWAP": cum_pv / cum_v}
+
+def _cmf(ws, n):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {f"CMF{n}": ws.rolling_sum("mfv", n) / ws.rolling_sum("volume", n)}
+
+def _volume_sma(ws, n):
+    return {f"VOLSMA{n}": ws.rolling_mean("volume", n)}
+
+def rsi_from_averages(gain, loss):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return 100 - 100 / (1 + gain / loss)
+
+def _rsi(ws, n):
+    return {f"RSI{n}": rsi_from_averages(ws.rolling_mean("gain", n), ws.rolling_mean("loss", n))}
+
+def _macd(ws, fast=12, slow=26, signal=9):
+    macd = ws.ema("close", 2 / (fast + 1)) - ws.ema("close", 2 / (slow + 1))
+    signal_line = ema(macd, 2 / (signal + 1))
+    return {"MACD": macd, "MACD_Signal": signal_line, "MACD_Hist": macd - signal_line}
+
+def _bollinger(ws, n, mult=2):
+    mid = ws.rolling_mean("close", n)
+    std = ws.rolling_std("close", n)
+    return {f"BB{n}_Middle": mid, f"BB{n}_Upper": mid + mult * std, f"BB{n}_Lower": mid - mult * std}
+
+def _pivots(ws):
+    high, low = _shift(ws.series("high")), _shift(ws.series("low"))
+    pivot = _shift(ws.series("typical"))
+    return {
+        "PIVOT_P": pivot,
+        "PIVOT_R1": 2 * pivot - low, "PIVOT_S1": 2 * pivot - high,
+        "PIVOT_R2": pivot + (high - low), "PIVOT_S2": pivot - (high - low)}
+
+def _fibonacci(ws, n):
+    highest = ws.rolling_max("high", n)
+    lowest = ws.rolling_min("low", n)
+    span = highest - lowest
+    return {f"FIB{n}_{round(r * 1000)}": highest - r * span for r in FIB_RATIOS}
+
+def _shift(x):
+    return np.concatenate([[np.nan], x[:-1]])
+
+INDICATORS = {
+    "SMA": _sma, "EMA": _ema, "WMA": _wma, "HMA": _hma, "ENV": _envelope,
+    "PSAR": _psar, "STOCH": _stochastic, "ROC": _roc, "CCI": _cci,
+    "ATR": _atr, "KC": _keltner, "DC": _donchian, "OBV": _obv,
+    "VWAP": _vwap, "CMF": _cmf, "VOLSMA": _volume_sma, "RSI": _rsi,
+    "MACD": _macd, "BB": _bollinger, "PIVOT": _pivots, "FIB": _fibonacci}
+
+_SPEC = re.compile(r"^([A-Z]+?)(\d*)$")
+
+def parse_spec(spec):
+    match = _SPEC.match(spec.upper())
+    if not match or match.group(1) not in INDICATORS:
+        raise ValueError(f"Unknown indicator: {spec}")
+    name, window = match.groups()
+    if name in DEFAULT_WINDOWS:
+        return name, int(window) if window else DEFAULT_WINDOWS[name]
+    if window:
+        raise ValueError(f"{name} does not take a window: {spec}")
+    return name, None
+
+def compute_indicators(data, specs):
+    """Computes every indicator in specs over data's OHLCV columns.
+
+    Specs are names with an optional window, e.g. "SMA50", "RSI14", "MACD"
+    or "BB20". The columns are returned as one DataFrame backed by a single
+    2-D float array.
+    """
+    ws = Workspace(data)
+    results = {}
+    for spec in specs:
+        name, window = parse_spec(spec)
+        fn = INDICATORS[name]
+        results.update(fn(ws) if window is None else fn(ws, window))
+    block = np.empty((len(ws), len(results)))
+    for i, values in enumerate(results.values()):
+        block[:, i] = values
+    return pd.DataFrame(block, index=data.index, columns=list(results), copy=False)
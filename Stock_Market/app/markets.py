@@ -0,0 +1,101 @@
+import datetime
+import functools
+import pandas as pd
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar, Holiday, GoodFriday, USLaborDay, USMartinLutherKingJr,
+    USMemorialDay, USPresidentsDay, USThanksgivingDay, nearest_workday, sunday_to_monday)
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    # Full-day closures. A Saturday New Year's Day is not observed on the
+    # Friday before, unlike the federal calendar.
+    rules = [
+        Holiday("New Year's Day", month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr, USPresidentsDay, GoodFriday, USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01", observance=nearest_workday),
+        Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+        USLaborDay, USThanksgivingDay,
+        Holiday("Christmas Day", month=12, day=25, observance=nearest_workday)]
+
+class Exchange:
+    """Regular session hours of one exchange in its local time zone.
+
+    Without a holiday calendar only weekends are closed; NSE and LSE
+    holidays are announced yearly rather than following fixed rules.
+    """
+
+    def __init__(self, name, tz, open, close, calendar=None, always_open=False):
+        self.name = name
+        self.tz = tz
+        self.open = open
+        self.close = close
+        self.calendar = calendar
+        self.always_open = always_open
+
+    @functools.lru_cache(maxsize=64)
+    def holidays(self, year):
+        if self.calendar is None:
+            return frozenset()
+        days = self.calendar.holidays(datetime.date(year, 1, 1), datetime.date(year, 12, 31))
+        return frozenset(day.date() for day in days)
+
+    def is_trading_day(self, day):
+        return self.always_open or (day.weekday() < 5 and day not in self.holidays(day.year))
+
+    def _local(self, now):
+        now = pd.Timestamp.now(tz="UTC") if now is None else pd.Timestamp(now)
+        return now.tz_convert(self.tz) if now.tzinfo else now.tz_localize("UTC").tz_convert(self.tz)
+
+    def _at(self, day, time):
+        return pd.Timestamp(datetime.datetime.combine(day, time)).tz_localize(self.tz)
+
+    def is_open(self, now=None):
+        if self.always_open:
+            return True
+        local = self._local(now)
+        return (self.is_trading_day(local.date())
+                and self.open <= local.time() < self.close)
+
+    def last_close(self, now=None):
+        """The most recent session close at or before now (now if always open)."""
+        local = self._local(now)
+        if self.always_open:
+            return local
+        day = local.date()
+        if local.time() < self.close:
+            day -= datetime.timedelta(days=1)
+        while not self.is_trading_day(day):
+            day -= datetime.timedelta(days=1)
+        return self._at(day, self.close)
+
+    def next_open(self, now=None):
+        """The next session open after now (now if open or always open)."""
+        local = self._local(now)
+        if self.is_open(local):
+            return local
+        day = local.date()
+        if local.time() >= self.open:
+            day += datetime.timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += datetime.timedelta(days=1)
+        return self._at(day, self.open)
+
+_NYSE = NYSEHolidayCalendar()
+
+EXCHANGES = {
+    "NYSE": Exchange("NYSE", "America/New_York", datetime.time(9, 30), datetime.time(16, 0), _NYSE),
+    "NSE": Exchange("NSE", "Asia/Kolkata", datetime.time(9, 15), datetime.time(15, 30)),
+    "BSE": Exchange("BSE", "Asia/Kolkata", datetime.time(9, 15), datetime.time(15, 30)),
+    "LSE": Exchange("LSE", "Europe/London", datetime.time(8, 0), datetime.time(16, 30)),
+    "CRYPTO": Exchange("CRYPTO", "UTC", datetime.time(0, 0), datetime.time(23, 59), always_open=True)}
+
+# Yahoo symbol suffixes; anything else is treated as a US listing.
+SUFFIXES = {".NS": "NSE", ".BO": "BSE", ".L": "LSE", "-USD": "CRYPTO"}
+
+def exchange_for(ticker):
+    for suffix, name in SUFFIXES.items():
+        if ticker.upper().endswith(suffix):
+            return EXCHANGES[name]
+    return EXCHANGES["NYSE"]
+
+def is_open(ticker, now=None):
+    return exchange_for(ticker).is_open(now)
@@ -1,20 +1,19 @@
-import yfinance as yf
-import streamlit as st
-import pandas as pd
+from sharedcache import cache_data
+from snapshot import get_info
+import fundamentals
 
-@st.cache_data(ttl=86400)
+@cache_data(ttl=86400)
 def company_name(ticker):
-    companyname = yf.Ticker(ticker).info.get("shortName")
+    companyname = get_info(ticker).get("shortName")
     return companyname
 
 def fetch_stock(ticker):
-    stock = yf.Ticker(ticker)
-    info = stock.info
+    fundamentals.sync([ticker])
+    info = fundamentals.info(ticker)
     return info
 
 def fetch_stock_metrics(ticker):
-    stock = yf.Ticker(ticker)
-    info = stock.info
+    info = get_info(ticker)
 
     metrics = {
         "Market Cap": info.get("marketCap", "N/A"),
@@ -46,9 +45,8 @@ def fetch_stock_metrics(ticker):
     return metrics
 
 def fetch_quarterly_financials(ticker):
-    stock = yf.Ticker(ticker)
-    financials = stock.quarterly_financials
-    balance_sheet = stock.quarterly_balance_sheet
+    fundamentals.sync([ticker])
+    statements = fundamentals.statements(ticker)
 
     key_metrics = [
         "Total Revenue", "Gross Profit",
@@ -58,7 +56,5 @@ def fetch_quarterly_financials(ticker):
         "Cash And Cash Equivalents",
         "Share Issued", "Tangible Book Value"]
 
-    combined_data = pd.concat([financials, balance_sheet])
-    quarterly_summary = combined_data[combined_data.index.isin(key_metrics)]
-    cleaned_summary = quarterly_summary.dropna(axis=1, how='all')
+    quarterly_summary = statements[statements.index.isin(key_metrics)]
     return quarterly_summary.iloc[:, :6]
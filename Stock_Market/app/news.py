@@ -1,29 +1,50 @@
 # app/news.py
-import streamlit as st
-from newsapi import NewsApiClient
-from textblob import TextBlob
+from providers import get_provider
+from sharedcache import cache_data
+from sentiment import score_articles
+from newsstore import append_articles, last_published, load_articles, to_dicts
 import datetime
+import pandas as pd
 
-@st.cache_data(ttl=3600)
-def fetch_news_and_sentiment(ticker, company_name, newsapi_key):
-    newsapi = NewsApiClient(api_key=newsapi_key)
+HISTORY_DAYS = 28
+MAX_ARTICLES = 50
+
+def sync_news(ticker, company_name, newsapi_key):
+    """Appends articles published since the newest stored one; returns how many were added."""
     query = f'("{company_name}" OR {ticker}) AND ("earnings" OR "revenue" OR "profit" OR "guidance" OR "acquisition" OR "merger" OR "takeover" OR "new product" OR "launch" OR "CEO" OR "CFO" OR "lawsuit" OR "settlement" OR "rating" OR "upgrade" OR "downgrade" OR "fda approval")'
+    now = datetime.datetime.now(datetime.timezone.utc)
+    since = last_published(ticker)
+    if since is None:
+        from_param = (now - datetime.timedelta(days=HISTORY_DAYS)).strftime('%Y-%m-%d')
+    else:
+        from_param = (since + pd.Timedelta(seconds=1)).strftime('%Y-%m-%dT%H:%M:%S')
+    articles_response = get_provider().news(
+        newsapi_key,
+        q=query,
+        language='en',
+        from_param=from_param,
+        to=now.strftime('%Y-%m-%dT%H:%M:%S'),
+        sort_by='publishedAt',
+        page_size=100)
+    articles = articles_response.get('articles', [])
+    return append_articles(ticker, articles, score_articles(articles))
+
+@cache_data(ttl=3600)
+def fetch_news_and_sentiment(ticker, company_name, newsapi_key):
+    """(average sentiment, recent articles, refresh error or None) of ticker.
+
+    The error is returned rather than shown: the body may run on a
+    background refresh, and a cached result is served again on every hit.
+    """
+    error = None
     try:
-        articles_response = newsapi.get_everything(
-            q=query,
-            language='en',
-            from_param=(datetime.datetime.now() - datetime.timedelta(days=28)).strftime('%Y-%m-%d'),
-            to=datetime.datetime.now().strftime('%Y-%m-%d'),
-            sort_by='relevancy',
-            page_size=50)
-        articles = articles_response.get('articles', [])
-        sentiments = []
-        for article in articles:
-            content_to_analyze = (article.get('title', '') or '') + " " + (article.get('description', '') or '')
-            if content_to_analyze.strip():
-                sentiments.append(TextBlob(content_to_analyze).sentiment.polarity)
-        avg_sentiment = sum(sentiments) / len(sentiments) if sentiments else 0
-        return avg_sentiment, articles
+        sync_news(ticker, company_name, newsapi_key)
     except Exception as e:
-        st.error(f"Error fetching news or calculating sentiment: {e}")
-        return 0, []
\ No newline at end of file
+        error = f"Error fetching news or calculating sentiment: {e}"
+    # Stored articles are still served when the refresh fails.
+    stored = load_articles(ticker)
+    cutoff = pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=HISTORY_DAYS)
+    recent = stored[stored.index >= cutoff].iloc[::-1].head(MAX_ARTICLES)
+    sentiments = recent['polarity'].dropna()
+    avg_sentiment = float(sentiments.mean()) if len(sentiments) else 0
+    return avg_sentiment, to_dicts(recent), error
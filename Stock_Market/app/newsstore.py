@@ -0,0 +1,106 @@
+import os
+import pandas as pd
+from config import CACHE_DIR
+from store import file_lock, write_atomic
+
+NEWS_DIR = os.path.join(CACHE_DIR, "news")
+COLUMNS = ["source", "author", "title", "description", "url", "urlToImage", "polarity"]
+
+# Aggregate bucket joined onto bars of each interval, and how long a
+# bucket's value carries forward when no newer news has arrived.
+AGGREGATES = {
+    "5m": ("1h", pd.Timedelta(days=1)), "15m": ("1h", pd.Timedelta(days=1)),
+    "1h": ("1h", pd.Timedelta(days=1)), "1d": ("1D", pd.Timedelta(days=7)),
+    "1wk": ("1D", pd.Timedelta(days=14))}
+DEFAULT_AGGREGATE = ("1D", pd.Timedelta(days=7))
+
+def _path(ticker):
+    safe = ticker.replace("/", "_").replace("^", "_")
+    return os.path.join(NEWS_DIR, f"{safe}.parquet")
+
+def _empty():
+    index = pd.DatetimeIndex([], tz="UTC", name="published").as_unit("ns")
+    return pd.DataFrame({col: pd.Series(dtype=float if col == "polarity" else object) for col in COLUMNS}, index=index)
+
+def load_articles(ticker):
+    """Stored articles for ticker, indexed by UTC publish time, oldest first."""
+    path = _path(ticker)
+    if not os.path.exists(path):
+        return _empty()
+    try:
+        return pd.read_parquet(path)
+    except Exception:
+        return _empty()
+
+def last_published(ticker):
+    articles = load_articles(ticker)
+    return articles.index[-1] if len(articles) else None
+
+def _frame(articles, polarities):
+    rows = [{
+        "published": article.get("publishedAt"),
+        "source": (article.get("source") or {}).get("name"),
+        "author": article.get("author"),
+        "title": article.get("title"),
+        "description": article.get("description"),
+        "url": article.get("url"),
+        "urlToImage": article.get("urlToImage"),
+        "polarity": polarity} for article, polarity in zip(articles, polarities)]
+    frame = pd.DataFrame(rows, columns=["published"] + COLUMNS)
+    frame["published"] = pd.to_datetime(frame["published"], utc=True, errors="coerce").dt.as_unit("ns")
+    frame["polarity"] = frame["polarity"].astype(float)
+    return frame.dropna(subset=["published"]).set_index("published")
+
+def append_articles(ticker, articles, polarities):
+    """Adds articles not stored yet; stored rows are never rewritten or dropped.
+
+    Returns the number of articles added.
+    """
+    fresh = _frame(articles, polarities)
+    # Held across processes too, so concurrent appends never drop each other's rows.
+    with file_lock(_path(ticker) + ".lock"):
+        stored = load_articles(ticker)
+        key = fresh["url"].fillna(fresh["title"])
+        known = set(stored["url"].fillna(stored["title"]))
+        fresh = fresh[~key.isin(known) & ~key.duplicated()]
+        if fresh.empty:
+            return 0
+        merged = pd.concat([stored, fresh]) if len(stored) else fresh
+        merged = merged.sort_index(kind="stable")
+        write_atomic(_path(ticker), merged.to_parquet)
+    return len(fresh)
+
+def to_dicts(articles):
+    """Rows back in the NewsAPI article shape the pages render."""
+    return [{
+        "source": {"name": row.source}, "author": row.author, "title": row.title,
+        "description": row.description, "url": row.url, "urlToImage": row.urlToImage,
+        "publishedAt": published.strftime("%Y-%m-%dT%H:%M:%SZ"), "polarity": row.polarity}
+        for published, row in zip(articles.index, articles.itertuples(index=False))]
+
+def aggregate(ticker, freq="1D", articles=None):
+    """Mean polarity and article count per freq bucket, labelled by bucket end.
+
+    A bucket's label is the first moment its value is fully known, so an
+    as-of join on the label never looks ahead.
+    """
+    if articles is None:
+        articles = load_articles(ticker)
+    polarity = articles["polarity"].dropna()
+    buckets = polarity.resample(freq, label="right", closed="left").agg(["mean", "count"])
+    buckets.columns = ["Sentiment", "Articles"]
+    return buckets[buckets["Articles"] > 0]
+
+def sentiment_asof(ticker, index, interval=None, articles=None):
+    """Latest aggregate sentiment known at each timestamp of index.
+
+    Neutral (0) where no bucket falls within the interval's carry-forward
+    tolerance, which is also what an empty store yields.
+    """
+    freq, tolerance = AGGREGATES.get(interval, DEFAULT_AGGREGATE)
+    buckets = aggregate(ticker, freq, articles)
+    when = pd.DataFrame({"when": index.tz_convert("UTC").as_unit("ns")})
+    joined = pd.merge_asof(
+        when, buckets[["Sentiment"]], left_on="when", right_index=True,
+        direction="backward", tolerance=tolerance)
+    return pd.Series(joined["Sentiment"].fillna(0.0).to_numpy(), index=index, name="Sentiment")
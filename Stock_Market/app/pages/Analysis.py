@@ -2,28 +2,90 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from data import fetch_stock_data
 from metrics import fetch_quarterly_financials
+from streaming import update_indicators
+from decimate import line_trace, bar_trace
+from figcache import cached_figure, frame_version
+from backtest import STRATEGIES, run_grid, equity_curve
 
 st.set_page_config(page_title="Analysis", layout="wide")
 st.title("🔬 Advanced Analysis")
 
-def calculate_rsi(data, window=14):
-    delta = data['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-def calculate_macd(data, slow=26, fast=12, signal=9):
-    exp1 = data['Close'].ewm(span=fast, adjust=False).mean()
-    exp2 = data['Close'].ewm(span=slow, adjust=False).mean()
-    macd = exp1 - exp2
-    signal_line = macd.ewm(span=signal, adjust=False).mean()
-    histogram = macd - signal_line
-    return macd, signal_line, histogram
+def _price_and_panel():
+    # Imported here, as figures are only built on a figure cache miss.
+    from plotly.subplots import make_subplots
+    return make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.1, row_heights=[0.7, 0.3])
+
+def build_ma_figure(hist_data, indicators):
+    fig_ma = go.Figure()
+    fig_ma.add_trace(line_trace(hist_data.index, hist_data['Close'], mode='lines', name='Close Price'))
+    fig_ma.add_trace(line_trace(hist_data.index, indicators['SMA20'], mode='lines', name='20-Day SMA'))
+    fig_ma.add_trace(line_trace(hist_data.index, indicators['SMA50'], mode='lines', name='50-Day SMA'))
+    fig_ma.add_trace(line_trace(hist_data.index, indicators['SMA200'], mode='lines', name='200-Day SMA'))
+    fig_ma.update_layout(template="plotly_dark", yaxis_title="Price")
+    return fig_ma
+
+def build_rsi_figure(hist_data, indicators):
+    fig_rsi = _price_and_panel()
+    fig_rsi.add_trace(line_trace(hist_data.index, hist_data['Close'], name='Close Price'), row=1, col=1)
+    fig_rsi.add_trace(line_trace(hist_data.index, indicators['RSI14'], name='RSI'), row=2, col=1)
+    fig_rsi.add_hline(y=70, line_dash="dot", row=2, col=1, line_color="red", annotation_text="Overbought (70)")
+    fig_rsi.add_hline(y=30, line_dash="dot", row=2, col=1, line_color="green", annotation_text="Oversold (30)")
+    fig_rsi.update_layout(template="plotly_dark", showlegend=False)
+    fig_rsi.update_yaxes(title_text="Price", row=1, col=1)
+    fig_rsi.update_yaxes(title_text="RSI", row=2, col=1, range=[0, 100])
+    return fig_rsi
+
+def build_macd_figure(hist_data, indicators):
+    fig_macd = _price_and_panel()
+    fig_macd.add_trace(line_trace(hist_data.index, hist_data['Close'], name='Close Price'), row=1, col=1)
+    fig_macd.add_trace(line_trace(hist_data.index, indicators['MACD'], name='MACD'), row=2, col=1)
+    fig_macd.add_trace(line_trace(hist_data.index, indicators['MACD_Signal'], name='Signal Line'), row=2, col=1)
+    fig_macd.add_trace(bar_trace(hist_data.index, indicators['MACD_Hist'], name='Histogram'), row=2, col=1)
+    fig_macd.update_layout(template="plotly_dark")
+    fig_macd.update_yaxes(title_text="Price", row=1, col=1)
+    fig_macd.update_yaxes(title_text="MACD", row=2, col=1)
+    return fig_macd
+
+def build_quarterly_bar_figure(plot_data, column, yaxis_title):
+    fig = go.Figure(data=[go.Bar(x=plot_data.index, y=plot_data[column])])
+    fig.update_layout(template="plotly_dark", yaxis_title=yaxis_title, xaxis_title="Quarter End Date")
+    return fig
+
+def build_debt_figure(plot_data):
+    fig_debt = go.Figure()
+    fig_debt.add_trace(go.Bar(
+        x=plot_data.index,
+        y=plot_data["Total Debt"],
+        name='Total Debt'
+    ))
+    fig_debt.add_trace(go.Bar(
+        x=plot_data.index,
+        y=plot_data["Total Stockholder Equity"],
+        name='Stockholder Equity'
+    ))
+    fig_debt.update_layout(
+        barmode='group',
+        template="plotly_dark",
+        yaxis_title="Amount",
+        xaxis_title="Quarter End Date"
+    )
+    return fig_debt
+
+def build_equity_figure(curves):
+    fig = go.Figure()
+    for column in curves.columns:
+        fig.add_trace(line_trace(curves.index, curves[column], mode='lines', name=column))
+    fig.update_layout(template="plotly_dark", yaxis_title="Growth of 1", yaxis_type="log")
+    return fig
+
+# Slider bounds, default range and step of every backtest parameter.
+BACKTEST_PARAMETERS = {
+    "SMA Crossover": {"fast": (2, 100, (5, 50), 1), "slow": (10, 400, (20, 200), 5)},
+    "RSI Thresholds": {"window": (2, 50, (5, 30), 1), "lower": (5, 50, (10, 40), 2), "upper": (50, 95, (60, 90), 2)},
+    "MACD Signal Cross": {"fast": (2, 30, (4, 20), 2), "slow": (10, 80, (20, 60), 2), "signal": (2, 30, (3, 15), 2)}}
+BACKTEST_TOP = 20
 
 if 'selected_ticker' not in st.session_state or not st.session_state.selected_ticker:
     st.warning("Please select a stock ticker from the 'Summary' page first.")
@@ -39,47 +101,23 @@ if hist_data is None or hist_data.empty:
     st.error("Could not fetch historical data for analysis.")
     st.stop()
 
-tab1, tab2 = st.tabs(["📈 Technical Indicators", "📊 Fundamental Trends"])
+tab1, tab2, tab3 = st.tabs(["📈 Technical Indicators", "📊 Fundamental Trends", "🧪 Backtest"])
 
 with tab1:
     st.header("Technical Indicators")
-    st.subheader("Moving Averages (20, 50, 200-day)")
-    hist_data['SMA20'] = hist_data['Close'].rolling(window=20).mean()
-    hist_data['SMA50'] = hist_data['Close'].rolling(window=50).mean()
-    hist_data['SMA200'] = hist_data['Close'].rolling(window=200).mean()
+    indicators = update_indicators(hist_data, ["SMA20", "SMA50", "SMA200", "RSI14", "MACD"])
+    hist_version = (ticker, hist_data.attrs.get("interval"), frame_version(hist_data))
 
-    fig_ma = go.Figure()
-    fig_ma.add_trace(go.Scatter(x=hist_data.index, y=hist_data['Close'], mode='lines', name='Close Price'))
-    fig_ma.add_trace(go.Scatter(x=hist_data.index, y=hist_data['SMA20'], mode='lines', name='20-Day SMA'))
-    fig_ma.add_trace(go.Scatter(x=hist_data.index, y=hist_data['SMA50'], mode='lines', name='50-Day SMA'))
-    fig_ma.add_trace(go.Scatter(x=hist_data.index, y=hist_data['SMA200'], mode='lines', name='200-Day SMA'))
-    fig_ma.update_layout(template="plotly_dark", yaxis_title="Price")
+    st.subheader("Moving Averages (20, 50, 200-day)")
+    fig_ma = cached_figure(("analysis_ma",) + hist_version, lambda: build_ma_figure(hist_data, indicators))
     st.plotly_chart(fig_ma, use_container_width=True)
 
     st.subheader("Relative Strength Index (RSI)")
-    hist_data['RSI'] = calculate_rsi(hist_data)
-
-    fig_rsi = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.1, row_heights=[0.7, 0.3])
-    fig_rsi.add_trace(go.Scatter(x=hist_data.index, y=hist_data['Close'], name='Close Price'), row=1, col=1)
-    fig_rsi.add_trace(go.Scatter(x=hist_data.index, y=hist_data['RSI'], name='RSI'), row=2, col=1)
-    fig_rsi.add_hline(y=70, line_dash="dot", row=2, col=1, line_color="red", annotation_text="Overbought (70)")
-    fig_rsi.add_hline(y=30, line_dash="dot", row=2, col=1, line_color="green", annotation_text="Oversold (30)")
-    fig_rsi.update_layout(template="plotly_dark", showlegend=False)
-    fig_rsi.update_yaxes(title_text="Price", row=1, col=1)
-    fig_rsi.update_yaxes(title_text="RSI", row=2, col=1, range=[0, 100])
+    fig_rsi = cached_figure(("analysis_rsi",) + hist_version, lambda: build_rsi_figure(hist_data, indicators))
     st.plotly_chart(fig_rsi, use_container_width=True)
 
     st.subheader("MACD")
-    macd, signal_line, histogram = calculate_macd(hist_data)
-
-    fig_macd = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.1, row_heights=[0.7, 0.3])
-    fig_macd.add_trace(go.Scatter(x=hist_data.index, y=hist_data['Close'], name='Close Price'), row=1, col=1)
-    fig_macd.add_trace(go.Scatter(x=hist_data.index, y=macd, name='MACD'), row=2, col=1)
-    fig_macd.add_trace(go.Scatter(x=hist_data.index, y=signal_line, name='Signal Line'), row=2, col=1)
-    fig_macd.add_trace(go.Bar(x=hist_data.index, y=histogram, name='Histogram'), row=2, col=1)
-    fig_macd.update_layout(template="plotly_dark")
-    fig_macd.update_yaxes(title_text="Price", row=1, col=1)
-    fig_macd.update_yaxes(title_text="MACD", row=2, col=1)
+    fig_macd = cached_figure(("analysis_macd",) + hist_version, lambda: build_macd_figure(hist_data, indicators))
     st.plotly_chart(fig_macd, use_container_width=True)
 
 with tab2:
@@ -89,42 +127,77 @@ with tab2:
     else:
         plot_data = quarterly_data.transpose()
         plot_data.index = plot_data.index.strftime('%Y-%m-%d')
+        quarterly_version = (ticker, frame_version(plot_data))
 
         st.subheader("Quarterly Total Revenue")
         if "Total Revenue" in plot_data.columns:
-            fig_rev = go.Figure(data=[go.Bar(x=plot_data.index, y=plot_data["Total Revenue"])])
-            fig_rev.update_layout(template="plotly_dark", yaxis_title="Revenue", xaxis_title="Quarter End Date")
+            fig_rev = cached_figure(("analysis_revenue",) + quarterly_version,
+                                    lambda: build_quarterly_bar_figure(plot_data, "Total Revenue", "Revenue"))
             st.plotly_chart(fig_rev, use_container_width=True)
         else:
             st.info("Total Revenue data not available.")
 
         st.subheader("Quarterly Net Income")
         if "Net Income" in plot_data.columns:
-            fig_income = go.Figure(data=[go.Bar(x=plot_data.index, y=plot_data["Net Income"])])
-            fig_income.update_layout(template="plotly_dark", yaxis_title="Net Income", xaxis_title="Quarter End Date")
+            fig_income = cached_figure(("analysis_income",) + quarterly_version,
+                                       lambda: build_quarterly_bar_figure(plot_data, "Net Income", "Net Income"))
             st.plotly_chart(fig_income, use_container_width=True)
         else:
             st.info("Net Income data not available.")
 
         st.subheader("Quarterly Debt vs. Equity")
         if "Total Debt" in plot_data.columns and "Total Stockholder Equity" in plot_data.columns:
-            fig_debt = go.Figure()
-            fig_debt.add_trace(go.Bar(
-                x=plot_data.index,
-                y=plot_data["Total Debt"],
-                name='Total Debt'
-            ))
-            fig_debt.add_trace(go.Bar(
-                x=plot_data.index,
-                y=plot_data["Total Stockholder Equity"],
-                name='Stockholder Equity'
-            ))
-            fig_debt.update_layout(
-                barmode='group',
-                template="plotly_dark",
-                yaxis_title="Amount",
-                xaxis_title="Quarter End Date"
-            )
+            fig_debt = cached_figure(("analysis_debt",) + quarterly_version, lambda: build_debt_figure(plot_data))
             st.plotly_chart(fig_debt, use_container_width=True)
         else:
-            st.info("Debt or Equity data not available.")
\ No newline at end of file
+            st.info("Debt or Equity data not available.")
+
+with tab3:
+    st.header("Strategy Backtest")
+    strategy = st.selectbox("Strategy", list(STRATEGIES.keys()))
+    with st.form("backtest"):
+        history_col, cost_col = st.columns(2)
+        with history_col:
+            backtest_period = st.selectbox("History", ["2y", "5y", "10y", "max"], index=2)
+        with cost_col:
+            cost_bps = st.number_input("Cost per trade (bps)", min_value=0.0, max_value=100.0, value=5.0)
+        ranges = {}
+        for name, (low, high, default, step) in BACKTEST_PARAMETERS[strategy].items():
+            chosen = st.slider(f"{name} range (step {step})", low, high, default)
+            ranges[name] = range(chosen[0], chosen[1] + 1, step)
+        run_backtest = st.form_submit_button("Run Backtest")
+
+    # The last submitted sweep stays on screen across reruns; results are
+    # cached per data version, so redrawing it costs nothing.
+    if run_backtest:
+        st.session_state.last_backtest = (ticker, strategy, backtest_period, ranges, cost_bps)
+    if st.session_state.get("last_backtest", (None,))[0] == ticker:
+        _, strategy, backtest_period, ranges, cost_bps = st.session_state.last_backtest
+        backtest_data = fetch_stock_data(ticker, period=backtest_period)
+        if backtest_data is None or len(backtest_data) < 3:
+            st.warning("Not enough price history to backtest.")
+        else:
+            backtest_version = (ticker, backtest_data.attrs.get("interval"), frame_version(backtest_data))
+            with st.spinner("Running backtests..."):
+                results = run_grid(backtest_data, backtest_version, strategy, ranges, cost_bps / 1e4)
+            best = results.sort_values("Sharpe", ascending=False, na_position="last")
+            st.caption(f"{len(results):,} configurations of {strategy} over {backtest_period}, ranked by Sharpe ratio.")
+            st.dataframe(
+                best.head(BACKTEST_TOP),
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "Total Return %": st.column_config.NumberColumn(format="%.1f%%"),
+                    "CAGR %": st.column_config.NumberColumn(format="%.2f%%"),
+                    "Sharpe": st.column_config.NumberColumn(format="%.2f"),
+                    "Max Drawdown %": st.column_config.NumberColumn(format="%.1f%%"),
+                    "Trades": st.column_config.NumberColumn(format="%d"),
+                    "Exposure %": st.column_config.NumberColumn(format="%.0f%%")})
+
+            if not best.empty:
+                config = tuple(int(best.iloc[0][name]) for name in STRATEGIES[strategy][0])
+                st.subheader(f"Best {strategy} {config} vs. Buy & Hold")
+                fig_equity = cached_figure(
+                    ("analysis_equity", strategy, config, cost_bps) + backtest_version,
+                    lambda: build_equity_figure(equity_curve(backtest_data, strategy, config, cost_bps / 1e4)))
+                st.plotly_chart(fig_equity, use_container_width=True)
@@ -1,7 +1,9 @@
 # pages/📈_Full_Fundamentals.py
 
+import re
 import streamlit as st
 from metrics import fetch_stock, fetch_quarterly_financials
+from fundamentals import sync, peer_table
 from datetime import datetime
 
 st.set_page_config(page_title="Full Fundamentals", layout="wide")
@@ -43,15 +45,48 @@ st.header("Quarterly Financials")
 
 try:
     quarterly_df = fetch_quarterly_financials(ticker)
-    quarterly_df_formatted = quarterly_df.applymap(
-        lambda x: f"${x/1e6:,.0f}M" if isinstance(x, (int, float)) and x != 0 else ('$0M' if x == 0 else 'N/A')
-    )
-    st.dataframe(quarterly_df_formatted, use_container_width=True)
+    # Scaled for the whole frame at once; the columns add the $ and M.
+    quarterly_df_millions = quarterly_df / 1e6
+    quarterly_df_millions.columns = quarterly_df_millions.columns.strftime('%Y-%m-%d')
+    st.dataframe(
+        quarterly_df_millions,
+        use_container_width=True,
+        column_config={col: st.column_config.NumberColumn(format="$%.0fM") for col in quarterly_df_millions.columns})
 except Exception as e:
     st.warning("Could not retrieve quarterly financial data.")
 
 st.divider()
 
+st.header("Peer Comparison")
+
+peers_text = st.text_area(
+    "Peers (comma, space or newline separated)",
+    st.session_state.get("watchlist", "AAPL, MSFT, GOOGL, AMZN, NVDA, META, TSLA"))
+peers = tuple(dict.fromkeys([ticker] + [s.upper() for s in re.split(r"[,\s]+", peers_text) if s]))
+
+with st.spinner(f"Updating fundamentals for {len(peers)} companies..."):
+    # Only tickers with a day-old snapshot or a new quarter go upstream.
+    sync(peers)
+
+st.dataframe(
+    peer_table(peers),
+    use_container_width=True,
+    column_config={
+        "Market Cap ($B)": st.column_config.NumberColumn(format="%.2f"),
+        "Revenue TTM ($B)": st.column_config.NumberColumn(format="%.2f"),
+        "Net Income TTM ($B)": st.column_config.NumberColumn(format="%.2f"),
+        "Gross Margin %": st.column_config.NumberColumn(format="%.1f%%"),
+        "Operating Margin %": st.column_config.NumberColumn(format="%.1f%%"),
+        "Net Margin %": st.column_config.NumberColumn(format="%.1f%%"),
+        "Revenue Growth YoY %": st.column_config.NumberColumn(format="%.1f%%"),
+        "P/E TTM": st.column_config.NumberColumn(format="%.1f"),
+        "P/S TTM": st.column_config.NumberColumn(format="%.2f"),
+        "EV/EBITDA TTM": st.column_config.NumberColumn(format="%.1f"),
+        "Debt/Equity": st.column_config.NumberColumn(format="%.2f"),
+        "Latest Quarter": st.column_config.DateColumn(format="YYYY-MM-DD")})
+
+st.divider()
+
 st.header("Key Statistics & Ratios")
 
 with st.spinner(f"Fetching key statistics for {ticker}..."):
@@ -16,7 +16,10 @@ if not newsapi_key:
 st.write(company_name(ticker))
 
 with st.spinner(f"Fetching news and sentiment for {ticker}"):
-    avg_sentiment, articles = fetch_news_and_sentiment(ticker, company_name(ticker), st.secrets["NEWS_API_KEY"])
+    avg_sentiment, articles, news_error = fetch_news_and_sentiment(ticker, company_name(ticker), st.secrets["NEWS_API_KEY"])
+
+if news_error:
+    st.error(news_error)
 
 st.subheader(f"Recent News Articles for {company_name(ticker)}")
 
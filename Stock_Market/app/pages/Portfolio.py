@@ -0,0 +1,140 @@
+# pages/Portfolio.py
+import re
+import numpy as np
+import pandas as pd
+import streamlit as st
+import plotly.graph_objects as go
+from data import fetch_many
+from decimate import line_trace
+from figcache import cached_figure, frame_version
+from risk import (TRADING_DAYS, returns_matrix, rolling_beta, rolling_volatility,
+                  rolling_covariance, value_at_risk)
+
+st.set_page_config(page_title="Portfolio Risk", layout="wide")
+st.title("🛡️ Portfolio Risk")
+
+# Correlation heatmaps beyond this many names are too dense to read.
+HEATMAP_MAX = 100
+
+def parse_holdings(text):
+    """Ticker -> weight from "AAPL, MSFT:2, GOOGL:0.5"; weights are normalized to 1."""
+    holdings = {}
+    for item in re.split(r"[,\s]+", text):
+        if not item:
+            continue
+        ticker, _, weight = item.partition(":")
+        try:
+            holdings[ticker.upper()] = float(weight) if weight else 1.0
+        except ValueError:
+            st.warning(f"Ignoring weight of {item}: not a number.")
+            holdings[ticker.upper()] = 1.0
+    total = sum(holdings.values())
+    return {ticker: weight / total for ticker, weight in holdings.items()} if total else {}
+
+def build_rolling_figure(index, beta, volatility):
+    fig = go.Figure()
+    fig.add_trace(line_trace(index, beta, mode='lines', name='Beta'))
+    fig.add_trace(line_trace(index, volatility, mode='lines', name='Volatility (ann.)', yaxis='y2'))
+    fig.update_layout(
+        template="plotly_dark",
+        yaxis=dict(title="Beta"),
+        yaxis2=dict(title="Volatility", overlaying="y", side="right", tickformat=".0%"))
+    return fig
+
+def build_heatmap(corr):
+    fig = go.Figure(go.Heatmap(
+        z=corr.to_numpy(), x=list(corr.columns), y=list(corr.index),
+        zmin=-1, zmax=1, colorscale="RdBu"))
+    fig.update_layout(template="plotly_dark", height=max(400, 12 * len(corr)))
+    return fig
+
+holdings_text = st.text_area(
+    "Holdings (TICKER or TICKER:weight, comma, space or newline separated)",
+    st.session_state.get("watchlist", "AAPL, MSFT, GOOGL, AMZN, NVDA, META, TSLA"))
+holdings = parse_holdings(holdings_text)
+
+index_col, history_col, window_col, confidence_col = st.columns(4)
+with index_col:
+    index_ticker = st.text_input("Benchmark index", "^GSPC").strip().upper()
+with history_col:
+    period = st.selectbox("History", ["1y", "2y", "5y", "10y"], index=2)
+with window_col:
+    window = st.slider("Rolling window (days)", 20, TRADING_DAYS, 60)
+with confidence_col:
+    confidence = st.selectbox("VaR confidence", [0.95, 0.99], format_func=lambda c: f"{c:.0%}")
+
+if not holdings or not index_ticker:
+    st.info("Enter at least one holding and a benchmark index.")
+    st.stop()
+
+with st.spinner(f"Fetching {len(holdings) + 1} symbols..."):
+    frames = fetch_many(tuple(holdings) + (index_ticker,), period=period)
+
+missing = [ticker for ticker in list(holdings) + [index_ticker] if ticker not in frames]
+if missing:
+    st.warning(f"No data for: {', '.join(missing)}")
+if index_ticker not in frames or not any(ticker in frames for ticker in holdings):
+    st.stop()
+
+tickers = [ticker for ticker in holdings if ticker in frames]
+combined = returns_matrix({ticker: frames[ticker] for ticker in tickers + [index_ticker]})
+market = combined[index_ticker].to_numpy()
+returns = combined[tickers]
+if len(returns) <= window:
+    st.warning("Not enough history for the rolling window; choose a longer history or a shorter window.")
+    st.stop()
+
+weights = np.array([holdings[ticker] for ticker in tickers])
+weights = weights / weights.sum()
+
+# The covariance window is updated in place as new bars arrive; the
+# rolling series are single passes over the whole matrix.
+covariance = rolling_covariance(returns, window)
+risk = value_at_risk(returns, weights, covariance.cov(), confidence, lookback=window)
+portfolio = np.nan_to_num(returns.to_numpy()) @ weights
+portfolio_beta, _ = rolling_beta(portfolio[:, None], market, window)
+portfolio_volatility = rolling_volatility(portfolio, window)
+betas, correlations = rolling_beta(returns.to_numpy(), market, window)
+
+beta_col, vol_col, hist_col, es_col, param_col = st.columns(5)
+beta_col.metric("Beta vs. " + index_ticker, f"{portfolio_beta[-1, 0]:.2f}")
+vol_col.metric("Volatility (ann.)", f"{risk['volatility'] * np.sqrt(TRADING_DAYS):.1%}")
+hist_col.metric(f"Historical VaR {confidence:.0%} (1d)", f"{risk['historical']:.2%}")
+es_col.metric("Expected Shortfall (1d)", f"{risk['expected_shortfall']:.2%}")
+param_col.metric(f"Parametric VaR {confidence:.0%} (1d)", f"{risk['parametric']:.2%}")
+st.caption(f"{len(tickers)} holdings, {len(returns):,} days of returns, {window}-day window ending {returns.index[-1]:%Y-%m-%d}.")
+
+st.subheader("Rolling Beta and Volatility")
+version = (tuple(tickers), index_ticker, window, tuple(weights.round(6)), frame_version(returns))
+fig_rolling = cached_figure(
+    ("portfolio_rolling",) + version,
+    lambda: build_rolling_figure(returns.index, portfolio_beta[:, 0], portfolio_volatility))
+st.plotly_chart(fig_rolling, use_container_width=True)
+
+st.subheader("Holdings")
+volatility = np.sqrt(np.diag(covariance.cov().to_numpy()) * TRADING_DAYS)
+table = pd.DataFrame({
+    "Weight %": weights * 100,
+    "Beta": betas[-1],
+    "Correlation": correlations[-1],
+    "Volatility %": volatility * 100,
+    "VaR Contribution %": risk["components"].to_numpy() * 100},
+    index=pd.Index(tickers, name="Ticker"))
+st.dataframe(
+    table,
+    use_container_width=True,
+    column_config={
+        "Weight %": st.column_config.NumberColumn(format="%.2f%%"),
+        "Beta": st.column_config.NumberColumn(format="%.2f"),
+        "Correlation": st.column_config.NumberColumn(format="%.2f"),
+        "Volatility %": st.column_config.NumberColumn(format="%.1f%%"),
+        "VaR Contribution %": st.column_config.NumberColumn("Component VaR %", format="%.3f%%")})
+
+st.subheader(f"Correlation ({window}-day window)")
+corr = covariance.corr()
+if len(tickers) > HEATMAP_MAX:
+    largest = table["Weight %"].nlargest(HEATMAP_MAX).index
+    corr = corr.loc[largest, largest]
+    st.caption(f"The {HEATMAP_MAX} largest holdings.")
+fig_corr = cached_figure(("portfolio_corr",) + version, lambda: build_heatmap(corr))
+st.plotly_chart(fig_corr, use_container_width=True)
@@ -0,0 +1,52 @@
+# pages/Watchlist.py
+import re
+import streamlit as st
+from data import fetch_many
+from screener import screen
+
+st.set_page_config(page_title="Watchlist", layout="wide")
+st.title("👀 Watchlist & Screener")
+
+if "watchlist" not in st.session_state:
+    st.session_state.watchlist = "AAPL, MSFT, GOOGL, AMZN, NVDA, META, TSLA"
+
+symbols_text = st.text_area("Symbols (comma, space or newline separated)", st.session_state.watchlist)
+st.session_state.watchlist = symbols_text
+tickers = tuple(dict.fromkeys(s.upper() for s in re.split(r"[,\s]+", symbols_text) if s))
+
+timeframes = {"1 Month": "1mo", "3 Months": "3mo", "6 Months": "6mo", "1 Year": "1y"}
+selected_tf = st.selectbox("History", list(timeframes.keys()), index=2)
+
+if st.button("Refresh"):
+    st.rerun()
+
+if not tickers:
+    st.info("Enter at least one ticker symbol.")
+    st.stop()
+
+with st.spinner(f"Fetching {len(tickers)} symbols..."):
+    frames = fetch_many(tickers, period=timeframes[selected_tf])
+
+missing = [ticker for ticker in tickers if ticker not in frames]
+if missing:
+    st.warning(f"No data for: {', '.join(missing)}")
+
+table = screen(frames)
+st.dataframe(
+    table,
+    use_container_width=True,
+    column_config={
+        "Last": st.column_config.NumberColumn(format="%.2f"),
+        "Change": st.column_config.NumberColumn(format="%.2f"),
+        "Change %": st.column_config.NumberColumn(format="%.2f%%"),
+        "RSI": st.column_config.NumberColumn(format="%.1f"),
+        "SMA Distance %": st.column_config.NumberColumn("Dist. from SMA50 %", format="%.2f%%"),
+        "Volume": st.column_config.NumberColumn(format="%d"),
+        "Volume Spike": st.column_config.NumberColumn("Volume / 20-bar avg", format="%.2fx")})
+
+if frames:
+    selected = st.selectbox("Open in dashboard", list(frames))
+    if st.button("Analyze"):
+        st.session_state.selected_ticker = selected
+        st.session_state.app_started = True
+        st.switch_page("Summary.py")
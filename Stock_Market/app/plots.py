@@ -1,10 +1,17 @@
 import plotly.graph_objects as go
 import streamlit as st
+from streaming import update_indicators
+from decimate import line_trace, ohlc_trace
+from figcache import cached_figure, frame_version
 
 def plot_chart_with_bollinger(data, ticker, timeframe_label, chart_type="Candlestick", sentiment=None, predicted_price=None):
-    data['SMA50'] = data['Close'].rolling(window=50).mean()
-    data['Upper'] = data['SMA50'] + 2 * data['Close'].rolling(window=50).std()
-    data['Lower'] = data['SMA50'] - 2 * data['Close'].rolling(window=50).std()
+    key = ("bollinger", ticker, data.attrs.get("interval"), frame_version(data),
+           timeframe_label, chart_type, sentiment, predicted_price)
+    return cached_figure(key, lambda: _build_chart_with_bollinger(
+        data, ticker, timeframe_label, chart_type, predicted_price))
+
+def _build_chart_with_bollinger(data, ticker, timeframe_label, chart_type, predicted_price):
+    bands = update_indicators(data, ["BB50"])
 
     fig = go.Figure()
 
@@ -16,50 +23,52 @@ def plot_chart_with_bollinger(data, ticker, timeframe_label, chart_type="Candles
             annotation_position="top left")
 
     if chart_type == "Candlestick":
-        fig.add_trace(go.Candlestick(
-            x=data.index,
+        fig.add_trace(ohlc_trace(
+            go.Candlestick,
+            data.index,
             open=data['Open'],
             high=data['High'],
             low=data['Low'],
             close=data['Close'],
             name="Price"))
     elif chart_type == "Line":
-        fig.add_trace(go.Scatter(
-            x=data.index,
+        fig.add_trace(line_trace(
+            data.index,
             y=data['Close'],
             name="Close Price",
             line=dict(color="cyan")))
     elif chart_type == "Mountain":
-        fig.add_trace(go.Scatter(
-            x=data.index,
+        fig.add_trace(line_trace(
+            data.index,
             y=data['Close'],
             name="Mountain",
             fill="tozeroy",
             line=dict(color="skyblue")))
     elif chart_type == "Bar":
-        fig.add_trace(go.Ohlc(
-            x=data.index,
+        fig.add_trace(ohlc_trace(
+            go.Ohlc,
+            data.index,
             open=data['Open'],
             high=data['High'],
             low=data['Low'],
             close=data['Close'],
             name="OHLC Bar"))
 
-    fig.add_trace(go.Scatter(
-        x=data.index,
-        y=data['SMA50'],
+    fig.add_trace(line_trace(
+        data.index,
+        y=bands['BB50_Middle'],
         name="SMA 50",
         line=dict(color="yellow", width=1.5)))
 
-    fig.add_trace(go.Scatter(
-        x=data.index,
-        y=data['Upper'],
+    fig.add_trace(line_trace(
+        data.index,
+        y=bands['BB50_Upper'],
         name="Upper Band",
         line=dict(color="red", width=1, dash="dot")))
 
-    fig.add_trace(go.Scatter(
-        x=data.index,
-        y=data['Lower'],
+    fig.add_trace(line_trace(
+        data.index,
+        y=bands['BB50_Lower'],
         name="Lower Band",
         line=dict(color="green", width=1, dash="dot")))
 
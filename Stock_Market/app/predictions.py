@@ -1,19 +1,389 @@
-from sklearn.pipeline import make_pipeline
-from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LinearRegression
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from config import CACHE_DIR
+from figcache import frame_version
+from frames import frame_bytes
+from indicators import compute_indicators
+from sharedcache import MemoryBackend
+from snapshot import SingleFlight
+from store import write_atomic
+from telemetry import span, record_cache
+
+MODEL_DIR = os.path.join(CACHE_DIR, "models")
+# Lagged one-bar returns in the feature matrix; the AR model uses only these.
+LAGS = 5
+INDICATOR_SPECS = ["SMA20", "SMA50", "RSI14", "MACD", "BB20", "ATR14", "ROC12"]
+FEATURES = tuple(f"Return_lag{i}" for i in range(1, LAGS + 1)) + (
+    "Close_SMA20", "Close_SMA50", "RSI14", "MACD_Hist", "BB20_PctB", "ATR14", "ROC12", "Sentiment")
+# Walk-forward folds: the rows after the first half (or MIN_TRAIN rows) are
+# cut into FOLDS consecutive test blocks, each predicted by models fitted
+# on every row before it.
+FOLDS = 5
+MIN_TRAIN = 250
+# Committed bars after which the models are validated and refitted again;
+# until then the chosen model absorbs new bars online, if it can.
+REFIT_BARS = 20
+# Newest rows trained on; decades of daily bars add fit time, not accuracy.
+MAX_TRAIN_ROWS = 5000
+# Feature rows from which the folds go to the process pool; below it the
+# spawn would cost more than the fits.
+PARALLEL_MIN_ROWS = 2000
+MAX_PROCESSES = min(4, (os.cpu_count() or 1) - 1)
+FEATURE_CACHE_BYTES = 64 * 1024 * 1024
+KEEP_SECONDS = 86400
+METRIC_COLUMNS = ["MAE", "RMSE %", "MAPE %", "Direction %"]
+# The metric the best model is chosen by; the one shown next to the prediction.
+SELECT_BY = "MAPE %"
+
+def _feature_block(data, sentiment):
+    close = data['Close'].to_numpy(dtype=np.float64)
+    ind = compute_indicators(data, INDICATOR_SPECS)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = np.concatenate([[np.nan], close[1:] / close[:-1] - 1])
+        lags = {f"Return_lag{i}": np.concatenate([np.full(i - 1, np.nan), returns[:len(close) - i + 1]])
+                for i in range(1, LAGS + 1)}
+        band = ind["BB20_Upper"].to_numpy() - ind["BB20_Lower"].to_numpy()
+        columns = dict(
+            lags,
+            Close_SMA20=close / ind["SMA20"].to_numpy() - 1,
+            Close_SMA50=close / ind["SMA50"].to_numpy() - 1,
+            RSI14=ind["RSI14"].to_numpy() / 100,
+            MACD_Hist=ind["MACD_Hist"].to_numpy() / close,
+            BB20_PctB=(close - ind["BB20_Lower"].to_numpy()) / band,
+            ATR14=ind["ATR14"].to_numpy() / close,
+            ROC12=ind["ROC12"].to_numpy() / 100,
+            Sentiment=np.asarray(sentiment, dtype=np.float64))
+        target = np.append(returns[1:], np.nan)
+    frame = pd.DataFrame(columns, index=data.index, columns=list(FEATURES))
+    frame["Close"] = close
+    frame["Target"] = target
+    return frame.replace([np.inf, -np.inf], np.nan)
+
+_features = MemoryBackend(FEATURE_CACHE_BYTES, sizeof=frame_bytes)
+
+def feature_matrix(data, sentiment, key=None):
+    """FEATURES of every bar of data, plus its Close and the next bar's return as Target.
+
+    All columns are scale-free, so one model can serve a whole history.
+    Built in one pass and cached per data version when key (e.g. the
+    ticker and interval) is given.
+    """
+    if key is None:
+        return _feature_block(data, sentiment)
+    sentiment = pd.Series(np.asarray(sentiment, dtype=np.float64), index=data.index)
+    cache_key = repr((key, frame_version(data), frame_version(sentiment.to_frame())))
+    entry = _features.get(cache_key)
+    record_cache("features", "hit" if entry is not None else "miss")
+    if entry is not None:
+        return entry[1]
+    with span("features.build", rows=len(data)):
+        frame = _feature_block(data, sentiment)
+    now = time.time()
+    _features.set(cache_key, now, frame, now + KEEP_SECONDS)
+    return frame
+
+class LastClose:
+    """Predicts no change: the random walk every other model has to beat."""
+
+    def fit(self, X, y):
+        return self
+
+    def partial_fit(self, X, y):
+        return self
+
+    def predict(self, X):
+        return np.zeros(len(X))
+
+class AutoRegressive:
+    """AR(LAGS) on returns: least squares on the lagged-return columns alone.
+
+    Keeps the normal equations, so partial_fit adds rows without refitting.
+    """
+
+    def fit(self, X, y):
+        self.gram = np.zeros((LAGS + 1, LAGS + 1))
+        self.moment = np.zeros(LAGS + 1)
+        return self.partial_fit(X, y)
+
+    def partial_fit(self, X, y):
+        A = np.column_stack([np.ones(len(X)), X[:, :LAGS]])
+        self.gram += A.T @ A
+        self.moment += A.T @ y
+        self.coef = np.linalg.lstsq(self.gram, self.moment, rcond=None)[0]
+        return self
+
+    def predict(self, X):
+        return self.coef[0] + X[:, :LAGS] @ self.coef[1:]
+
+class Ridge:
+    """L2-penalized least squares on the standardized features.
+
+    The scaling is fixed at fit; partial_fit adds rows to the normal
+    equations and solves them again.
+    """
+
+    def __init__(self, alpha=10.0):
+        self.alpha = alpha
+
+    def fit(self, X, y):
+        self.mean, self.scale = X.mean(axis=0), X.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+        self.gram = np.zeros((X.shape[1] + 1, X.shape[1] + 1))
+        self.moment = np.zeros(X.shape[1] + 1)
+        return self.partial_fit(X, y)
+
+    def partial_fit(self, X, y):
+        A = np.column_stack([np.ones(len(X)), (X - self.mean) / self.scale])
+        self.gram += A.T @ A
+        self.moment += A.T @ y
+        # The intercept is not penalized.
+        penalty = self.alpha * np.eye(len(self.moment))
+        penalty[0, 0] = 0.0
+        solution = np.linalg.solve(self.gram + penalty, self.moment)
+        self.intercept, self.coef = solution[0], solution[1:]
+        return self
+
+    def predict(self, X):
+        return self.intercept + ((X - self.mean) / self.scale) @ self.coef
+
+class GradientBoosting:
+    """scikit-learn's histogram gradient boosting, shallow and slowly learning."""
+
+    def fit(self, X, y):
+        # Imported on first use, like the other slow dependencies.
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        self.model = HistGradientBoostingRegressor(
+            max_iter=100, learning_rate=0.05, max_leaf_nodes=15, l2_regularization=1.0,
+            early_stopping=False, random_state=0).fit(X, y)
+        return self
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+# Name -> model class; each has fit(X, y) and predict(X) on FEATURES columns
+# and predicts the next bar's return. Those with partial_fit(X, y) also
+# learn from new bars between validations.
+MODELS = {
+    "Last Close": LastClose, "AR": AutoRegressive, "Ridge": Ridge,
+    "Gradient Boosting": GradientBoosting}
+
+def folds(n):
+    """(train end, test start, test end) row positions of each walk-forward fold."""
+    start = max(MIN_TRAIN, n // 2)
+    if n - start < FOLDS:
+        return []
+    edges = np.linspace(start, n, FOLDS + 1).astype(int)
+    return [(int(a), int(a), int(b)) for a, b in zip(edges[:-1], edges[1:])]
+
+def _fit_predict(name, X, y, train_end, test_start, test_end):
+    return MODELS[name]().fit(X[:train_end], y[:train_end]).predict(X[test_start:test_end])
+
+def _run_shared(shm_name, shape, name, train_end, test_start, test_end):
+    # Runs in a pool worker on the parent's rows, mapped read-only from
+    # shared memory instead of pickled into every task.
+    shm = shared_memory.SharedMemory(name=shm_name)
+    block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    block.flags.writeable = False
+    try:
+        return _fit_predict(name, block[:, :-1], block[:, -1], train_end, test_start, test_end)
+    finally:
+        del block
+        shm.close()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawned, not forked: the server process is multi-threaded.
+            _executor = ProcessPoolExecutor(
+                max_workers=MAX_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+def metrics(close, actual, predicted):
+    """METRIC_COLUMNS of predicted next-bar returns, the errors in price terms."""
+    error = close * (predicted - actual)
+    with np.errstate(invalid="ignore"):
+        moved = actual != 0
+        direction = np.sign(predicted[moved]) == np.sign(actual[moved]) if predicted.any() else np.array([])
+        relative = (1 + predicted) / (1 + actual) - 1
+    return [
+        float(np.abs(error).mean()),
+        float(np.sqrt(np.mean(relative ** 2)) * 100),
+        float(np.abs(relative).mean() * 100),
+        float(direction.mean() * 100) if len(direction) else np.nan]
+
+def walk_forward(rows, models=MODELS):
+    """Out-of-sample METRIC_COLUMNS of every model over the walk-forward folds.
+
+    rows are complete feature_matrix rows. Every (model, fold) fit is a
+    separate task, spread over the process pool for long histories.
+    """
+    X = rows[list(FEATURES)].to_numpy(dtype=np.float64)
+    y = rows["Target"].to_numpy(dtype=np.float64)
+    splits = folds(len(rows))
+    if not splits:
+        return pd.DataFrame(columns=METRIC_COLUMNS, dtype=float)
+    tasks = [(name, fold) for name in models for fold in splits]
+    if MAX_PROCESSES < 1 or len(rows) < PARALLEL_MIN_ROWS:
+        predictions = [_fit_predict(name, X, y, *fold) for name, fold in tasks]
+    else:
+        block = np.ascontiguousarray(np.column_stack([X, y]))
+        shm = shared_memory.SharedMemory(create=True, size=block.nbytes)
+        try:
+            np.ndarray(block.shape, dtype=block.dtype, buffer=shm.buf)[:] = block
+            futures = [_pool().submit(_run_shared, shm.name, block.shape, name, *fold) for name, fold in tasks]
+            predictions = [future.result() for future in futures]
+        finally:
+            shm.close()
+            shm.unlink()
+
+    tested = np.concatenate([np.arange(start, end) for _, start, end in splits])
+    close = rows["Close"].to_numpy(dtype=np.float64)[tested]
+    table = {}
+    for name in models:
+        predicted = np.concatenate([p for (model, _), p in zip(tasks, predictions) if model == name])
+        table[name] = metrics(close, y[tested], predicted)
+    return pd.DataFrame.from_dict(table, orient="index", columns=METRIC_COLUMNS).rename_axis("Model")
 
 class StockPredictor:
-    def __init__(self):
-        self.model = make_pipeline(
-            StandardScaler(),
-            LinearRegression())
-
-    def train(self, data):
-        data = data.dropna()
-        X = data[['Close_lag1', 'Sentiment']].values
-        y = data['Close'].values
-        self.model.fit(X, y)
-
-    def predict_next(self, last_close, avg_sentiment):
-        X_pred = [[last_close, avg_sentiment]]
-        return float(self.model.predict(X_pred)[0])
\ No newline at end of file
+    """The model with the lowest walk-forward SELECT_BY for one series, fitted on all of it.
+
+    metrics keeps every candidate's out-of-sample errors, so the chosen
+    model can be shown next to the Last Close baseline it had to beat.
+    """
+
+    def __init__(self, models=MODELS):
+        self.models = tuple(models)
+        self.features = FEATURES
+        self.name = None
+        self.model = None
+        self.metrics = None
+        self.first_ts = None
+        self.last_ts = None
+        self.validated_ts = None
+
+    def train(self, rows):
+        """Validates every model on rows, complete feature_matrix rows, and fits the best."""
+        rows = rows.dropna(subset=list(FEATURES) + ["Target"])
+        if rows.empty:
+            raise ValueError("No complete rows to train on.")
+        with span("StockPredictor.train", rows=len(rows), models=len(self.models)):
+            self.metrics = walk_forward(rows, self.models)
+            # Without enough rows to validate on, nothing is trusted over the baseline.
+            scores = self.metrics[SELECT_BY]
+            self.name = scores.idxmin() if scores.notna().any() else "Last Close"
+            X = rows[list(FEATURES)].to_numpy(dtype=np.float64)
+            self.model = MODELS[self.name]().fit(X, rows["Target"].to_numpy(dtype=np.float64))
+        self.first_ts, self.last_ts = rows.index[0], rows.index[-1]
+        self.validated_ts = self.last_ts
+
+    def update(self, rows):
+        """Feeds the rows after last_ts to the fitted model, where it learns online."""
+        rows = rows[rows.index > self.last_ts].dropna(subset=list(FEATURES) + ["Target"])
+        if rows.empty:
+            return
+        with span("StockPredictor.update", rows=len(rows)):
+            if hasattr(self.model, "partial_fit"):
+                X = rows[list(FEATURES)].to_numpy(dtype=np.float64)
+                self.model.partial_fit(X, rows["Target"].to_numpy(dtype=np.float64))
+        self.last_ts = rows.index[-1]
+
+    def predict_next(self, row):
+        """Next close after the bar of row, a feature_matrix row."""
+        x = row[list(FEATURES)].to_numpy(dtype=np.float64)[None, :]
+        if np.isnan(x).any():
+            return float(row["Close"])
+        return float(row["Close"] * (1 + self.model.predict(x)[0]))
+
+_models = {}
+_models_lock = threading.Lock()
+# Keys being retrained; one session trains while the others keep
+# predicting with the stored model.
+_training = set()
+_flight = SingleFlight()
+
+def _model_path(ticker, interval):
+    safe = ticker.replace("/", "_").replace("^", "_")
+    return os.path.join(MODEL_DIR, f"{safe}_{interval}.pkl")
+
+def _load(ticker, interval):
+    path = _model_path(ticker, interval)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return None
+
+def _save(ticker, interval, predictor):
+    write_atomic(_model_path(ticker, interval), lambda f: pickle.dump(predictor, f))
+
+def get_predictor(ticker, interval, features):
+    """The persisted predictor for ticker/interval, retrained on features when due.
+
+    features is feature_matrix of the bars. Its last bar may still be
+    forming, so the rows trained on stop one bar earlier, and start at
+    most MAX_TRAIN_ROWS before that. Models are
+    validated and refitted when there is no stored predictor, its model
+    set or features changed, features reach back before the trained
+    range or were rewritten, or REFIT_BARS bars have been committed since
+    the last validation; in between, newly committed bars go to update().
+    While one session retrains, the others are served the stored predictor.
+    """
+    key = (ticker, interval)
+    with _models_lock:
+        predictor = _models.get(key)
+        if predictor is None:
+            predictor = _models[key] = _load(ticker, interval) or StockPredictor()
+
+    committed = features.iloc[:-2] if len(features) > 2 else features.iloc[:0]
+    complete = committed.dropna(subset=list(FEATURES) + ["Target"]).iloc[-MAX_TRAIN_ROWS:]
+    if complete.empty:
+        return predictor
+    with _models_lock:
+        validated = getattr(predictor, "validated_ts", None)
+        due = (predictor.model is None or predictor.models != tuple(MODELS)
+               or predictor.features != FEATURES or validated is None
+               or complete.index[0] < predictor.first_ts
+               or complete.index[-1] < predictor.last_ts
+               or (complete.index > validated).sum() >= REFIT_BARS)
+        if not due:
+            if complete.index[-1] > predictor.last_ts:
+                predictor.update(complete)
+                _save(ticker, interval, predictor)
+            return predictor
+        if key in _training and predictor.model is not None:
+            return predictor
+        _training.add(key)
+    # Trained outside the lock, once per key: sessions without a model to
+    # fall back on wait for the same training.
+    return _flight.do(key, lambda: _retrain(ticker, interval, complete, predictor))
+
+def _retrain(ticker, interval, complete, seen):
+    key = (ticker, interval)
+    try:
+        with _models_lock:
+            current = _models.get(key)
+        if current is not seen:
+            # Replaced by another session's training while this one waited.
+            return current
+        fresh = StockPredictor()
+        fresh.train(complete)
+        with _models_lock:
+            _models[key] = fresh
+        _save(ticker, interval, fresh)
+        return fresh
+    finally:
+        with _models_lock:
+            _training.discard(key)
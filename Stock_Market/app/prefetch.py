@@ -0,0 +1,152 @@
+import threading
+import time
+import pandas as pd
+import snapshot
+from config import PREFETCH, PREFETCH_TOP, PREFETCH_PER_MINUTE
+from markets import exchange_for
+from sharedcache import add_listener
+from telemetry import span, emit
+from throttle import TokenBucket
+
+# Request counts halve every hour; entries unseen for a day are dropped.
+HALF_LIFE = 3600
+FORGET_AFTER = 86400
+# Entries are refreshed this far into their TTL, so callers find them warm.
+REFRESH_AT = 0.8
+# After the close, prices are refreshed once the closing bar has settled
+# and then only this often until the next open.
+SETTLE_SECONDS = 900
+CLOSED_REFRESH = 6 * 3600
+TICK_SECONDS = 5
+# Cached functions whose results only move while the market trades.
+MARKET_BOUND = {"fetch_series"}
+# Snapshot fields refreshed for every hot ticker.
+SNAPSHOT_FIELDS = ("info",)
+
+class Popularity:
+    """Exponentially decayed request counts."""
+
+    def __init__(self, half_life=HALF_LIFE):
+        self.half_life = half_life
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _decayed(self, score, last, now):
+        return score * 0.5 ** ((now - last) / self.half_life)
+
+    def hit(self, key, payload, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            score = 1.0 if entry is None else self._decayed(entry[0], entry[1], now) + 1
+            self._entries[key] = (score, now, payload)
+
+    def top(self, n, now=None):
+        """Payloads of the n highest-scoring keys, most popular first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if now - e[1] > FORGET_AFTER]:
+                del self._entries[key]
+            ranked = sorted(self._entries.values(), key=lambda e: -self._decayed(e[0], e[1], now))
+        return [entry[2] for entry in ranked[:n]]
+
+def _tickers(args, kwargs):
+    value = kwargs.get("ticker", kwargs.get("tickers", args[0] if args else None))
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, (tuple, list)):
+        return [ticker for ticker in value if isinstance(ticker, str)]
+    return []
+
+def is_due(ttl, age, tickers, now, market_bound=True):
+    """Whether an entry of this age should be refreshed at now (epoch seconds).
+
+    While any of the tickers' markets is open, entries are refreshed just
+    before their TTL runs out. When all are closed, including weekends and
+    holidays, only once after the close and then every CLOSED_REFRESH.
+    """
+    if age is None:
+        return True
+    if market_bound and tickers:
+        when = pd.Timestamp(now, unit="s", tz="UTC")
+        exchanges = {exchange_for(ticker) for ticker in tickers}
+        if not any(exchange.is_open(when) for exchange in exchanges):
+            settled = max(exchange.last_close(when) for exchange in exchanges).timestamp() + SETTLE_SECONDS
+            if now - age < settled <= now:
+                return True
+            return age >= max(ttl, CLOSED_REFRESH) * REFRESH_AT
+    return age >= ttl * REFRESH_AT
+
+class Prefetcher:
+    """Keeps the most requested cache entries warm from a background thread.
+
+    Demand is observed through the shared cache, so any cached function is
+    covered; the hot tickers among its arguments also get their snapshot
+    fields refreshed. Every upstream refresh spends a token from a global
+    budget, and a tick stops early once the budget is empty.
+    """
+
+    def __init__(self, top=PREFETCH_TOP, per_minute=PREFETCH_PER_MINUTE):
+        self.top = top
+        self.popularity = Popularity()
+        self.budget = TokenBucket(per_minute / 60, capacity=max(1.0, per_minute / 6))
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def observe(self, fn, args, kwargs):
+        key = (fn.__qualname__, repr(args), repr(sorted(kwargs.items())))
+        self.popularity.hit(key, (fn, args, kwargs))
+
+    def jobs(self, now=None):
+        """(label, refresh) pairs for entries that are due, most popular first."""
+        now = time.time() if now is None else now
+        jobs = []
+        hot = []
+        for fn, args, kwargs in self.popularity.top(self.top, now):
+            tickers = _tickers(args, kwargs)
+            hot.extend(ticker for ticker in tickers if ticker not in hot)
+            if is_due(fn.ttl, fn.age(*args, **kwargs), tickers, now, fn.__qualname__ in MARKET_BOUND):
+                jobs.append((fn.__qualname__, lambda fn=fn, args=args, kwargs=kwargs: fn.refresh(*args, **kwargs)))
+        for ticker in hot[:self.top]:
+            for field in SNAPSHOT_FIELDS:
+                if is_due(snapshot.FIELD_TTLS[field], snapshot.age(ticker, field), [ticker], now):
+                    jobs.append((f"snapshot.{field}", lambda ticker=ticker, field=field: snapshot.refresh(ticker, field)))
+        return jobs
+
+    def run_once(self, now=None):
+        done = 0
+        for label, job in self.jobs(now):
+            if not self.budget.try_acquire():
+                emit("prefetch_budget_exhausted", pending=label)
+                break
+            try:
+                with span("prefetch", job=label):
+                    job()
+            except Exception:
+                # Counted by the span; the entry is retried next tick.
+                pass
+            done += 1
+        return done
+
+    def _loop(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                emit("prefetch_failed", error=type(e).__name__)
+            time.sleep(TICK_SECONDS)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                add_listener(self.observe)
+                self._thread = threading.Thread(target=self._loop, name="prefetch", daemon=True)
+                self._thread.start()
+
+_prefetcher = Prefetcher()
+
+def start_prefetcher():
+    """Starts the process-wide prefetcher once, unless PREFETCH=0."""
+    if PREFETCH:
+        _prefetcher.start()
+    return _prefetcher
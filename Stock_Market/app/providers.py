@@ -0,0 +1,444 @@
+import hashlib
+import os
+import pickle
+import random
+import threading
+import time
+import zlib
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from telemetry import span, record_payload, record_upstream_error
+from config import (DATA_PROVIDER, RECORDINGS_DIR, PROVIDER_LATENCY, PROVIDER_JITTER,
+                    PROVIDER_ERRORS, SYNTHETIC_BARS)
+from store import write_atomic
+from gateway import Gateway
+
+# Every provider answers the same five calls, in the shapes the live
+# services return them:
+#   download(tickers, start=None, interval="1d") -> yf.download frame,
+#       columns (Price, Ticker); start is a 'YYYY-MM-DD' string, None for max
+#   info(ticker) -> dict
+#   quarterly_financials(ticker), quarterly_balance_sheet(ticker) -> frames
+#       with line items as rows and quarter ends as columns
+#   news(api_key, **params) -> NewsAPI get_everything response dict
+
+PRICE_COLUMNS = ["Close", "High", "Low", "Open", "Volume"]
+
+def combine(frames):
+    """Per-ticker OHLCV frames as one multi-ticker frame, as yf.download returns it."""
+    if not frames:
+        return pd.DataFrame()
+    combined = pd.concat(frames, axis=1, names=["Ticker", "Price"]).swaplevel(axis=1)
+    return combined.sort_index(axis=1, level=0, sort_remaining=False)
+
+def split(raw, tickers):
+    if raw is None or raw.empty:
+        return {}
+    available = set(raw.columns.get_level_values(1))
+    return {ticker: raw.xs(ticker, axis=1, level=1).dropna(how='all')
+            for ticker in tickers if ticker in available}
+
+def _tickers(tickers):
+    return [tickers] if isinstance(tickers, str) else list(tickers)
+
+def _since(frame, start):
+    if start is None:
+        return frame
+    start = pd.Timestamp(start)
+    if frame.index.tz is not None:
+        start = start.tz_localize(frame.index.tz)
+    return frame[frame.index >= start]
+
+def _yfinance():
+    # Imported on first use: yfinance and NewsAPI are among the slowest
+    # imports of a cold start, and replay or synthetic runs never need them.
+    import yfinance
+    return yfinance
+
+class LiveProvider:
+    name = "live"
+
+    def download(self, tickers, start=None, interval="1d"):
+        if start is None:
+            return _yfinance().download(tickers, period="max", interval=interval)
+        return _yfinance().download(tickers, start=start, interval=interval)
+
+    def info(self, ticker):
+        return _yfinance().Ticker(ticker).info
+
+    def quarterly_financials(self, ticker):
+        return _yfinance().Ticker(ticker).quarterly_financials
+
+    def quarterly_balance_sheet(self, ticker):
+        return _yfinance().Ticker(ticker).quarterly_balance_sheet
+
+    def news(self, api_key, **params):
+        from newsapi import NewsApiClient
+        return NewsApiClient(api_key=api_key).get_everything(**params)
+
+class _Recordings:
+    """Pickled responses under a directory, one file per ticker or query."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, kind, key):
+        safe = key.replace("/", "_").replace("^", "_")
+        return os.path.join(self.directory, kind, f"{safe}.pkl")
+
+    def load(self, kind, key):
+        path = self.path(kind, key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def save(self, kind, key, value):
+        write_atomic(self.path(kind, key), lambda f: pickle.dump(value, f))
+
+def _query_key(params):
+    return hashlib.sha1(str(params.get("q")).encode("utf-8")).hexdigest()
+
+def _published_between(articles, params):
+    start = pd.Timestamp(params["from_param"], tz="UTC") if params.get("from_param") else None
+    end = pd.Timestamp(params["to"], tz="UTC") if params.get("to") else None
+    kept = []
+    for article in articles:
+        published = pd.Timestamp(article["publishedAt"])
+        if (start is None or published >= start) and (end is None or published <= end + pd.Timedelta(days=1)):
+            kept.append(article)
+    kept.sort(key=lambda article: article["publishedAt"], reverse=True)
+    return kept[:params.get("page_size", 100)]
+
+class RecordingProvider:
+    """Passes calls through to another provider and saves every response.
+
+    Price bars are merged per ticker and interval, and news per query, so
+    repeated sessions build up one recording that ReplayProvider can serve
+    for any later start date.
+    """
+
+    name = "record"
+
+    def __init__(self, inner=None, directory=RECORDINGS_DIR):
+        self.inner = inner or LiveProvider()
+        self.recordings = _Recordings(directory)
+        self._lock = threading.Lock()
+
+    def download(self, tickers, start=None, interval="1d"):
+        raw = self.inner.download(tickers, start=start, interval=interval)
+        if raw is None or raw.empty:
+            return raw
+        if raw.columns.nlevels == 1:
+            raw.columns = pd.MultiIndex.from_product([raw.columns, _tickers(tickers)[:1]])
+        with self._lock:
+            for ticker, frame in split(raw, _tickers(tickers)).items():
+                key = f"{ticker}_{interval}"
+                stored = self.recordings.load("prices", key)
+                if stored is not None:
+                    frame = pd.concat([stored, frame])
+                    frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+                self.recordings.save("prices", key, frame)
+        return raw
+
+    def _field(self, field, ticker):
+        value = getattr(self.inner, field)(ticker)
+        self.recordings.save(field, ticker, value)
+        return value
+
+    def info(self, ticker):
+        return self._field("info", ticker)
+
+    def quarterly_financials(self, ticker):
+        return self._field("quarterly_financials", ticker)
+
+    def quarterly_balance_sheet(self, ticker):
+        return self._field("quarterly_balance_sheet", ticker)
+
+    def news(self, api_key, **params):
+        response = self.inner.news(api_key, **params)
+        key = _query_key(params)
+        with self._lock:
+            stored = {article.get("url") or article.get("title"): article
+                      for article in self.recordings.load("news", key) or []}
+            for article in response.get("articles", []):
+                stored[article.get("url") or article.get("title")] = article
+            self.recordings.save("news", key, list(stored.values()))
+        return response
+
+class ReplayProvider:
+    """Serves responses saved by RecordingProvider, with no network access.
+
+    Unrecorded tickers download as empty frames, the way yfinance answers
+    unknown symbols; other unrecorded calls raise LookupError.
+    """
+
+    name = "replay"
+
+    def __init__(self, directory=RECORDINGS_DIR):
+        self.recordings = _Recordings(directory)
+
+    def download(self, tickers, start=None, interval="1d"):
+        frames = {}
+        for ticker in _tickers(tickers):
+            frame = self.recordings.load("prices", f"{ticker}_{interval}")
+            if frame is not None:
+                frames[ticker] = _since(frame, start)
+        return combine(frames)
+
+    def _field(self, field, ticker):
+        value = self.recordings.load(field, ticker)
+        if value is None:
+            raise LookupError(f"No recorded {field} for {ticker}")
+        return value
+
+    def info(self, ticker):
+        return dict(self._field("info", ticker))
+
+    def quarterly_financials(self, ticker):
+        return self._field("quarterly_financials", ticker)
+
+    def quarterly_balance_sheet(self, ticker):
+        return self._field("quarterly_balance_sheet", ticker)
+
+    def news(self, api_key, **params):
+        articles = self.recordings.load("news", _query_key(params))
+        if articles is None:
+            raise LookupError(f"No recorded news for query {params.get('q')!r}")
+        articles = _published_between(articles, params)
+        return {"status": "ok", "totalResults": len(articles), "articles": articles}
+
+# Bar spacing of the synthetic series. Intraday bars run around the clock,
+# which is all a load test needs.
+SYNTHETIC_STEPS = {
+    "1m": pd.Timedelta(minutes=1), "5m": pd.Timedelta(minutes=5),
+    "15m": pd.Timedelta(minutes=15), "30m": pd.Timedelta(minutes=30),
+    "1h": pd.Timedelta(hours=1), "1d": pd.Timedelta(days=1), "1wk": pd.Timedelta(weeks=1)}
+# Keeps synthetic daily and weekly history inside the datetime64[ns] range.
+MAX_SYNTHETIC_SPAN = pd.Timedelta(days=365 * 250)
+MAX_SERIES = 8
+
+def _seed(ticker):
+    return zlib.crc32(ticker.encode("utf-8"))
+
+def synthetic_bars(n, interval="1d", seed=0, end=None, start_price=100.0):
+    """Geometric random-walk OHLCV bars, n of them ending at end (default now).
+
+    Vectorized throughout; a few million bars take well under a second.
+    """
+    step = SYNTHETIC_STEPS[interval]
+    n = int(min(n, MAX_SYNTHETIC_SPAN // step))
+    end = pd.Timestamp.now(tz="UTC").floor(step) if end is None else pd.Timestamp(end)
+    index = pd.date_range(end=end, periods=n, freq=step, name="Date")
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+
+    rng = np.random.default_rng(seed)
+    scale = 0.02 * np.sqrt(step / pd.Timedelta(days=1))
+    close = start_price * np.exp(np.cumsum(rng.normal(0.0, scale, n)))
+    open_ = np.empty(n)
+    open_[0] = start_price
+    open_[1:] = close[:-1]
+    wick = np.abs(rng.normal(0.0, scale / 2, (2, n)))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    volume = rng.lognormal(13.0, 0.5, n).astype(np.int64)
+    return pd.DataFrame(
+        {"Close": close, "High": high, "Low": low, "Open": open_, "Volume": volume},
+        index=index, columns=PRICE_COLUMNS)
+
+_NEWS_TEMPLATES = [
+    ("{name} beats earnings estimates as revenue grows", "Strong profit growth and an upbeat outlook."),
+    ("{name} shares fall after weak guidance", "Analysts warn of a difficult quarter and poor margins."),
+    ("{name} announces new product launch", "The company expects the launch to be a great success."),
+    ("{name} faces lawsuit over acquisition", "Regulators raised serious concerns about the merger."),
+    ("Analyst upgrade lifts {name}", "The rating was raised on better than expected demand."),
+    ("{name} CEO steps down", "The board named an interim chief while it searches for a successor.")]
+
+class SyntheticProvider:
+    """Deterministic generated markets: every ticker has its own seeded series.
+
+    Series are SYNTHETIC_BARS long (multi-million bars for intraday
+    intervals) and kept in a small LRU so repeated downloads only slice.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, bars=SYNTHETIC_BARS):
+        self.bars = bars
+        self._series = OrderedDict()
+        self._lock = threading.Lock()
+
+    def series(self, ticker, interval="1d"):
+        key = (ticker, interval)
+        with self._lock:
+            frame = self._series.get(key)
+            if frame is not None:
+                self._series.move_to_end(key)
+                return frame
+        frame = synthetic_bars(self.bars, interval, seed=_seed(ticker))
+        with self._lock:
+            self._series[key] = frame
+            while len(self._series) > MAX_SERIES:
+                self._series.popitem(last=False)
+        return frame
+
+    def download(self, tickers, start=None, interval="1d"):
+        return combine({ticker: _since(self.series(ticker, interval), start)
+                        for ticker in _tickers(tickers)})
+
+    def info(self, ticker):
+        close = self.series(ticker)["Close"]
+        year = close.iloc[-252:]
+        shares = 1e9 + _seed(ticker) % 10**9
+        return {
+            "shortName": f"{ticker} Synthetic", "currentPrice": float(close.iloc[-1]),
+            "previousClose": float(close.iloc[-2]), "open": float(close.iloc[-2]),
+            "marketCap": float(close.iloc[-1] * shares), "volume": 10**6,
+            "fiftyTwoWeekHigh": float(year.max()), "fiftyTwoWeekLow": float(year.min()),
+            "trailingPE": 20.0, "forwardPE": 18.0, "sharesOutstanding": shares,
+            "mostRecentQuarter": int((pd.Timestamp.now().to_period("Q").start_time - pd.Timedelta(days=1)).timestamp())}
+
+    def _quarters(self, ticker):
+        ends = pd.date_range(end=pd.Timestamp.now().to_period("Q").start_time, periods=6, freq="QE")[::-1]
+        rng = np.random.default_rng(_seed(ticker))
+        return ends, rng
+
+    def quarterly_financials(self, ticker):
+        ends, rng = self._quarters(ticker)
+        revenue = 1e10 * rng.uniform(0.8, 1.2, len(ends))
+        rows = {
+            "Total Revenue": revenue, "Gross Profit": revenue * 0.4,
+            "Operating Income": revenue * 0.25, "EBITDA": revenue * 0.3,
+            "EBIT": revenue * 0.25, "Net Income": revenue * 0.2,
+            "Diluted EPS": revenue * 0.2 / 1e9}
+        return pd.DataFrame(rows, index=ends).T
+
+    def quarterly_balance_sheet(self, ticker):
+        ends, rng = self._quarters(ticker)
+        debt = 5e10 * rng.uniform(0.8, 1.2, len(ends))
+        rows = {
+            "Total Debt": debt, "Cash And Cash Equivalents": debt * 0.5,
+            "Share Issued": np.full(len(ends), 1e9), "Tangible Book Value": debt * 1.5}
+        return pd.DataFrame(rows, index=ends).T
+
+    def news(self, api_key, **params):
+        start = pd.Timestamp(params.get("from_param") or pd.Timestamp.now() - pd.Timedelta(days=28), tz="UTC")
+        end = pd.Timestamp(params.get("to") or pd.Timestamp.now(), tz="UTC")
+        query = str(params.get("q"))
+        name = query.split('"')[1] if query.count('"') >= 2 else query
+        # Articles sit on a fixed 6-hour grid, so overlapping windows agree.
+        times = pd.date_range(start.ceil("6h"), end, freq="6h")
+        articles = []
+        for when in times[::-1][:params.get("page_size", 100)]:
+            title, description = _NEWS_TEMPLATES[_seed(f"{query}{when}") % len(_NEWS_TEMPLATES)]
+            stamp = when.strftime("%Y-%m-%dT%H:%M:%SZ")
+            articles.append({
+                "source": {"name": "Synthetic Wire"}, "author": None,
+                "title": title.format(name=name), "description": description,
+                "url": f"https://synthetic.invalid/{_seed(query)}/{stamp}",
+                "urlToImage": None, "publishedAt": stamp})
+        return {"status": "ok", "totalResults": len(articles), "articles": articles}
+
+class LatencyProvider:
+    """Delays every call of another provider by latency +/- jitter seconds."""
+
+    def __init__(self, inner, latency, jitter=0.0):
+        self.inner = inner
+        self.name = inner.name
+        self.latency = latency
+        self.jitter = jitter
+
+    def _delay(self):
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+    def __getattr__(self, attr):
+        method = getattr(self.inner, attr)
+        if not callable(method):
+            return method
+
+        def delayed(*args, **kwargs):
+            self._delay()
+            return method(*args, **kwargs)
+        return delayed
+
+class FaultProvider:
+    """Fails a random error_rate of another provider's calls with ConnectionError."""
+
+    def __init__(self, inner, error_rate):
+        self.inner = inner
+        self.name = inner.name
+        self.error_rate = error_rate
+
+    def __getattr__(self, attr):
+        method = getattr(self.inner, attr)
+        if not callable(method):
+            return method
+
+        def faulty(*args, **kwargs):
+            if random.random() < self.error_rate:
+                raise ConnectionError(f"Injected {self.name}.{attr} failure")
+            return method(*args, **kwargs)
+        return faulty
+
+class InstrumentedProvider:
+    """Times every call of another provider and records errors and payload sizes.
+
+    yfinance reports failed downloads as empty frames rather than raising,
+    so those count as upstream errors too.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.name = inner.name
+
+    def __getattr__(self, attr):
+        method = getattr(self.inner, attr)
+        if not callable(method):
+            return method
+
+        def instrumented(*args, **kwargs):
+            stage = f"upstream.{self.name}.{attr}"
+            try:
+                with span(stage) as fields:
+                    result = method(*args, **kwargs)
+                    fields["bytes"] = record_payload(f"{self.name}.{attr}", result)
+            except Exception as e:
+                record_upstream_error(self.name, attr, type(e).__name__)
+                raise
+            if isinstance(result, pd.DataFrame) and result.empty:
+                record_upstream_error(self.name, attr, "empty")
+            return result
+        return instrumented
+
+PROVIDERS = {
+    "live": LiveProvider, "record": RecordingProvider,
+    "replay": ReplayProvider, "synthetic": SyntheticProvider}
+
+_provider = None
+_provider_lock = threading.Lock()
+
+def make_provider(name, latency=0.0, jitter=0.0, errors=0.0):
+    provider = PROVIDERS[name]()
+    if latency or jitter:
+        provider = LatencyProvider(provider, latency, jitter)
+    if errors:
+        provider = FaultProvider(provider, errors)
+    # Instrumented inside the gateway, so spans and errors are per upstream
+    # call: one per merged download and one per retry.
+    return Gateway(InstrumentedProvider(provider))
+
+def get_provider():
+    """The process-wide provider chosen by DATA_PROVIDER, PROVIDER_LATENCY and PROVIDER_ERRORS."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = make_provider(DATA_PROVIDER, PROVIDER_LATENCY, PROVIDER_JITTER, PROVIDER_ERRORS)
+        return _provider
+
+def set_provider(provider):
+    """Swaps the process-wide provider, e.g. for a benchmark or load test."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
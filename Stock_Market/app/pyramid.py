@@ -0,0 +1,108 @@
+import time
+import numpy as np
+import pandas as pd
+from frames import FRAME_CACHE, compact
+from markets import exchange_for
+
+# Bar sizes offered, each mapped to the downloaded size it is built from.
+# Only the finest intraday and the daily series are fetched upstream.
+SOURCES = {"5m": "5m", "15m": "5m", "1h": "5m", "1d": "1d", "1wk": "1d"}
+STEPS = {
+    "5m": pd.Timedelta(minutes=5), "15m": pd.Timedelta(minutes=15),
+    "1h": pd.Timedelta(hours=1), "1d": pd.Timedelta(days=1), "1wk": pd.Timedelta(weeks=1)}
+# How far back upstream serves each downloaded size; None is everything.
+HISTORY = {"5m": pd.Timedelta(days=59), "1d": None}
+# Weekly buckets start on Monday; the epoch fell on a Thursday.
+WEEK_ORIGIN = pd.Timedelta(days=4)
+# Aggregates are rebuilt when their source changes, so they never expire.
+KEEP_SECONDS = 365 * 86400
+
+def derived_from(source):
+    return [interval for interval, base in SOURCES.items() if base == source and interval != source]
+
+def _origin(interval, exchange):
+    if interval == "1wk":
+        return WEEK_ORIGIN.value
+    # Intraday buckets are aligned to the session open, as upstream does.
+    opening = pd.Timedelta(hours=exchange.open.hour, minutes=exchange.open.minute)
+    return opening.value % STEPS[interval].value
+
+def bucket_keys(index, interval, exchange):
+    """Bucket number of every bar, counted on the exchange's wall clock."""
+    local = index.as_unit("ns").tz_convert(exchange.tz).tz_localize(None).asi8
+    return (local - _origin(interval, exchange)) // STEPS[interval].value
+
+def resample(bars, interval, exchange):
+    """OHLCV bars aggregated to interval in one vectorized pass.
+
+    bars must be sorted. Each bucket is labelled with its start, like
+    upstream bars of that size.
+    """
+    if bars is None or bars.empty:
+        return bars
+    keys = bucket_keys(bars.index, interval, exchange)
+    edges = np.flatnonzero(np.diff(keys)) + 1
+    first = np.concatenate(([0], edges))
+    last = np.append(edges - 1, len(keys) - 1)
+
+    # Offsets are taken on the wall clock so buckets spanning a DST change
+    # still start at the right local time.
+    index = bars.index.as_unit("ns")
+    local = index.tz_convert(exchange.tz).tz_localize(None).asi8
+    starts = keys[first] * STEPS[interval].value + _origin(interval, exchange)
+    labels = index.asi8[first] - (local[first] - starts)
+
+    columns = {
+        "Close": bars["Close"].to_numpy()[last],
+        "High": np.fmax.reduceat(bars["High"].to_numpy(), first),
+        "Low": np.fmin.reduceat(bars["Low"].to_numpy(), first),
+        "Open": bars["Open"].to_numpy()[first]}
+    if "Volume" in bars:
+        columns["Volume"] = np.add.reduceat(bars["Volume"].to_numpy(dtype=np.int64), first)
+    frame = pd.DataFrame(columns, index=pd.DatetimeIndex(pd.to_datetime(labels, utc=True), name=index.name))
+    frame.attrs = dict(bars.attrs)
+    return compact(frame, bars.index.tz)
+
+def extend(previous, bars, interval, exchange):
+    """previous, the aggregate of an older copy of bars, brought up to date.
+
+    Only buckets from the day of the previous last source bar are rebuilt,
+    which covers both new bars and ones re-downloaded by a delta fetch.
+    """
+    if (previous is None or previous.empty
+            or previous.attrs.get("source_start") != bars.index[0]
+            or previous.attrs.get("source_end") > bars.index[-1]):
+        return resample(bars, interval, exchange)
+    changed = previous.attrs["source_end"].tz_convert("UTC").normalize()
+    i = max(previous.index.searchsorted(changed, side="right") - 1, 0)
+    tail = resample(bars.iloc[bars.index.searchsorted(previous.index[i]):], interval, exchange)
+    return pd.concat([previous.iloc[:i], tail])
+
+def _key(ticker, interval):
+    return f"pyramid:{ticker}:{interval}"
+
+def _store(ticker, interval, frame, bars):
+    frame.attrs = dict(bars.attrs, source_start=bars.index[0], source_end=bars.index[-1])
+    now = time.time()
+    FRAME_CACHE.set(_key(ticker, interval), now, frame, now + KEEP_SECONDS)
+    return frame
+
+def update(ticker, source, bars):
+    """Brings every aggregate of ticker's source series up to date with bars."""
+    if bars is None or bars.empty:
+        return
+    exchange = exchange_for(ticker)
+    for interval in derived_from(source):
+        entry = FRAME_CACHE.get(_key(ticker, interval))
+        previous = None if entry is None else entry[1]
+        _store(ticker, interval, extend(previous, bars, interval, exchange), bars)
+
+def level(ticker, interval, bars):
+    """ticker's bars at interval, given its source series bars."""
+    if bars is None or bars.empty or SOURCES[interval] == interval:
+        return bars
+    entry = FRAME_CACHE.get(_key(ticker, interval))
+    if entry is not None and entry[1].attrs.get("source_end") == bars.index[-1]:
+        return entry[1]
+    previous = None if entry is None else entry[1]
+    return _store(ticker, interval, extend(previous, bars, interval, exchange_for(ticker)), bars)
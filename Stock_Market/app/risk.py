@@ -0,0 +1,209 @@
+import threading
+from collections import OrderedDict
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+# Appended rows after which the running sums are rebuilt from the window,
+# so add/subtract rounding cannot accumulate.
+REFIT_EVERY = 252
+MAX_TRACKERS = 8
+DAY_NS = 86400 * 10**9
+
+def returns_matrix(frames):
+    """Simple daily returns of every frame's Close as one contiguous (days x tickers) frame.
+
+    Bars are matched by calendar date, so listings on different exchanges
+    line up, and closes are carried over holidays; a ticker is NaN only
+    before its first bar.
+    """
+    # Local calendar day of every bar, as whole days since the epoch.
+    days = {}
+    for ticker, frame in frames.items():
+        index = frame.index.as_unit("ns")
+        local = index.tz_localize(None) if index.tz is not None else index
+        days[ticker] = local.asi8 // DAY_NS
+    calendar = np.unique(np.concatenate(list(days.values())))
+    values = np.full((len(calendar), len(frames)), np.nan)
+    for j, (ticker, frame) in enumerate(frames.items()):
+        # The last bar of a day wins, as a still-forming bar is stored last.
+        rows = np.searchsorted(calendar, days[ticker])
+        values[rows, j] = frame["Close"].to_numpy(dtype=np.float64)
+    close = pd.DataFrame(values, index=pd.DatetimeIndex(calendar * DAY_NS), columns=list(frames)).ffill()
+    values = close.to_numpy(dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = values[1:] / values[:-1] - 1
+    # Wrapped without a copy, so to_numpy() hands back this row-major matrix.
+    return pd.DataFrame(np.ascontiguousarray(returns), index=close.index[1:], columns=close.columns, copy=False)
+
+def _filled(rows):
+    # Zero-filled values and their validity; the counts decide which
+    # tickers have a full window.
+    values = np.asarray(rows, dtype=np.float64)
+    valid = ~np.isnan(values)
+    return np.where(valid, values, 0.0), valid
+
+def _window_sums(x, window):
+    # Trailing window sums along axis 0, NaN until the window is full.
+    sums = np.cumsum(np.concatenate([np.zeros((1,) + x.shape[1:]), x]), axis=0)
+    out = np.full(x.shape, np.nan)
+    if len(x) >= window:
+        out[window - 1:] = sums[window:] - sums[:-window]
+    return out
+
+def rolling_beta(returns, market, window):
+    """Rolling beta and correlation of every column of returns against market.
+
+    Both come from trailing sums of the products, one cumulative sum per
+    moment over the whole matrix; a window with a missing bar is NaN.
+    """
+    y, y_valid = _filled(returns)
+    x, x_valid = _filled(market)
+    valid = y_valid & x_valid[:, None]
+    y, x = np.where(valid, y, 0.0), np.where(valid, x[:, None], 0.0)
+    count = _window_sums(valid.astype(np.float64), window)
+    sx, sy = _window_sums(x, window), _window_sums(y, window)
+    sxx, syy, sxy = _window_sums(x * x, window), _window_sums(y * y, window), _window_sums(x * y, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = sxy - sx * sy / window
+        var_x = sxx - sx * sx / window
+        var_y = syy - sy * sy / window
+        beta = cov / var_x
+        corr = cov / np.sqrt(var_x * var_y)
+    full = count == window
+    return np.where(full, beta, np.nan), np.where(full, corr, np.nan)
+
+def rolling_volatility(series, window, periods_per_year=TRADING_DAYS):
+    """Annualized volatility of series over each trailing window."""
+    x, valid = _filled(series)
+    count = _window_sums(valid.astype(np.float64), window)
+    s, ss = _window_sums(x, window), _window_sums(x * x, window)
+    with np.errstate(invalid="ignore"):
+        var = (ss - s * s / window) / (window - 1)
+        vol = np.sqrt(np.maximum(var, 0.0) * periods_per_year)
+    return np.where(count == window, vol, np.nan)
+
+class RollingCovariance:
+    """Covariance of the last window rows of a returns matrix, kept as running sums.
+
+    New rows are folded in a block at a time: the block's cross products
+    are added and those of the rows leaving the window subtracted, two
+    (rows x N) by (N x rows) products instead of a refit over the window.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.columns = None
+        self.last = None
+        self._lock = threading.Lock()
+
+    def fit(self, returns):
+        tail = returns.iloc[-self.window:]
+        self.rows, self.valid = _filled(tail.to_numpy())
+        self.sum = self.rows.sum(axis=0)
+        self.cross = self.rows.T @ self.rows
+        self.count = self.valid.sum(axis=0)
+        self.columns = returns.columns
+        self.last = returns.index[-1]
+        self.appended = 0
+
+    def _replace_newest(self, row):
+        new, valid = _filled(row)
+        old = self.rows[-1]
+        self.sum += new - old
+        self.cross += np.outer(new, new) - np.outer(old, old)
+        self.count += valid.astype(int) - self.valid[-1]
+        self.rows[-1], self.valid[-1] = new, valid
+
+    def _append(self, block):
+        new, valid = _filled(block)
+        k = len(new)
+        old, old_valid = self.rows[:k], self.valid[:k]
+        self.sum += new.sum(axis=0) - old.sum(axis=0)
+        self.cross += new.T @ new - old.T @ old
+        self.count += valid.sum(axis=0) - old_valid.sum(axis=0)
+        self.rows = np.concatenate([self.rows[k:], new])
+        self.valid = np.concatenate([self.valid[k:], valid])
+        self.appended += k
+
+    def update(self, returns):
+        """Brings the window up to the end of returns.
+
+        Only rows after the previous update are folded in, plus the last
+        one seen again in case it was still forming. A change of columns,
+        a rewritten history or a gap longer than the window refits.
+        """
+        with self._lock:
+            if (self.last is None or not returns.columns.equals(self.columns)
+                    or self.last not in returns.index or len(returns) < self.window):
+                self.fit(returns)
+                return self
+            pos = returns.index.get_loc(self.last)
+            block = returns.iloc[pos + 1:]
+            if len(block) >= self.window or self.appended + len(block) >= REFIT_EVERY:
+                self.fit(returns)
+                return self
+            self._replace_newest(returns.iloc[pos].to_numpy())
+            if len(block):
+                self._append(block.to_numpy())
+            self.last = returns.index[-1]
+            return self
+
+    def cov(self):
+        """The window's sample covariance; NaN for tickers missing a bar in it."""
+        n = len(self.rows)
+        mean = self.sum / n
+        cov = (self.cross - n * np.outer(mean, mean)) / (n - 1)
+        partial = self.count < n
+        cov[partial, :] = np.nan
+        cov[:, partial] = np.nan
+        return pd.DataFrame(cov, index=self.columns, columns=self.columns)
+
+    def corr(self):
+        cov = self.cov().to_numpy()
+        sd = np.sqrt(np.diag(cov))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = cov / np.outer(sd, sd)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+_trackers = OrderedDict()
+_trackers_lock = threading.Lock()
+
+def rolling_covariance(returns, window):
+    """The shared RollingCovariance of these columns and window, updated to returns."""
+    key = (tuple(returns.columns), window)
+    with _trackers_lock:
+        tracker = _trackers.get(key)
+        if tracker is None:
+            tracker = _trackers[key] = RollingCovariance(window)
+            while len(_trackers) > MAX_TRACKERS:
+                _trackers.popitem(last=False)
+        _trackers.move_to_end(key)
+    return tracker.update(returns)
+
+def value_at_risk(returns, weights, cov, confidence=0.95, lookback=None):
+    """One-bar VaR of the weighted portfolio, as positive fractions of its value.
+
+    Historical VaR and expected shortfall come from the portfolio's own
+    returns over the lookback; parametric VaR assumes normal returns with
+    covariance cov and is split into each holding's component VaR.
+    """
+    tail = returns if lookback is None else returns.iloc[-lookback:]
+    x, _ = _filled(tail.to_numpy())
+    w = np.asarray(weights, dtype=np.float64)
+    portfolio = x @ w
+    z = NormalDist().inv_cdf(confidence)
+
+    historical = -np.quantile(portfolio, 1 - confidence)
+    losses = portfolio[portfolio <= -historical]
+    sigma_w = np.nan_to_num(np.asarray(cov, dtype=np.float64)) @ w
+    sigma = float(np.sqrt(max(w @ sigma_w, 0.0)))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        components = w * sigma_w / sigma * z
+    return {
+        "historical": float(historical),
+        "expected_shortfall": float(-losses.mean()) if len(losses) else float("nan"),
+        "parametric": float(z * sigma - portfolio.mean()),
+        "volatility": sigma,
+        "components": pd.Series(components, index=tail.columns)}
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from indicators import DEFAULT_WINDOWS, rsi_from_averages
+
+SCREEN_COLUMNS = ["Last", "Change", "Change %", "RSI", "SMA Distance %", "Volume", "Volume Spike"]
+
+def align(frames, column, depth):
+    """Stacks the last depth bars of one column of every frame into a (depth x tickers) array.
+
+    Rows line up by position from each ticker's own last bar, not by
+    timestamp, so tickers on different exchanges, time zones or calendars
+    are each measured on bars they actually traded. Shorter histories are
+    NaN at the top.
+    """
+    matrix = np.full((depth, len(frames)), np.nan)
+    for i, frame in enumerate(frames.values()):
+        values = frame[column].to_numpy(dtype=float)[-depth:]
+        if len(values):
+            matrix[-len(values):, i] = values
+    return matrix
+
+def _trailing_mean(x, window):
+    # Mean of the last `window` rows per column; NaN where history is shorter.
+    tail = x[-window:]
+    mean = np.nanmean(tail, axis=0) if len(tail) else np.full(x.shape[1], np.nan)
+    mean[np.sum(~np.isnan(tail), axis=0) < window] = np.nan
+    return mean
+
+def screen(frames, sma_window=DEFAULT_WINDOWS["SMA"], rsi_window=DEFAULT_WINDOWS["RSI"],
+           volume_window=DEFAULT_WINDOWS["VOLSMA"]):
+    """Latest price, change, RSI, SMA distance and volume spike for every ticker at once."""
+    if not frames:
+        return pd.DataFrame(columns=SCREEN_COLUMNS)
+    depth = max(sma_window, rsi_window + 1, volume_window + 1, 2)
+    tickers = pd.Index(list(frames))
+    c = align(frames, "Close", depth)
+    v = align(frames, "Volume", depth)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        last = c[-1]
+        prev = c[-2]
+        change = last - prev
+        change_pct = change / prev * 100
+
+        delta = np.diff(c[-(rsi_window + 1):], axis=0)
+        rsi = rsi_from_averages(_trailing_mean(np.where(delta > 0, delta, 0.0), rsi_window),
+                                _trailing_mean(np.where(delta < 0, -delta, 0.0), rsi_window))
+        rsi[np.isnan(delta).any(axis=0)] = np.nan
+
+        sma_distance = (last / _trailing_mean(c, sma_window) - 1) * 100
+        volume_spike = v[-1] / _trailing_mean(v[:-1], volume_window)
+
+    table = pd.DataFrame({
+        "Last": last, "Change": change, "Change %": change_pct, "RSI": rsi,
+        "SMA Distance %": sma_distance, "Volume": v[-1], "Volume Spike": volume_spike},
+        index=tickers)
+    table.index.name = "Ticker"
+    return table
@@ -0,0 +1,141 @@
+import hashlib
+import importlib.util
+import multiprocessing
+import os
+import sqlite3
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from config import CACHE_DIR, SENTIMENT_SCORER
+
+DB_PATH = os.path.join(CACHE_DIR, "sentiment.sqlite")
+# Texts per process-pool task. Jobs under PARALLEL_MIN_TEXTS are scored
+# inline, where spawning and pickling would cost more than they save.
+BATCH_SIZE = 64
+PARALLEL_MIN_TEXTS = 256
+MAX_PROCESSES = min(4, (os.cpu_count() or 1) - 1)
+
+class TextBlobScorer:
+    name = "textblob"
+
+    def score(self, texts):
+        # TextBlob pulls in NLTK, a couple of seconds of imports, so it is
+        # loaded by the first scoring call rather than with the module.
+        from textblob import TextBlob
+        return np.array([TextBlob(text).sentiment.polarity for text in texts], dtype=float)
+
+class LexiconScorer:
+    """Mean polarity of the words found in TextBlob's adjective lexicon.
+
+    Ignores negation and intensifiers, so it is coarser than TextBlob but
+    scores a whole batch with a handful of vectorized pandas operations.
+    """
+
+    name = "lexicon"
+    _TOKEN = r"[a-z][a-z'-]*"
+    _lexicon = None
+
+    @classmethod
+    def lexicon(cls):
+        if cls._lexicon is None:
+            # Located without importing textblob itself.
+            package = importlib.util.find_spec("textblob").submodule_search_locations[0]
+            path = os.path.join(package, "en", "en-sentiment.xml")
+            words = [(w.get("form").lower(), float(w.get("polarity")))
+                     for w in ET.parse(path).getroot().iter("word")]
+            cls._lexicon = pd.DataFrame(words, columns=["form", "polarity"]).groupby("form")["polarity"].mean()
+        return cls._lexicon
+
+    def score(self, texts):
+        tokens = pd.Series(list(texts), dtype=object).str.lower().str.findall(self._TOKEN).explode()
+        polarity = tokens.map(self.lexicon()).to_numpy(dtype=float)
+        doc = tokens.index.to_numpy()
+        found = ~np.isnan(polarity)
+        sums = np.bincount(doc[found], weights=polarity[found], minlength=len(texts))
+        counts = np.bincount(doc[found], minlength=len(texts))
+        return np.divide(sums, counts, out=np.zeros(len(texts)), where=counts > 0)
+
+SCORERS = {"textblob": TextBlobScorer, "lexicon": LexiconScorer}
+
+def get_scorer(name=None):
+    return SCORERS[name or SENTIMENT_SCORER]()
+
+class SentimentCache:
+    """Scores persisted in SQLite, keyed by scorer and content hash."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS scores ("
+                "scorer TEXT, key TEXT, polarity REAL, PRIMARY KEY (scorer, key))")
+        return self._conn
+
+    def get_many(self, scorer, keys):
+        found = {}
+        keys = list(keys)
+        with self._lock:
+            conn = self._connection()
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT key, polarity FROM scores WHERE scorer = ? AND key IN ({','.join('?' * len(chunk))})",
+                    [scorer, *chunk])
+                found.update(rows)
+        return found
+
+    def put_many(self, scorer, scores):
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO scores (scorer, key, polarity) VALUES (?, ?, ?)",
+                [(scorer, key, float(value)) for key, value in scores.items()])
+            conn.commit()
+
+_cache = SentimentCache()
+_executor = None
+_executor_lock = threading.Lock()
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawned, not forked: the server process is multi-threaded.
+            _executor = ProcessPoolExecutor(
+                max_workers=MAX_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+def score_texts(scorer, texts):
+    if MAX_PROCESSES < 1 or len(texts) < PARALLEL_MIN_TEXTS:
+        return scorer.score(texts)
+    batches = [texts[i:i + BATCH_SIZE] for i in range(0, len(texts), BATCH_SIZE)]
+    return np.concatenate(list(_pool().map(scorer.score, batches)))
+
+def article_text(article):
+    return (article.get('title', '') or '') + " " + (article.get('description', '') or '')
+
+def content_key(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def score_articles(articles, scorer=None):
+    """Polarity per article (None when it has no text); only unseen texts are scored."""
+    scorer = scorer or get_scorer()
+    texts = [article_text(article) for article in articles]
+    keys = [content_key(text) if text.strip() else None for text in texts]
+    unique = {key: text for key, text in zip(keys, texts) if key is not None}
+
+    scores = _cache.get_many(scorer.name, unique)
+    missing = [key for key in unique if key not in scores]
+    if missing:
+        fresh = dict(zip(missing, map(float, score_texts(scorer, [unique[key] for key in missing]))))
+        _cache.put_many(scorer.name, fresh)
+        scores.update(fresh)
+    return [scores[key] if key is not None else None for key in keys]
@@ -0,0 +1,352 @@
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from config import CACHE_DIR, CACHE_BACKEND, CACHE_URL
+from snapshot import SingleFlight
+from telemetry import span, record_cache, emit
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Bumped whenever the stored entry layout, or the shape of a cached result, changes.
+CACHE_VERSION = 2
+DB_PATH = os.path.join(CACHE_DIR, "shared.sqlite")
+# How long after its TTL an entry is still served while it refreshes, in
+# TTLs, unless the function asks for longer with max_stale.
+STALE_TTLS = 2
+# A refresh holds its lease this long, so a crashed worker cannot block
+# refreshes of the key for good.
+LEASE_SECONDS = 60
+# How often a process waiting on another's computation checks for it.
+POLL_SECONDS = 0.1
+MEMORY_MAX_BYTES = 512 * 1024 * 1024
+REFRESH_WORKERS = 4
+
+class MemoryBackend:
+    """In-process backend, and the stand-in for Redis in tests.
+
+    Entries are evicted least recently used once their total size, as
+    measured by sizeof, passes max_bytes. Functions cached with
+    pickled=False keep live objects here instead of pickled bytes.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_bytes=MEMORY_MAX_BYTES, sizeof=len):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._leases = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] < time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def stored_at(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None or entry[2] < time.time() else entry[0]
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self.bytes -= entry[3]
+
+    def set(self, key, stored_at, blob, expires):
+        size = self.sizeof(blob)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (stored_at, blob, expires, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)))
+
+    def acquire(self, key, seconds):
+        now = time.time()
+        with self._lock:
+            if self._leases.get(key, 0) > now:
+                return False
+            self._leases[key] = now + seconds
+            return True
+
+    def release(self, key):
+        with self._lock:
+            self._leases.pop(key, None)
+
+    def clear(self, prefix):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                self._drop(key)
+
+class SQLiteBackend:
+    """Shared by every app process on the host through one database file."""
+
+    name = "sqlite"
+    # Expired rows are deleted every this many writes.
+    PURGE_EVERY = 100
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, stored_at REAL, expires REAL, value BLOB)")
+            conn.execute("CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, until REAL)")
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT stored_at, value FROM entries WHERE key = ? AND expires >= ?",
+            (key, time.time())).fetchone()
+        return None if row is None else (row[0], row[1])
+
+    def stored_at(self, key):
+        row = self._conn().execute(
+            "SELECT stored_at FROM entries WHERE key = ? AND expires >= ?",
+            (key, time.time())).fetchone()
+        return None if row is None else row[0]
+
+    def set(self, key, stored_at, blob, expires):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, stored_at, expires, value) VALUES (?, ?, ?, ?)",
+            (key, stored_at, expires, blob))
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM entries WHERE expires < ?", (time.time(),))
+
+    def acquire(self, key, seconds):
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT until FROM leases WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[0] > now:
+                return False
+            conn.execute("INSERT OR REPLACE INTO leases (key, until) VALUES (?, ?)", (key, now + seconds))
+            return True
+        finally:
+            conn.execute("COMMIT")
+
+    def release(self, key):
+        self._conn().execute("DELETE FROM leases WHERE key = ?", (key,))
+
+    def clear(self, prefix):
+        self._conn().execute("DELETE FROM entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+class RedisBackend:
+    """Any server speaking the Redis protocol; needs the redis package."""
+
+    name = "redis"
+
+    def __init__(self, url=CACHE_URL):
+        if redis is None:
+            raise ImportError("CACHE_BACKEND=redis needs the redis package: pip install redis")
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        stored_at, blob = self.client.hmget(key, "stored_at", "value")
+        return None if blob is None else (float(stored_at), blob)
+
+    def stored_at(self, key):
+        stored_at = self.client.hget(key, "stored_at")
+        return None if stored_at is None else float(stored_at)
+
+    def set(self, key, stored_at, blob, expires):
+        pipe = self.client.pipeline()
+        pipe.hset(key, mapping={"stored_at": repr(stored_at), "value": blob})
+        pipe.expire(key, max(1, int(expires - time.time())))
+        pipe.execute()
+
+    def acquire(self, key, seconds):
+        return bool(self.client.set(f"lease:{key}", 1, nx=True, ex=seconds))
+
+    def release(self, key):
+        self.client.delete(f"lease:{key}")
+
+    def clear(self, prefix):
+        keys = list(self.client.scan_iter(match=f"{prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+
+BACKENDS = {"memory": MemoryBackend, "sqlite": SQLiteBackend, "redis": RedisBackend}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = BACKENDS[CACHE_BACKEND]()
+        return _backend
+
+def set_backend(backend):
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+_flight = SingleFlight()
+_listeners = []
+
+def add_listener(listener):
+    """Calls listener(wrapper, args, kwargs) on every lookup of any cached function.
+
+    The arguments are bound to the function's parameters, defaults included.
+    Refreshes do not notify, so listeners see only demand from callers.
+    """
+    _listeners.append(listener)
+_refresher = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="refresh")
+
+def _bind(signature, args, kwargs):
+    # f(1), f(x=1) and f(1) with a defaulted argument left out are one call.
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return bound.args, bound.kwargs
+
+def _call_key(prefix, args, kwargs):
+    digest = hashlib.sha1(repr((args, sorted(kwargs.items()))).encode("utf-8")).hexdigest()
+    return f"{prefix}{digest}"
+
+def cache_data(ttl, max_stale=None, backend=None, pickled=True):
+    """Caches a function's results in the shared backend, stale-while-revalidate.
+
+    Within ttl an entry is a hit. For max_stale seconds after that, by
+    default STALE_TTLS times ttl, it is still returned at once while one worker, across all processes sharing
+    the backend, recomputes it in the background. After that the backend
+    drops it, and a missing entry is computed in the caller; concurrent
+    callers in this process share one computation, and those in other
+    processes wait for it through the same lease. Every call
+    is timed and counted as a hit, expired (served stale) or miss.
+
+    An in-process backend can be passed instead, with pickled=False to
+    hand every caller the same stored object; callers must not mutate it.
+
+    The wrapper also has clear(), refresh(*args, **kwargs) to recompute
+    and store an entry now, set(value, *args, **kwargs) to store a value
+    computed elsewhere, and age(*args, **kwargs) in seconds.
+    """
+    if max_stale is None:
+        max_stale = ttl * STALE_TTLS
+    dumps = (lambda value: pickle.dumps(value, pickle.HIGHEST_PROTOCOL)) if pickled else (lambda value: value)
+    loads = pickle.loads if pickled else (lambda value: value)
+
+    def cache():
+        return backend or get_backend()
+
+    def decorate(fn):
+        name = fn.__qualname__
+        prefix = f"v{CACHE_VERSION}:{fn.__module__}.{name}:"
+        signature = inspect.signature(fn)
+
+        def store(key, value):
+            now = time.time()
+            cache().set(key, now, dumps(value), now + ttl + max_stale)
+
+        def compute(key, args, kwargs):
+            with span(f"{name}.compute"):
+                value = fn(*args, **kwargs)
+            store(key, value)
+            return value
+
+        def load(key, args, kwargs):
+            # Another process may be computing the same entry; wait for its
+            # result rather than fetching it a second time.
+            shared = cache()
+            deadline = time.time() + LEASE_SECONDS
+            acquired = shared.acquire(key, LEASE_SECONDS)
+            while not acquired and time.time() < deadline:
+                time.sleep(POLL_SECONDS)
+                entry = shared.get(key)
+                if entry is not None:
+                    return loads(entry[1])
+                acquired = shared.acquire(key, LEASE_SECONDS)
+            try:
+                # The previous holder may have stored it just before letting go.
+                entry = shared.get(key)
+                if entry is not None and time.time() - entry[0] < ttl:
+                    return loads(entry[1])
+                return compute(key, args, kwargs)
+            finally:
+                # Past the deadline the call computes without the lease, which
+                # is still the stuck holder's to release.
+                if acquired:
+                    shared.release(key)
+
+        def revalidate(key, args, kwargs):
+            try:
+                with span(f"{name}.refresh"):
+                    compute(key, args, kwargs)
+            except Exception as e:
+                emit("refresh_failed", function=name, error=type(e).__name__)
+            finally:
+                cache().release(key)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            args, kwargs = _bind(signature, args, kwargs)
+            key = _call_key(prefix, args, kwargs)
+            with span(name) as fields:
+                entry = cache().get(key)
+                age = None if entry is None else time.time() - entry[0]
+                if entry is None:
+                    outcome = "miss"
+                elif age < ttl:
+                    outcome = "hit"
+                else:
+                    outcome = "expired"
+                    if cache().acquire(key, LEASE_SECONDS):
+                        _refresher.submit(revalidate, key, args, kwargs)
+                fields["cache"] = outcome
+                record_cache(name, outcome)
+                for listener in _listeners:
+                    listener(wrapper, args, kwargs)
+                if entry is not None:
+                    return loads(entry[1])
+                return _flight.do(key, lambda: load(key, args, kwargs))
+
+        def refresh(*args, **kwargs):
+            args, kwargs = _bind(signature, args, kwargs)
+            key = _call_key(prefix, args, kwargs)
+            return _flight.do(key, lambda: compute(key, args, kwargs))
+
+        def age(*args, **kwargs):
+            stored_at = cache().stored_at(_call_key(prefix, *_bind(signature, args, kwargs)))
+            return None if stored_at is None else time.time() - stored_at
+
+        def set(value, *args, **kwargs):
+            store(_call_key(prefix, *_bind(signature, args, kwargs)), value)
+
+        wrapper.clear = lambda: cache().clear(prefix)
+        wrapper.set = set
+        wrapper.refresh = refresh
+        wrapper.age = age
+        wrapper.ttl = ttl
+        return wrapper
+    return decorate
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+from providers import get_provider
+
+# Seconds each field group stays fresh. Info carries the live quote, the
+# statements only move once a quarter.
+FIELD_TTLS = {
+    "info": 60,
+    "quarterly_financials": 86400,
+    "quarterly_balance_sheet": 86400}
+# Fields kept across all tickers; the least recently used are dropped first.
+MAX_ENTRIES = 1024
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+_flight = SingleFlight()
+_entries = OrderedDict()
+_entries_lock = threading.Lock()
+
+def _fresh(key, now):
+    with _entries_lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+    if entry is not None and now - entry[0] < FIELD_TTLS[key[1]]:
+        return entry
+    return None
+
+def _store(ticker, field):
+    value = getattr(get_provider(), field)(ticker)
+    with _entries_lock:
+        _entries[(ticker, field)] = (time.time(), value)
+        _entries.move_to_end((ticker, field))
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+    return value
+
+def _fetch(ticker, field):
+    entry = _fresh((ticker, field), time.time())
+    if entry is not None:
+        # Another session refreshed it while this one queued for the flight.
+        return entry[1]
+    return _store(ticker, field)
+
+def get_field(ticker, field):
+    entry = _fresh((ticker, field), time.time())
+    if entry is not None:
+        return entry[1]
+    return _flight.do((ticker, field), lambda: _fetch(ticker, field))
+
+def age(ticker, field):
+    """Seconds since the field was fetched, None if it never was."""
+    with _entries_lock:
+        entry = _entries.get((ticker, field))
+    return None if entry is None else time.time() - entry[0]
+
+def refresh(ticker, field):
+    return _flight.do((ticker, field), lambda: _store(ticker, field))
+
+def get_info(ticker):
+    return dict(get_field(ticker, "info"))
+
+def get_quarterly_financials(ticker):
+    return get_field(ticker, "quarterly_financials")
+
+def get_quarterly_balance_sheet(ticker):
+    return get_field(ticker, "quarterly_balance_sheet")
@@ -0,0 +1,133 @@
+"""Cold-start and first-render times of the dashboard, with an import-time report.
+
+Each run starts a fresh interpreter, as a new replica or a recycled worker
+does, and times three phases against BUDGETS:
+
+    boot      importing Streamlit's script runner, before any session
+    welcome   the first run of Summary.py, the ticker-entry screen
+    analysis  the run after Start Analysis, once the warmup has finished
+
+Data is synthetic and the cache directory empty. The modules that took
+longest to import are listed per phase, grouped by top-level package.
+
+    python startup.py
+    python startup.py --runs 5 --top 20
+    WARMUP=0 python startup.py
+"""
+import argparse
+import datetime
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from config import CACHE_DIR
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(CACHE_DIR, "benchmarks")
+PHASES = ["boot", "welcome", "analysis"]
+# Seconds per phase, with headroom over a 1-CPU container; a run over any
+# of them fails the check.
+BUDGETS = {"boot": 1.5, "welcome": 2.0, "analysis": 3.0}
+TICKER = "AAPL"
+
+# Runs in the fresh interpreter under -X importtime, which writes one line
+# per import to stderr; the phase markers split those lines up.
+_CHILD = r"""
+import json, os, sys, time
+def phase(name):
+    print(f"startup-phase: {name}", file=sys.stderr, flush=True)
+    return time.perf_counter()
+seconds = {}
+start = phase("boot")
+from streamlit import logger
+logger.set_log_level("error")
+from streamlit.testing.v1 import AppTest
+seconds["boot"] = time.perf_counter() - start
+app = AppTest.from_file(os.path.join(sys.argv[1], "Summary.py"), default_timeout=120)
+app.secrets["NEWS_API_KEY"] = "startup"
+start = phase("welcome")
+app.run()
+seconds["welcome"] = time.perf_counter() - start
+sys.path.insert(0, sys.argv[1])
+import warmup
+start = phase("warmup")
+if warmup.WARMUP:
+    warmup.start_warmup().done.wait(120)
+seconds["warmup"] = time.perf_counter() - start
+app.session_state["app_started"] = True
+app.session_state["selected_ticker"] = sys.argv[2]
+start = phase("analysis")
+app.run()
+seconds["analysis"] = time.perf_counter() - start
+phase("end")
+errors = [e.value for e in app.exception]
+print(json.dumps({"seconds": seconds, "errors": errors}))
+"""
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+\d+ \|\s+(\S+)")
+
+def import_report(stderr):
+    """Self import time in seconds per phase and top-level package."""
+    report, current = {}, None
+    for line in stderr.splitlines():
+        if line.startswith("startup-phase: "):
+            current = report.setdefault(line.split(": ", 1)[1], {})
+            continue
+        match = _IMPORT_LINE.match(line)
+        if match and current is not None:
+            package = match.group(2).split(".")[0]
+            current[package] = current.get(package, 0.0) + int(match.group(1)) / 1e6
+    return report
+
+def run_once(ticker=TICKER):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, DATA_PROVIDER="synthetic", SYNTHETIC_BARS="5000",
+                   STOCK_CACHE_DIR=cache_dir, METRICS_PORT="0", TELEMETRY_LOG="0")
+        done = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _CHILD, APP_DIR, ticker],
+            capture_output=True, text=True, env=env, cwd=APP_DIR)
+    if done.returncode != 0:
+        raise RuntimeError(f"startup run failed:\n{done.stderr[-2000:]}")
+    result = json.loads(done.stdout.strip().splitlines()[-1])
+    result["imports"] = import_report(done.stderr)
+    return result
+
+def over_budget(seconds, budgets=BUDGETS):
+    """Lines describing each phase that took longer than its budget."""
+    return [f"{phase}: {seconds[phase]:.2f}s > {budgets[phase]:.2f}s"
+            for phase in PHASES if seconds[phase] > budgets[phase]]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters; the median run is kept")
+    parser.add_argument("--top", type=int, default=10, help="packages listed per phase")
+    parser.add_argument("--out", help="result file (default: a timestamped file in .cache/benchmarks)")
+    args = parser.parse_args(argv)
+
+    runs = sorted((run_once() for _ in range(args.runs)), key=lambda r: sum(r["seconds"][p] for p in PHASES))
+    result = runs[len(runs) // 2]
+    for phase in PHASES + ["warmup"]:
+        note = f"budget {BUDGETS[phase]:.2f}s" if phase in BUDGETS else "background"
+        print(f"{phase:10} {result['seconds'][phase]:8.2f}s  ({note})")
+        imports = sorted(result["imports"].get(phase, {}).items(), key=lambda item: -item[1])
+        for package, seconds in imports[:args.top]:
+            print(f"    {package:30} {seconds:8.3f}s")
+    for error in result["errors"]:
+        print(f"ERROR {error}")
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"startup-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({"budgets": BUDGETS, "runs": runs, "median": result}, f, indent=2)
+    print(f"Saved {out}")
+
+    exceeded = over_budget(result["seconds"])
+    for line in exceeded:
+        print(f"OVER BUDGET {line}")
+    return 1 if exceeded or result["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+import pandas as pd
+from config import CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+STORE_DIR = os.path.join(CACHE_DIR, "ohlcv")
+
+def write_atomic(path, write):
+    """Calls write(f) on a temp file of its own next to path, then renames it
+    over path, so readers and concurrent writers never see a torn file."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+@contextmanager
+def file_lock(path):
+    """Holds an exclusive lock on path for the with block, across threads and
+    processes alike: every caller opens the file anew, and the OS lock is
+    tied to that open file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after ten seconds; keep waiting.
+                    time.sleep(0.1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _path(ticker, interval):
+    safe = ticker.replace("/", "_").replace("^", "_")
+    return os.path.join(STORE_DIR, f"{safe}_{interval}.parquet")
+
+def bars_lock(ticker, interval):
+    """The lock to hold while reading, merging and saving the stored bars of
+    ticker at interval, so no session or worker process loses another's merge."""
+    return file_lock(_path(ticker, interval) + ".lock")
+
+def load_bars(ticker, interval):
+    path = _path(ticker, interval)
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_parquet(path)
+    except Exception:
+        # A torn or incompatible file is treated as a cold store; the next
+        # save rewrites it from a full download.
+        return None
+
+def save_bars(ticker, interval, bars, covered_from):
+    bars = bars.copy()
+    bars.attrs["covered_from"] = covered_from
+    write_atomic(_path(ticker, interval), bars.to_parquet)
+
+def covered_from(bars):
+    if bars is None:
+        return None
+    return bars.attrs.get("covered_from")
+
+def covers(bars, start):
+    # covered_from is "max" once the full history has been downloaded,
+    # otherwise the ISO timestamp of the earliest start requested upstream.
+    covered = covered_from(bars)
+    if covered is None:
+        return False
+    if covered == "max":
+        return True
+    return start is not None and start >= pd.Timestamp(covered)
+
+def merge_bars(stored, fresh):
+    if stored is None or stored.empty:
+        return fresh
+    if fresh is None or fresh.empty:
+        return stored
+    merged = pd.concat([stored, fresh])
+    # The newest stored bar may still have been forming when it was saved,
+    # so the re-downloaded copy wins.
+    merged = merged[~merged.index.duplicated(keep="last")]
+    return merged.sort_index()
@@ -0,0 +1,291 @@
+import copy
+import math
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from indicators import compute_indicators, parse_spec, ema
+
+MAX_STATES = 256
+
+class RollingWindow:
+    """Ring buffer with the running sum and sum of squares of its window."""
+
+    def __init__(self, size):
+        self.size = size
+        self.buffer = [math.nan] * size
+        self.pos = 0
+        self._resum()
+
+    def _resum(self):
+        # Re-adding from the buffer once per window length keeps the
+        # add/subtract drift bounded at O(1) amortized cost.
+        values = [x for x in self.buffer if not math.isnan(x)]
+        self.total = math.fsum(values)
+        self.total_sq = math.fsum(x * x for x in values)
+        self.nans = self.size - len(values)
+        self._pushes = 0
+
+    def seed(self, values):
+        tail = [float(x) for x in values[-self.size:]]
+        self.buffer = tail + [math.nan] * (self.size - len(tail))
+        self.pos = len(tail) % self.size
+        self._resum()
+
+    def push(self, x):
+        old = self.buffer[self.pos]
+        if math.isnan(old):
+            self.nans -= 1
+        else:
+            self.total -= old
+            self.total_sq -= old * old
+        if math.isnan(x):
+            self.nans += 1
+        else:
+            self.total += x
+            self.total_sq += x * x
+        self.buffer[self.pos] = x
+        self.pos = (self.pos + 1) % self.size
+        self._pushes += 1
+        if self._pushes >= self.size:
+            self._resum()
+
+    def full(self):
+        return self.nans == 0
+
+    def mean(self):
+        return self.total / self.size if self.full() else math.nan
+
+    def std(self):
+        if not self.full() or self.size < 2:
+            return math.nan
+        var = (self.total_sq - self.total * self.total / self.size) / (self.size - 1)
+        return math.sqrt(max(var, 0.0))
+
+class RunningEMA:
+    """EMA with pandas ewm(adjust=False) semantics; gaps carry the last input."""
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.value = math.nan
+        self.last_input = math.nan
+
+    def seed(self, values):
+        values = np.asarray(values, dtype=float)
+        valid = values[~np.isnan(values)]
+        if len(valid):
+            self.value = float(ema(values, self.alpha)[-1])
+            self.last_input = float(valid[-1])
+
+    def push(self, x):
+        if math.isnan(x):
+            x = self.last_input
+        if math.isnan(x):
+            return math.nan
+        self.last_input = x
+        if math.isnan(self.value):
+            self.value = x
+        else:
+            self.value = (1 - self.alpha) * self.value + self.alpha * x
+        return self.value
+
+class SMAStream:
+    def __init__(self, n):
+        self.columns = [f"SMA{n}"]
+        self.window = RollingWindow(n)
+
+    def seed(self, close):
+        self.window.seed(close)
+
+    def push(self, x):
+        self.window.push(x)
+        return (self.window.mean(),)
+
+class EMAStream:
+    def __init__(self, n):
+        self.columns = [f"EMA{n}"]
+        self.ema = RunningEMA(2 / (n + 1))
+
+    def seed(self, close):
+        self.ema.seed(close)
+
+    def push(self, x):
+        return (self.ema.push(x),)
+
+class BollingerStream:
+    def __init__(self, n, mult=2):
+        self.columns = [f"BB{n}_Middle", f"BB{n}_Upper", f"BB{n}_Lower"]
+        self.window = RollingWindow(n)
+        self.mult = mult
+
+    def seed(self, close):
+        self.window.seed(close)
+
+    def push(self, x):
+        self.window.push(x)
+        mid, std = self.window.mean(), self.window.std()
+        return mid, mid + self.mult * std, mid - self.mult * std
+
+class RSIStream:
+    # Simple-average RSI, the same definition indicators uses in batch.
+    def __init__(self, n):
+        self.columns = [f"RSI{n}"]
+        self.gains = RollingWindow(n)
+        self.losses = RollingWindow(n)
+        self.prev = math.nan
+
+    def seed(self, close):
+        close = np.asarray(close, dtype=float)
+        delta = np.concatenate([[np.nan], np.diff(close)])
+        self.gains.seed(np.where(delta > 0, delta, 0.0))
+        self.losses.seed(np.where(delta < 0, -delta, 0.0))
+        self.prev = float(close[-1]) if len(close) else math.nan
+
+    def push(self, x):
+        delta = x - self.prev
+        self.prev = x
+        self.gains.push(delta if delta > 0 else 0.0)
+        self.losses.push(-delta if delta < 0 else 0.0)
+        gain, loss = self.gains.mean(), self.losses.mean()
+        if math.isnan(gain) or math.isnan(loss) or (gain == 0 and loss == 0):
+            return (math.nan,)
+        if loss == 0:
+            return (100.0,)
+        return (100 - 100 / (1 + gain / loss),)
+
+class MACDStream:
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.columns = ["MACD", "MACD_Signal", "MACD_Hist"]
+        self.fast = RunningEMA(2 / (fast + 1))
+        self.slow = RunningEMA(2 / (slow + 1))
+        self.signal = RunningEMA(2 / (signal + 1))
+
+    def seed(self, close):
+        close = np.asarray(close, dtype=float)
+        self.fast.seed(close)
+        self.slow.seed(close)
+        self.signal.seed(ema(close, self.fast.alpha) - ema(close, self.slow.alpha))
+
+    def push(self, x):
+        macd = self.fast.push(x) - self.slow.push(x)
+        signal = self.signal.push(macd)
+        return macd, signal, macd - signal
+
+STREAMS = {
+    "SMA": SMAStream, "EMA": EMAStream, "BB": BollingerStream,
+    "RSI": RSIStream, "MACD": MACDStream}
+
+def _make_stream(spec):
+    name, window = parse_spec(spec)
+    if name not in STREAMS:
+        raise ValueError(f"{name} has no streaming implementation")
+    return STREAMS[name]() if window is None else STREAMS[name](window)
+
+class IndicatorState:
+    """Indicators over one bar series, advanced only by newly appended bars.
+
+    Every bar but the newest is committed into the streams. The newest bar
+    may still be forming, so its row is recomputed on a copy each update.
+    The window start may move forward between updates; rows before it are
+    kept until they outnumber the window, then the state is rebuilt.
+    """
+
+    def __init__(self, specs):
+        self.specs = list(specs)
+        self.lock = threading.Lock()
+        self.streams = None
+        self.columns = None
+        self.block = None
+        self.index = None
+        self.offset = 0
+        self.committed = 0
+        self.last_ts = None
+        self.last_close = None
+
+    def _start(self, index, close):
+        # Block row of index[0] if index continues the committed bars,
+        # else None. self.index is the last frame, held at self.offset.
+        if self.streams is None:
+            return None
+        k = self.index.searchsorted(index[0])
+        if k >= len(self.index) or self.index[k] != index[0]:
+            return None
+        start = self.offset + k
+        c = self.committed - start
+        if start > len(index) or not 0 < c < len(index):
+            return None
+        if index[c - 1] != self.last_ts:
+            return None
+        if close[c - 1] == self.last_close or (math.isnan(close[c - 1]) and math.isnan(self.last_close)):
+            return start
+        return None
+
+    def _rebuild(self, data, close):
+        batch = compute_indicators(data, self.specs)
+        self.streams = [_make_stream(spec) for spec in self.specs]
+        self.columns = [col for stream in self.streams for col in stream.columns]
+        for stream in self.streams:
+            stream.seed(close[:-1])
+        self.block = np.empty((max(2 * len(data), 64), len(self.columns)))
+        self.block[:len(data)] = batch.to_numpy()
+
+    def _grow(self, n):
+        if n > len(self.block):
+            grown = np.empty((2 * n, self.block.shape[1]))
+            grown[:len(self.block)] = self.block
+            self.block = grown
+
+    def _push(self, streams, x):
+        return [value for stream in streams for value in stream.push(x)]
+
+    def update(self, data):
+        """Indicator frame for data, a read-only view of the state's block.
+
+        The forming row of a returned frame is overwritten by later updates.
+        """
+        index = data.index
+        close = data["Close"].to_numpy(dtype=float)
+        n = len(index)
+        start = self._start(index, close)
+        if start is not None:
+            self._grow(start + n)
+            for i in range(self.committed, start + n - 1):
+                self.block[i] = self._push(self.streams, float(close[i - start]))
+            self.block[start + n - 1] = self._push(copy.deepcopy(self.streams), float(close[n - 1]))
+        else:
+            start = 0
+            self._rebuild(data, close)
+
+        self.index = index
+        self.offset = start
+        self.committed = start + n - 1
+        self.last_ts = index[n - 2]
+        self.last_close = close[n - 2]
+        return pd.DataFrame(self.block[start:start + n], index=index, columns=self.columns, copy=False)
+
+_states = OrderedDict()
+_states_lock = threading.Lock()
+
+def update_indicators(data, specs):
+    """Streaming counterpart of compute_indicators for frames from fetch_stock_data.
+
+    State is kept per ticker, interval and spec list, so repeated calls on a
+    growing or sliding series cost O(new bars). The result shares memory with
+    that state and must not be modified. Frames without ticker attrs fall
+    back to a batch computation.
+    """
+    ticker = data.attrs.get("ticker")
+    if ticker is None or len(data) < 2:
+        return compute_indicators(data, specs)
+
+    key = (ticker, data.attrs.get("interval"), tuple(specs))
+    with _states_lock:
+        state = _states.get(key)
+        if state is None:
+            state = _states[key] = IndicatorState(specs)
+        _states.move_to_end(key)
+        while len(_states) > MAX_STATES:
+            _states.popitem(last=False)
+
+    with state.lock:
+        return state.update(data)
@@ -0,0 +1,200 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+from config import METRICS_HOST, METRICS_PORT, TELEMETRY_LOG
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(10))
+
+log = logging.getLogger("stock.telemetry")
+if TELEMETRY_LOG and not log.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(_handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+def _labels(names, values):
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *values, amount=1):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, count in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, values)} {count}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *values):
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        with self._lock:
+            for values, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    lines.append(f"{self.name}_bucket{_labels(names, values + (bound,))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_labels(names, values + ('+Inf',))} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, values)} {total}")
+                lines.append(f"{self.name}_count{_labels(self.labels, values)} {count}")
+        return lines
+
+class Gauge:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def add(self, *values, amount=1):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def get(self, *values):
+        with self._lock:
+            return self._values.get(values, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, values)} {value}")
+        return lines
+
+STAGE_SECONDS = Histogram(
+    "stock_stage_seconds", "Wall time of instrumented stages.", ["stage"])
+STAGE_ERRORS = Counter(
+    "stock_stage_errors_total", "Stages that raised, by exception type.", ["stage", "error"])
+CACHE_REQUESTS = Counter(
+    "stock_cache_requests_total", "Cache lookups by outcome: hit, miss or expired (served stale).", ["cache", "result"])
+UPSTREAM_ERRORS = Counter(
+    "stock_upstream_errors_total", "Failed or empty upstream calls.", ["upstream", "call", "error"])
+PAYLOAD_BYTES = Histogram(
+    "stock_payload_bytes", "Size of upstream responses and serialized figures.", ["kind"], SIZE_BUCKETS)
+GATEWAY_QUEUE = Gauge(
+    "stock_gateway_queue_depth", "Calls waiting in the upstream gateway for a batch, a token or a retry.", ["upstream"])
+
+METRICS = [STAGE_SECONDS, STAGE_ERRORS, CACHE_REQUESTS, UPSTREAM_ERRORS, PAYLOAD_BYTES, GATEWAY_QUEUE]
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+def emit(event, **fields):
+    if TELEMETRY_LOG:
+        log.info(json.dumps({"ts": round(time.time(), 3), "event": event, **fields}, default=str))
+
+@contextmanager
+def span(stage, **fields):
+    """Times the block as one stage: histogram, error counter and a log line."""
+    _ensure_server()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield fields
+    except BaseException as e:
+        error = type(e).__name__
+        STAGE_ERRORS.inc(stage, error)
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        STAGE_SECONDS.observe(seconds, stage)
+        emit("span", stage=stage, seconds=round(seconds, 6), error=error, **fields)
+
+def payload_size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+def record_payload(kind, value=None, size=None):
+    size = payload_size(value) if size is None else size
+    PAYLOAD_BYTES.observe(size, kind)
+    return size
+
+def record_cache(cache, result):
+    CACHE_REQUESTS.inc(cache, result)
+
+def record_upstream_error(upstream, call, error):
+    UPSTREAM_ERRORS.inc(upstream, call, error)
+    emit("upstream_error", upstream=upstream, call=call, error=error)
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+_server = None
+_server_lock = threading.Lock()
+
+def _ensure_server():
+    if _server is None and METRICS_PORT:
+        start_metrics_server()
+
+def start_metrics_server(host=METRICS_HOST, port=METRICS_PORT):
+    """Serves /metrics from a daemon thread; one server per process.
+
+    If the port is taken, e.g. by another app process on the same host,
+    metrics are still collected and logged but not served.
+    """
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+        try:
+            _server = ThreadingHTTPServer((host, port), _Handler)
+        except OSError as e:
+            _server = False
+            log.warning(json.dumps({"event": "metrics_server_unavailable", "port": port, "error": str(e)}))
+            return None
+        threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+        emit("metrics_server_started", host=host, port=port)
+        return _server
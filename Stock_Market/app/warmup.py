@@ -0,0 +1,73 @@
+import importlib
+import threading
+import time
+from config import WARMUP
+from telemetry import span
+
+# Slow dependencies that no module imports up front, loaded in this order
+# once the first screen is out. Importing is not enough for some of them:
+# TextBlob reads its lexicon and plotly builds its trace classes on first use.
+def _yfinance():
+    importlib.import_module("yfinance")
+
+def _newsapi():
+    importlib.import_module("newsapi")
+
+def _sentiment():
+    from sentiment import get_scorer
+    get_scorer().score(["warm up"])
+
+def _models():
+    importlib.import_module("sklearn.ensemble")
+
+def _plotly():
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True)
+    fig.add_trace(go.Candlestick(x=[0], open=[1], high=[1], low=[1], close=[1]), row=1, col=1)
+    fig.add_trace(go.Bar(x=[0], y=[1]), row=2, col=1)
+    fig.add_trace(go.Scatter(x=[0], y=[1]))
+    fig.update_layout(template="plotly_dark").to_json()
+
+STEPS = {
+    "yfinance": _yfinance, "newsapi": _newsapi, "sentiment": _sentiment, "models": _models,
+    "plotly": _plotly}
+
+class Warmup:
+    """Runs STEPS once per process on a daemon thread; seconds records each."""
+
+    def __init__(self, steps=STEPS):
+        self.steps = steps
+        self.seconds = {}
+        self.done = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _run(self):
+        try:
+            for name, step in self.steps.items():
+                start = time.perf_counter()
+                try:
+                    with span("warmup", step=name):
+                        step()
+                except Exception:
+                    # The code path that needs it will import it and fail
+                    # there, with the error in front of the user.
+                    continue
+                self.seconds[name] = time.perf_counter() - start
+        finally:
+            self.done.set()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+                self._thread.start()
+
+_warmup = Warmup()
+
+def start_warmup():
+    """Starts the process-wide warmup once, unless WARMUP=0."""
+    if WARMUP:
+        _warmup.start()
+    return _warmup
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Set before any app module reads config: an empty cache directory,
+# generated markets instead of the network, no metrics endpoint or logs and
+# no background prefetching or warmup.
+os.environ.update(STOCK_CACHE_DIR=tempfile.mkdtemp(prefix="stock-tests-"),
+                  DATA_PROVIDER="synthetic", METRICS_PORT="0", TELEMETRY_LOG="0",
+                  PREFETCH="0", WARMUP="0")
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+sys.path.insert(0, APP_DIR)
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import backtest
+from backtest import METRIC_COLUMNS, grid, sweep
+
+COST = 0.001
+
+def _close(n=600, seed=4):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+
+def _sma_positions(close, fast, slow):
+    series = pd.Series(close)
+    return (series.rolling(fast).mean() > series.rolling(slow).mean()).to_numpy(dtype=float)
+
+def _rsi_positions(close, window, lower, upper):
+    delta = pd.Series(close).diff()
+    gain = delta.clip(lower=0).rolling(window).mean()
+    loss = (-delta.clip(upper=0)).rolling(window).mean()
+    rsi = (100 - 100 / (1 + gain / loss)).to_numpy()
+    positions, held = np.zeros(len(close)), 0.0
+    for t, value in enumerate(rsi):
+        if value < lower:
+            held = 1.0
+        elif value > upper:
+            held = 0.0
+        positions[t] = held
+    return positions
+
+def _macd_positions(close, fast, slow, signal):
+    series = pd.Series(close)
+    macd = series.ewm(span=fast, adjust=False).mean() - series.ewm(span=slow, adjust=False).mean()
+    return (macd > macd.ewm(span=signal, adjust=False).mean()).to_numpy(dtype=float)
+
+def _loop_metrics(close, positions, cost=COST, periods_per_year=252):
+    # One bar at a time: the position held since the last close earns this
+    # bar's return, and every change of position pays cost.
+    equity, peak, worst, trades, held, returns = 1.0, 1.0, 0.0, 0.0, 0.0, []
+    for t in range(1, len(close)):
+        position = positions[t - 1]
+        traded = abs(position - held)
+        held = position
+        ret = position * (close[t] / close[t - 1] - 1) - cost * traded
+        returns.append(ret)
+        trades += traded
+        equity *= 1 + ret
+        peak = max(peak, equity)
+        worst = min(worst, equity / peak - 1)
+    returns = np.array(returns)
+    years = len(returns) / periods_per_year
+    return [(equity - 1) * 100, (equity ** (1 / years) - 1) * 100,
+            returns.mean() / returns.std() * np.sqrt(periods_per_year),
+            worst * 100, trades, np.mean(positions[:-1]) * 100]
+
+def _check(strategy, ranges, positions):
+    close = _close()
+    configs = grid(strategy, ranges)
+    table = sweep(close, strategy, configs, cost=COST)
+    assert len(table) == len(configs)
+    for i, config in enumerate(configs):
+        expected = _loop_metrics(close, positions(close, *config))
+        np.testing.assert_allclose(table.loc[i, METRIC_COLUMNS].to_numpy(dtype=float), expected,
+                                   rtol=1e-9, atol=1e-9)
+
+def test_sma_sweep_matches_a_loop():
+    _check("SMA Crossover", {"fast": [5, 10, 20], "slow": [10, 30, 50]}, _sma_positions)
+
+def test_rsi_sweep_matches_a_loop():
+    _check("RSI Thresholds", {"window": [7, 14], "lower": [25, 35], "upper": [60, 75]}, _rsi_positions)
+
+def test_macd_sweep_matches_a_loop():
+    _check("MACD Signal Cross", {"fast": [8, 12], "slow": [21, 26], "signal": [5, 9]}, _macd_positions)
+
+def test_grid_drops_invalid_configs():
+    configs = grid("SMA Crossover", {"fast": [5, 20], "slow": [10, 20]})
+    assert configs.tolist() == [[5, 10], [5, 20]]
+
+def test_pool_matches_inline(monkeypatch):
+    close = _close(300)
+    configs = grid("SMA Crossover", {"fast": range(2, 20), "slow": range(5, 40)})
+    inline = sweep(close, "SMA Crossover", configs)
+    monkeypatch.setattr(backtest, "MAX_PROCESSES", 2)
+    monkeypatch.setattr(backtest, "PARALLEL_MIN_CONFIGS", 1)
+    pd.testing.assert_frame_equal(sweep(close, "SMA Crossover", configs), inline)
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from decimate import decimate_bars, decimate_line, decimate_ohlc, lttb_indices
+
+def _walk(n, seed=0):
+    return 100 + np.cumsum(np.random.default_rng(seed).normal(size=n))
+
+def test_lttb_keeps_endpoints_and_extremes():
+    y = _walk(100_000)
+    y[31_337] = y.max() + 50
+    y[77_777] = y.min() - 50
+    x = np.arange(len(y), dtype=float)
+    kept = lttb_indices(x, y, 1000)
+    assert len(kept) == 1000
+    assert kept[0] == 0 and kept[-1] == len(y) - 1
+    assert np.all(np.diff(kept) > 0)
+    assert {31_337, 77_777} <= set(kept)
+
+def test_short_series_are_left_alone():
+    x = pd.date_range("2026-01-01", periods=50, freq="min", tz="UTC")
+    y = _walk(50)
+    out_x, out_y = decimate_line(x, y, max_points=100)
+    assert out_x is x
+    np.testing.assert_array_equal(out_y, y)
+
+def test_line_skips_warm_up_nans():
+    y = _walk(10_000)
+    y[:199] = np.nan
+    x = pd.date_range("2026-01-01", periods=len(y), freq="min", tz="UTC")
+    out_x, out_y = decimate_line(x, y, max_points=500)
+    assert len(out_y) == 500
+    assert not np.isnan(out_y).any()
+    assert out_x[0] == x[199] and out_x[-1] == x[-1]
+
+def test_ohlc_buckets_keep_open_close_and_range():
+    close = _walk(10_000, seed=1)
+    high, low = close + 1, close - 1
+    x = pd.date_range("2026-01-01", periods=len(close), freq="min", tz="UTC")
+    out_x, o, h, l, c = decimate_ohlc(x, close, high, low, close, max_points=100)
+    assert len(out_x) == 100
+    assert o[0] == close[0] and c[-1] == close[-1]
+    assert h.max() == high.max() and l.min() == low.min()
+
+def test_bars_keep_each_buckets_peak():
+    y = np.random.default_rng(2).normal(size=10_000)
+    y[4321] = -1000
+    out_x, out_y = decimate_bars(np.arange(len(y)), y, max_points=100)
+    assert len(out_y) == 100
+    assert -1000 in out_y
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from figcache import FigureCache, cached_figure, frame_version
+
+def _bars(n):
+    index = pd.date_range("2026-01-01", periods=n, freq="min", tz="UTC")
+    return pd.DataFrame({"Close": np.arange(n, dtype=float)}, index=index)
+
+def _figure(data, builds):
+    builds.append(len(data))
+    return go.Figure(go.Scatter(x=data.index, y=data["Close"]))
+
+def _chart(name, data, builds):
+    return cached_figure((name, "1d", frame_version(data)), lambda: _figure(data, builds))
+
+def test_same_data_is_built_once():
+    builds = []
+    data = _bars(5000)
+    first = _chart("same", data, builds)
+    second = _chart("same", data.copy(), builds)
+    assert builds == [5000]
+    assert first.to_json() == second.to_json()
+
+def test_new_bar_rebuilds():
+    builds = []
+    data = _bars(5001)
+    _chart("new", data.iloc[:-1], builds)
+    _chart("new", data, builds)
+    assert builds == [5000, 5001]
+
+def test_revised_last_bar_rebuilds():
+    builds = []
+    data = _bars(3000)
+    _chart("revised", data, builds)
+    revised = data.copy()
+    revised.iloc[-1, 0] += 0.5
+    _chart("revised", revised, builds)
+    assert builds == [3000, 3000]
+
+def test_evicts_least_recently_used_past_the_byte_budget():
+    cache = FigureCache(max_bytes=10)
+    cache.put("a", "aaaa")
+    cache.put("b", "bbbb")
+    cache.get("a")
+    cache.put("c", "cccc")
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaa" and cache.get("c") == "cccc"
+    assert cache.bytes == 8
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+from frames import compact, frame_bytes
+from data import _present
+from providers import synthetic_bars
+
+def _stored(n=600):
+    bars = synthetic_bars(n, "1d", seed=3, end="2026-06-30")
+    bars.attrs = {"covered_from": "max"}
+    return bars
+
+def test_compact_narrows_dtypes_and_keeps_values():
+    stored = _stored()
+    bars = compact(stored)
+    assert all(bars[col].dtype == np.float32 for col in ["Close", "High", "Low", "Open"])
+    assert bars["Volume"].dtype == np.uint32
+    assert str(bars.index.tz) == "Asia/Kolkata"
+    assert bars.attrs == {"covered_from": "max"}
+    np.testing.assert_allclose(bars["Close"], stored["Close"], rtol=1e-6)
+    assert frame_bytes(bars) < frame_bytes(stored)
+
+def test_periods_are_views_of_the_base_series():
+    bars = compact(_stored())
+    year = _present(bars, "T", "1d", "1y")
+    assert year.index[0] >= bars.index[-1].normalize() - pd.DateOffset(years=1)
+    assert year.index[-1] == bars.index[-1]
+    assert np.shares_memory(year["Close"].to_numpy(), bars["Close"].to_numpy())
+    assert year.attrs == {"ticker": "T", "interval": "1d"}
+    assert len(_present(bars, "T", "1d", "max")) == len(bars)
+
+def test_custom_range_excludes_the_end_date():
+    bars = compact(_stored())
+    data = _present(bars, "T", "1d", None, "2026-03-02", "2026-03-06")
+    assert list(data.index.tz_convert("UTC").normalize().day) == [2, 3, 4, 5]
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pandas as pd
+import fundamentals
+from conftest import APP_DIR
+from fundamentals import INFO, STATEMENTS, _columnar, info, peer_table, statements, sync
+
+def test_columnar_keeps_numeric_fields_numeric():
+    frame = pd.DataFrame({"marketCap": [1e12, "N/A", None], "sector": ["Tech", None, "Energy"],
+                          "zip": ["94043", "10001", None]}, index=["A", "B", "C"])
+    columns = _columnar(frame)
+    assert columns["marketCap"].dtype == float
+    assert columns["marketCap"].iloc[0] == 1e12 and columns["marketCap"].isna().iloc[1:].all()
+    assert columns["sector"].dtype == "string"
+    assert list(columns["zip"].fillna("-")) == ["94043", "10001", "-"]
+
+def test_sync_fills_the_warehouse_and_skips_fresh_tickers():
+    assert sorted(sync(["AAA", "BBB"])) == ["AAA", "BBB"]
+    assert sync(["AAA", "BBB"]) == []
+    assert info("AAA")["shortName"] == "AAA Synthetic"
+    quarters = statements("AAA")
+    assert "Total Revenue" in quarters.index
+    assert quarters.columns.is_monotonic_decreasing
+
+def test_replace_keeps_other_tickers():
+    sync(["KEEP", "SWAP"])
+    before = STATEMENTS.load().xs("KEEP", level="ticker")
+    rows = fundamentals._statements("SWAP").iloc[:2]
+    STATEMENTS.replace(["SWAP"], rows)
+    table = STATEMENTS.load()
+    assert len(table.xs("SWAP", level="ticker")) == 2
+    pd.testing.assert_frame_equal(table.xs("KEEP", level="ticker"), before)
+    assert "KEEP" in INFO.load().index
+
+def test_peer_table_ratios():
+    sync(["PEERA"])
+    peers = peer_table(["PEERA", "MISSING"])
+    items = statements("PEERA")
+    ttm = items.loc["Total Revenue"].iloc[:4].sum()
+    assert np.isclose(peers.at["PEERA", "Revenue TTM ($B)"], ttm / 1e9)
+    assert np.isclose(peers.at["PEERA", "Gross Margin %"], 40.0)
+    assert peers.loc["MISSING"].isna().all()
+
+def test_benchmark_leaves_only_its_result_file(tmp_path):
+    env = dict(os.environ, STOCK_CACHE_DIR=str(tmp_path))
+    subprocess.run([sys.executable, "benchmark.py", "--sizes", "100", "--repeat", "1",
+                    "--cases", "quarterly_financials", "peer_table"],
+                   cwd=APP_DIR, env=env, check=True, capture_output=True)
+    left = [os.path.relpath(os.path.join(root, name), tmp_path)
+            for root, _, names in os.walk(tmp_path) for name in names]
+    assert len(left) == 1 and left[0].startswith("benchmarks")
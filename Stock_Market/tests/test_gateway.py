@@ -0,0 +1,81 @@
+import threading
+import pandas as pd
+import pytest
+import gateway
+from gateway import Gateway
+from providers import combine, synthetic_bars
+
+class _Upstream:
+    # Serves bars for known symbols; the first `empty` downloads and the
+    # first `errors` calls fail the way the live services do.
+    name = "test"
+
+    def __init__(self, known=("AAA",), empty=0, errors=0, on_call=None):
+        self.known = known
+        self.empty = empty
+        self.errors = errors
+        self.on_call = on_call
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def download(self, tickers, start=None, interval="1d"):
+        with self._lock:
+            self.calls.append(tickers)
+            n = len(self.calls)
+        if self.on_call is not None:
+            self.on_call(tickers)
+        if n <= self.errors:
+            raise ConnectionError("reset")
+        if n <= self.errors + self.empty:
+            return pd.DataFrame()
+        symbols = [tickers] if isinstance(tickers, str) else tickers
+        return combine({t: synthetic_bars(10, seed=i) for i, t in enumerate(symbols) if t in self.known})
+
+@pytest.fixture(autouse=True)
+def no_waits(monkeypatch):
+    monkeypatch.setattr(gateway, "BACKOFF_BASE", 0.0)
+    monkeypatch.setattr(gateway, "EMPTY_RETRY_DELAY", 0.0)
+
+def _gateway(inner, window=0):
+    return Gateway(inner, rates={}, window=window, retries=3)
+
+def test_transport_errors_are_retried_with_backoff():
+    inner = _Upstream(errors=2)
+    assert len(_gateway(inner).download("AAA")) == 10
+    assert inner.calls == ["AAA"] * 3
+
+def test_empty_download_is_retried_once():
+    inner = _Upstream(empty=1)
+    assert len(_gateway(inner).download("AAA")) == 10
+    assert inner.calls == ["AAA", "AAA"]
+
+def test_unknown_symbol_costs_one_retry():
+    inner = _Upstream()
+    assert _gateway(inner).download("NOSUCH").empty
+    assert inner.calls == ["NOSUCH", "NOSUCH"]
+
+def test_empty_symbols_are_split_from_the_batch():
+    answered = threading.Event()
+
+    def on_call(tickers):
+        # The lone retry for the unknown symbol holds until AAA's caller
+        # has its answer, which it could not get if it waited on the retry.
+        if tickers == "BBB":
+            assert answered.wait(5)
+    inner = _Upstream(on_call=on_call)
+    gate = _gateway(inner, window=0.2)
+    results = {}
+
+    def fetch(ticker):
+        results[ticker] = gate.download(ticker)
+        if ticker == "AAA":
+            answered.set()
+    threads = [threading.Thread(target=fetch, args=(ticker,)) for ticker in ("AAA", "BBB")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(inner.calls[0]) == ["AAA", "BBB"]
+    assert inner.calls[1:] == ["BBB"]
+    assert set(results["AAA"].columns.get_level_values(1)) == {"AAA"}
+    assert results["BBB"].empty
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+from indicators import compute_indicators, ema
+
+def _bars(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(size=n))
+    index = pd.date_range("2020-01-01", periods=n, freq="D", tz="UTC")
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": rng.integers(1, 1000, n).astype(float)}, index=index)
+
+# The pandas versions the engine replaced on the Analysis page and chart.
+def _pandas_rsi(data, window=14):
+    delta = data['Close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
+    return 100 - (100 / (1 + gain / loss))
+
+def _pandas_macd(data, slow=26, fast=12, signal=9):
+    macd = data['Close'].ewm(span=fast, adjust=False).mean() - data['Close'].ewm(span=slow, adjust=False).mean()
+    signal_line = macd.ewm(span=signal, adjust=False).mean()
+    return macd, signal_line, macd - signal_line
+
+def test_rsi_matches_pandas():
+    data = _bars()
+    result = compute_indicators(data, ["RSI14"])
+    np.testing.assert_allclose(result["RSI14"], _pandas_rsi(data), rtol=1e-9, equal_nan=True)
+
+def test_macd_matches_pandas():
+    data = _bars()
+    result = compute_indicators(data, ["MACD"])
+    for column, expected in zip(["MACD", "MACD_Signal", "MACD_Hist"], _pandas_macd(data)):
+        np.testing.assert_allclose(result[column], expected, rtol=1e-9, atol=1e-12)
+
+def test_sma_and_bollinger_match_pandas():
+    data = _bars()
+    result = compute_indicators(data, ["SMA50", "BB50"])
+    sma = data["Close"].rolling(50).mean()
+    std = data["Close"].rolling(50).std()
+    np.testing.assert_allclose(result["SMA50"], sma, rtol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(result["BB50_Upper"], sma + 2 * std, rtol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(result["BB50_Lower"], sma - 2 * std, rtol=1e-9, equal_nan=True)
+
+def test_ema_matches_pandas_over_long_series():
+    # Long enough to cross several closed-form blocks.
+    x = _bars(20_000)["Close"]
+    np.testing.assert_allclose(ema(x.to_numpy(), 2 / 13), x.ewm(span=12, adjust=False).mean(), rtol=1e-9)
@@ -0,0 +1,23 @@
+import news
+from providers import get_provider, set_provider
+
+class _NewsDown:
+    name = "down"
+
+    def news(self, api_key, **params):
+        raise ConnectionError("newsapi unreachable")
+
+def test_refresh_error_travels_with_the_cached_result():
+    previous = get_provider()
+    set_provider(_NewsDown())
+    try:
+        first = news.fetch_news_and_sentiment("DOWN", "Down Inc", "key")
+        again = news.fetch_news_and_sentiment("DOWN", "Down Inc", "key")
+    finally:
+        set_provider(previous)
+
+    avg_sentiment, articles, error = first
+    assert "newsapi unreachable" in error
+    assert (avg_sentiment, articles) == (0, [])
+    # A cache hit reports the failure again instead of dropping it.
+    assert again[2] == error
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+from newsstore import _frame, append_articles, load_articles, sentiment_asof
+
+def _article(published, title, url=None):
+    return {"publishedAt": published, "title": title, "url": url or f"http://news/{title}",
+            "source": {"name": "Wire"}}
+
+def _articles(rows):
+    return _frame([_article(published, f"a{i}") for i, (published, _) in enumerate(rows)],
+                  [polarity for _, polarity in rows])
+
+def test_daily_bars_see_only_days_already_over():
+    articles = _articles([("2026-01-05T10:00:00Z", 0.5), ("2026-01-05T20:00:00Z", 0.1),
+                          ("2026-01-06T09:00:00Z", -0.8)])
+    bars = pd.DatetimeIndex(["2026-01-05 14:30", "2026-01-06 14:30", "2026-01-07 14:30"], tz="UTC")
+    sentiment = sentiment_asof("T", bars, "1d", articles)
+    # Jan 5's bucket is known from midnight on; Jan 6's news waits for Jan 7.
+    np.testing.assert_allclose(sentiment.to_numpy(), [0.0, 0.3, -0.8])
+    assert sentiment.index.equals(bars)
+
+def test_intraday_bars_use_hourly_buckets():
+    articles = _articles([("2026-01-05T10:15:00Z", 0.4), ("2026-01-05T11:20:00Z", -0.2)])
+    bars = pd.date_range("2026-01-05 10:00", periods=8, freq="15min", tz="UTC")
+    sentiment = sentiment_asof("T", bars, "15m", articles)
+    np.testing.assert_allclose(sentiment.to_numpy(), [0, 0, 0, 0, 0.4, 0.4, 0.4, 0.4])
+
+def test_stale_sentiment_falls_back_to_neutral():
+    articles = _articles([("2026-01-01T10:00:00Z", 0.9)])
+    bars = pd.DatetimeIndex(["2026-01-03", "2026-01-20"], tz="UTC")
+    np.testing.assert_allclose(sentiment_asof("T", bars, "1d", articles).to_numpy(), [0.9, 0.0])
+
+def test_local_time_index_is_kept():
+    articles = _articles([("2026-01-05T10:00:00Z", 0.5)])
+    bars = pd.DatetimeIndex(["2026-01-06 09:15"], tz="Asia/Kolkata")
+    sentiment = sentiment_asof("T", bars, "1d", articles)
+    assert sentiment.index.equals(bars)
+    assert sentiment.iloc[0] == 0.5
+
+def test_append_is_idempotent():
+    batch = [_article("2026-01-05T10:00:00Z", "one"), _article("2026-01-05T11:00:00Z", "two")]
+    assert append_articles("APPEND", batch, [0.1, 0.2]) == 2
+    assert append_articles("APPEND", batch + [_article("2026-01-05T12:00:00Z", "three")],
+                           [0.1, 0.2, 0.3]) == 1
+    stored = load_articles("APPEND")
+    assert list(stored["title"]) == ["one", "two", "three"]
+    assert stored.index.is_monotonic_increasing
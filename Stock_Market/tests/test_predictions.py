@@ -0,0 +1,101 @@
+import threading
+import time
+import numpy as np
+import predictions
+from predictions import StockPredictor, feature_matrix, get_predictor
+from providers import synthetic_bars
+
+def _features(bars):
+    return feature_matrix(bars, np.zeros(len(bars)))
+
+def test_one_more_bar_updates_instead_of_training(monkeypatch):
+    bars = synthetic_bars(1200, "1d", seed=3, end="2026-10-16")
+    get_predictor("UPD", "1d", _features(bars.iloc[:-1]))
+
+    calls = []
+    monkeypatch.setattr(StockPredictor, "train", lambda self, rows: calls.append("train"))
+    update = StockPredictor.update
+    monkeypatch.setattr(StockPredictor, "update",
+                        lambda self, rows: (calls.append("update"), update(self, rows)))
+    predictor = get_predictor("UPD", "1d", _features(bars))
+
+    assert calls == ["update"]
+    assert predictor.last_ts == bars.index[-3]
+
+def test_repeated_call_neither_trains_nor_updates(monkeypatch):
+    features = _features(synthetic_bars(1200, "1d", seed=4, end="2026-10-16"))
+    first = get_predictor("SAME", "1d", features)
+
+    calls = []
+    monkeypatch.setattr(StockPredictor, "train", lambda self, rows: calls.append("train"))
+    monkeypatch.setattr(StockPredictor, "update", lambda self, rows: calls.append("update"))
+
+    assert get_predictor("SAME", "1d", features) is first
+    assert calls == []
+
+def test_revalidates_after_refit_bars(monkeypatch):
+    bars = synthetic_bars(1200, "1d", seed=5, end="2026-10-16")
+    get_predictor("REFIT", "1d", _features(bars.iloc[:-predictions.REFIT_BARS]))
+
+    calls = []
+    monkeypatch.setattr(StockPredictor, "train", lambda self, rows: calls.append("train"))
+    get_predictor("REFIT", "1d", _features(bars))
+
+    assert calls == ["train"]
+
+def test_online_update_matches_a_full_fit():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, len(predictions.FEATURES)))
+    y = X[:, 0] * 0.3 + rng.normal(scale=0.1, size=600)
+    for model in (predictions.AutoRegressive, predictions.Ridge):
+        online = model().fit(X[:500], y[:500]).partial_fit(X[500:], y[500:])
+        full = model().fit(X, y)
+        if model is predictions.Ridge:
+            # The scaling stays that of the first fit, so close rather than equal.
+            np.testing.assert_allclose(online.predict(X), full.predict(X), atol=1e-3)
+        else:
+            np.testing.assert_allclose(online.predict(X), full.predict(X))
+
+def _concurrent(calls, n=4):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(calls())) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def _slow_train(monkeypatch, trained, release):
+    train = StockPredictor.train
+
+    def slow(self, rows):
+        trained.append(self)
+        assert release.wait(5)
+        train(self, rows)
+    monkeypatch.setattr(StockPredictor, "train", slow)
+
+def test_retrain_runs_once_while_others_keep_the_stored_model(monkeypatch):
+    bars = synthetic_bars(1200, "1d", seed=6, end="2026-10-16")
+    stored = get_predictor("FLIGHT", "1d", _features(bars.iloc[:-predictions.REFIT_BARS]))
+    trained, release = [], threading.Event()
+    _slow_train(monkeypatch, trained, release)
+    features = _features(bars)
+
+    leader = threading.Thread(target=get_predictor, args=("FLIGHT", "1d", features))
+    leader.start()
+    while not trained:
+        time.sleep(0.01)
+    assert _concurrent(lambda: get_predictor("FLIGHT", "1d", features)) == [stored] * 4
+    release.set()
+    leader.join()
+    assert len(trained) == 1
+    assert get_predictor("FLIGHT", "1d", features) is trained[0]
+
+def test_first_training_is_shared(monkeypatch):
+    trained, release = [], threading.Event()
+    _slow_train(monkeypatch, trained, release)
+    features = _features(synthetic_bars(1200, "1d", seed=7, end="2026-10-16"))
+    threading.Timer(0.2, release.set).start()
+    results = _concurrent(lambda: get_predictor("FIRST", "1d", features))
+    assert len(trained) == 1
+    assert all(result is trained[0] for result in results)
@@ -0,0 +1,45 @@
+import pandas as pd
+from markets import exchange_for
+from prefetch import CLOSED_REFRESH, REFRESH_AT, Popularity, is_due
+
+TTL = 300
+
+def _at(utc):
+    return pd.Timestamp(utc, tz="UTC").timestamp()
+
+def test_open_market_refreshes_just_before_the_ttl():
+    now = _at("2026-01-06 15:00")
+    assert not is_due(TTL, TTL * REFRESH_AT - 1, ["AAPL"], now)
+    assert is_due(TTL, TTL * REFRESH_AT, ["AAPL"], now)
+
+def test_nothing_is_due_before_the_open_until_it_opens():
+    # NYSE opens at 14:30 UTC in January; the entry was stored overnight.
+    assert not is_due(TTL, 3600, ["AAPL"], _at("2026-01-06 14:29"))
+    assert is_due(TTL, 3600, ["AAPL"], _at("2026-01-06 14:31"))
+
+def test_closing_bar_is_fetched_once_it_settles():
+    # Monday's close is 21:00 UTC and settles at 21:15.
+    now = _at("2026-01-05 21:20")
+    assert is_due(TTL, 600, ["AAPL"], now)
+    assert not is_due(TTL, 60, ["AAPL"], now)
+
+def test_closed_days_refresh_rarely():
+    for now in (_at("2026-01-10 15:00"), _at("2026-01-19 15:00")):
+        assert not is_due(TTL, 3600, ["AAPL"], now)
+        assert is_due(TTL, CLOSED_REFRESH * REFRESH_AT, ["AAPL"], now)
+    assert not exchange_for("AAPL").is_open(pd.Timestamp("2026-01-19 15:00", tz="UTC"))
+
+def test_other_markets_and_unbound_entries():
+    now = _at("2026-01-06 05:00")
+    assert is_due(TTL, TTL, ["RELIANCE.NS"], now)
+    assert not is_due(TTL, TTL, ["AAPL"], now)
+    assert is_due(TTL, TTL, ["AAPL"], now, market_bound=False)
+    assert is_due(TTL, None, ["AAPL"], now)
+
+def test_popularity_decays():
+    popularity = Popularity(half_life=60)
+    for _ in range(4):
+        popularity.hit("old", "old", now=0)
+    assert popularity.top(1, now=0) == ["old"]
+    popularity.hit("new", "new", now=180)
+    assert popularity.top(2, now=180) == ["new", "old"]
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from frames import compact
+from markets import EXCHANGES
+from providers import synthetic_bars
+import pyramid
+
+NYSE = EXCHANGES["NYSE"]
+AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+def _five_minute(n=3000, end="2026-01-16 21:00"):
+    return compact(synthetic_bars(n, "5m", seed=5, end=end), NYSE.tz)
+
+def _reference(bars, bucket):
+    # A plain groupby on the bucket start in exchange wall-clock time.
+    local = bars.index.tz_convert(NYSE.tz).tz_localize(None)
+    expected = bars.groupby(bucket(local)).agg(AGG)
+    expected.index = expected.index.tz_localize(NYSE.tz).as_unit("ns")
+    expected["Volume"] = expected["Volume"].astype(np.int64)
+    return expected
+
+def _check(actual, expected):
+    pd.testing.assert_index_equal(actual.index, expected.index, check_names=False)
+    for column in ["Open", "High", "Low", "Close"]:
+        np.testing.assert_allclose(actual[column], expected[column], rtol=1e-6)
+    np.testing.assert_array_equal(actual["Volume"].astype(np.int64), expected["Volume"])
+
+def test_five_minute_bars_resample_to_session_aligned_hours():
+    bars = _five_minute()
+    hourly = pyramid.resample(bars, "1h", NYSE)
+    half = pd.Timedelta(minutes=30)
+    _check(hourly, _reference(bars, lambda local: (local - half).floor("1h") + half))
+    assert (hourly.index.tz_convert(NYSE.tz).minute == 30).all()
+
+def test_daily_bars_resample_to_weeks_starting_monday():
+    bars = compact(synthetic_bars(200, "1d", seed=6, end="2026-06-30"), NYSE.tz)
+    weekly = pyramid.resample(bars, "1wk", NYSE)
+    _check(weekly, _reference(bars, lambda local: local.normalize() - pd.to_timedelta(local.dayofweek, "D")))
+    assert (weekly.index.dayofweek == 0).all()
+
+def test_extend_matches_a_full_rebuild():
+    bars = _five_minute()
+    previous = pyramid.resample(bars.iloc[:-40], "15m", NYSE)
+    previous.attrs.update(source_start=bars.index[0], source_end=bars.index[-41])
+    extended = pyramid.extend(previous, bars, "15m", NYSE)
+    pd.testing.assert_frame_equal(extended, pyramid.resample(bars, "15m", NYSE), check_freq=False)
+
+def test_level_serves_the_cached_aggregate_until_the_source_moves():
+    bars = _five_minute()
+    pyramid.update("LEVEL", "5m", bars)
+    hourly = pyramid.level("LEVEL", "1h", bars)
+    assert pyramid.level("LEVEL", "1h", bars) is hourly
+    longer = _five_minute(n=3012, end=bars.index[-1] + pd.Timedelta(hours=1))
+    assert pyramid.level("LEVEL", "1h", longer).index[-1] > hourly.index[-1]
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import risk
+from risk import RollingCovariance, returns_matrix, rolling_beta, rolling_volatility
+
+WINDOW = 60
+
+def _returns(n=400, tickers=6, seed=8):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2024-01-01", periods=n, freq="D")
+    return pd.DataFrame(rng.normal(0, 0.01, (n, tickers)), index=index,
+                        columns=[f"T{i}" for i in range(tickers)])
+
+def _reference(returns):
+    return np.cov(returns.iloc[-WINDOW:].to_numpy(), rowvar=False)
+
+def test_update_matches_np_cov_on_the_window():
+    returns = _returns()
+    tracker = RollingCovariance(WINDOW).update(returns.iloc[:200])
+    np.testing.assert_allclose(tracker.cov(), _reference(returns.iloc[:200]), rtol=1e-9, atol=1e-15)
+    for end in (201, 205, 230, 231):
+        tracker.update(returns.iloc[:end])
+        np.testing.assert_allclose(tracker.cov(), _reference(returns.iloc[:end]), rtol=1e-9, atol=1e-15)
+
+def test_forming_row_is_replaced():
+    returns = _returns()
+    tracker = RollingCovariance(WINDOW).update(returns.iloc[:200])
+    revised = returns.iloc[:200].copy()
+    revised.iloc[-1] += 0.005
+    tracker.update(revised)
+    np.testing.assert_allclose(tracker.cov(), _reference(revised), rtol=1e-9, atol=1e-15)
+
+def test_running_sums_are_refit(monkeypatch):
+    monkeypatch.setattr(risk, "REFIT_EVERY", 10)
+    returns = _returns()
+    tracker = RollingCovariance(WINDOW).update(returns.iloc[:100])
+    for end in range(101, 140):
+        tracker.update(returns.iloc[:end])
+    assert tracker.appended < 10
+    np.testing.assert_allclose(tracker.cov(), _reference(returns.iloc[:139]), rtol=1e-9, atol=1e-15)
+
+def test_ticker_missing_a_bar_in_the_window_is_nan():
+    returns = _returns()
+    returns.iloc[-5, 2] = np.nan
+    cov = RollingCovariance(WINDOW).update(returns).cov()
+    assert cov["T2"].isna().all() and cov.loc["T2"].isna().all()
+    assert not np.isnan(cov.drop(index="T2", columns="T2").to_numpy()).any()
+
+def test_rolling_beta_and_volatility_match_pandas():
+    returns = _returns(tickers=3)
+    market = returns["T0"] * 0.5 + returns["T1"] * 0.5
+    beta, corr = rolling_beta(returns, market.to_numpy(), WINDOW)
+    expected_beta = returns.rolling(WINDOW).cov(market).div(market.rolling(WINDOW).var(), axis=0)
+    np.testing.assert_allclose(beta, expected_beta, rtol=1e-6, equal_nan=True)
+    np.testing.assert_allclose(corr, returns.rolling(WINDOW).corr(market), rtol=1e-6, equal_nan=True)
+    vol = rolling_volatility(market.to_numpy(), WINDOW)
+    np.testing.assert_allclose(vol, market.rolling(WINDOW).std() * np.sqrt(252), rtol=1e-6, equal_nan=True)
+
+def test_returns_matrix_aligns_calendars():
+    us = pd.DataFrame({"Close": [100.0, 101.0, 102.0]},
+                      index=pd.DatetimeIndex(["2026-01-05 09:30", "2026-01-06 09:30", "2026-01-07 09:30"],
+                                             tz="America/New_York"))
+    india = pd.DataFrame({"Close": [50.0, 55.0]},
+                         index=pd.DatetimeIndex(["2026-01-05 09:15", "2026-01-07 09:15"], tz="Asia/Kolkata"))
+    returns = returns_matrix({"US": us, "IN": india})
+    assert list(returns.index.day) == [6, 7]
+    np.testing.assert_allclose(returns["US"], [0.01, 1 / 101])
+    np.testing.assert_allclose(returns["IN"], [0.0, 0.1])
+    assert returns.to_numpy().flags["C_CONTIGUOUS"]
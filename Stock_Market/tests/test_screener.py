@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+from screener import screen
+
+def _bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(scale=0.01, size=n)))
+    index = pd.date_range(end="2026-10-16", periods=n, freq="D", tz="UTC")
+    return pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+                         "Volume": rng.integers(1_000, 10_000, n).astype(float)}, index=index)
+
+def _on(bars, index):
+    bars = bars.iloc[-len(index):].copy()
+    bars.index = index
+    return bars
+
+def _mixed_watchlist():
+    # New York, Mumbai and a 24/7 crypto market: the daily bars of each
+    # fall at different UTC times and on different days.
+    days = pd.bdate_range(end="2026-10-16", periods=300)
+    return {
+        "AAPL": _on(_bars(300, seed=1), (days + pd.Timedelta(hours=13, minutes=30)).tz_localize("UTC")),
+        "RELIANCE.NS": _on(_bars(300, seed=2),
+                           (days.drop(days[[-3, -40]]) + pd.Timedelta(hours=3, minutes=45)).tz_localize("UTC")),
+        "BTC-USD": _on(_bars(400, seed=3),
+                       pd.date_range(end="2026-10-18", periods=400, freq="D", tz="UTC"))}
+
+def test_mixed_timezones_match_each_ticker_alone():
+    frames = _mixed_watchlist()
+    table = screen(frames)
+    for ticker, frame in frames.items():
+        pd.testing.assert_frame_equal(table.loc[[ticker]], screen({ticker: frame}))
+
+def test_stats_come_from_the_tickers_own_bars():
+    frames = _mixed_watchlist()
+    table = screen(frames)
+    close = frames["RELIANCE.NS"]["Close"]
+    row = table.loc["RELIANCE.NS"]
+    assert row["Last"] == close.iloc[-1]
+    assert np.isclose(row["Change"], close.iloc[-1] - close.iloc[-2])
+    assert np.isclose(row["SMA Distance %"], (close.iloc[-1] / close.iloc[-50:].mean() - 1) * 100)
+
+def test_short_history_is_nan_not_an_error():
+    table = screen({"NEW": _bars(5, seed=4), "OLD": _bars(300, seed=5)})
+    assert np.isnan(table.loc["NEW", "SMA Distance %"])
+    assert not np.isnan(table.loc["NEW", "Change"])
+    assert not np.isnan(table.loc["OLD", "RSI"])
@@ -0,0 +1,47 @@
+import numpy as np
+from sentiment import LexiconScorer, SentimentCache, score_articles
+
+class _Counting(LexiconScorer):
+    name = "counting"
+
+    def __init__(self):
+        self.scored = []
+
+    def score(self, texts):
+        self.scored.extend(texts)
+        return super().score(texts)
+
+def _article(title, description=""):
+    return {"title": title, "description": description}
+
+def test_only_unseen_texts_are_scored():
+    scorer = _Counting()
+    first = score_articles([_article("Strong growth"), _article("Weak guidance")], scorer)
+    assert len(scorer.scored) == 2
+
+    again = score_articles([_article("Weak guidance"), _article("Great success"),
+                            _article("Strong growth")], scorer)
+    assert scorer.scored[2:] == ["Great success "]
+    assert again[0] == first[1] and again[2] == first[0]
+
+def test_duplicates_within_a_batch_are_scored_once():
+    scorer = _Counting()
+    scores = score_articles([_article("Serious lawsuit")] * 3, scorer)
+    assert scorer.scored == ["Serious lawsuit "]
+    assert scores[0] == scores[1] == scores[2]
+
+def test_articles_without_text_have_no_score():
+    assert score_articles([_article(None, None), _article("", "")], _Counting()) == [None, None]
+
+def test_scores_persist_per_scorer(tmp_path):
+    cache = SentimentCache(str(tmp_path / "sentiment.sqlite"))
+    cache.put_many("a", {"k1": 0.5, "k2": -0.25})
+    assert cache.get_many("a", ["k1", "k2", "k3"]) == {"k1": 0.5, "k2": -0.25}
+    assert cache.get_many("b", ["k1"]) == {}
+    assert SentimentCache(cache.path).get_many("a", ["k2"]) == {"k2": -0.25}
+
+def test_lexicon_scores_by_word_polarity():
+    scores = LexiconScorer().score(["a great success", "a poor and weak result", "the"])
+    assert scores[0] > 0 > scores[1]
+    assert scores[2] == 0
+    assert np.isfinite(scores).all()
@@ -0,0 +1,137 @@
+import threading
+import time
+import pytest
+import sharedcache
+from sharedcache import MemoryBackend, SQLiteBackend, cache_data, set_backend
+from telemetry import CACHE_REQUESTS
+
+@pytest.fixture(autouse=True)
+def backend():
+    backend = MemoryBackend()
+    set_backend(backend)
+    yield backend
+    set_backend(None)
+
+def _counting(ttl, **options):
+    calls = []
+
+    @cache_data(ttl=ttl, **options)
+    def value(x):
+        calls.append(x)
+        return [x, len(calls)]
+    return value, calls
+
+def _requests(fn, outcome):
+    return CACHE_REQUESTS._values.get((fn.__qualname__, outcome), 0)
+
+def test_hit_returns_the_stored_value():
+    value, calls = _counting(60)
+    misses, hits = _requests(value, "miss"), _requests(value, "hit")
+    assert value(1) == [1, 1]
+    assert value(1) == [1, 1]
+    assert value(2) == [2, 2]
+    assert calls == [1, 2]
+    assert value(1) is not value(1)
+    assert _requests(value, "miss") - misses == 2
+    assert _requests(value, "hit") - hits == 3
+
+def test_expired_entry_is_served_while_it_refreshes():
+    value, calls = _counting(0.05)
+    value(1)
+    time.sleep(0.1)
+    assert value(1) == [1, 1]
+    deadline = time.time() + 5
+    while len(calls) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    assert calls == [1, 1]
+    assert value(1) == [1, 2]
+
+def test_concurrent_misses_compute_once():
+    gate = threading.Event()
+    calls = []
+
+    @cache_data(ttl=60)
+    def slow(x):
+        calls.append(x)
+        gate.wait(5)
+        return x
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(slow(7))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    gate.set()
+    for thread in threads:
+        thread.join()
+    assert results == [7] * 8
+    assert calls == [7]
+
+def test_clear_refresh_and_age():
+    value, calls = _counting(60)
+    value(1)
+    assert value.age(1) < 1
+    assert value.refresh(1) == [1, 2]
+    assert value(1) == [1, 2]
+    value.clear()
+    assert value.age(1) is None
+    assert value(1) == [1, 3]
+
+def test_sqlite_backend_is_shared_through_the_file(tmp_path):
+    path = str(tmp_path / "shared.sqlite")
+    first, second = SQLiteBackend(path), SQLiteBackend(path)
+    first.set("k", 1.0, b"blob", time.time() + 60)
+    assert second.get("k") == (1.0, b"blob")
+    assert first.acquire("lease", 60)
+    assert not second.acquire("lease", 60)
+    first.release("lease")
+    assert second.acquire("lease", 60)
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_bytes=10)
+    expires = time.time() + 60
+    backend.set("a", 0, b"12345", expires)
+    backend.set("b", 0, b"12345", expires)
+    backend.get("a")
+    backend.set("c", 0, b"12345", expires)
+    assert backend.get("b") is None
+    assert backend.get("a") is not None and backend.get("c") is not None
+
+def test_default_staleness_is_a_few_ttls(backend):
+    value, _ = _counting(60)
+    value(1)
+    expires = next(iter(backend._entries.values()))[2]
+    assert expires - time.time() == pytest.approx(60 * (1 + sharedcache.STALE_TTLS), abs=1)
+
+    longer, _ = _counting(60, max_stale=3600)
+    backend._entries.clear()
+    longer(1)
+    expires = next(iter(backend._entries.values()))[2]
+    assert expires - time.time() == pytest.approx(3660, abs=1)
+
+def test_equivalent_calls_share_an_entry():
+    calls = []
+
+    @cache_data(ttl=60)
+    def value(x, scale=1):
+        calls.append((x, scale))
+        return x * scale
+    assert value(2) == value(x=2) == value(2, 1) == value(2, scale=1) == 2
+    assert value(2, 3) == 6
+    assert value.age(x=2, scale=1) is not None
+    assert calls == [(2, 1), (2, 3)]
+
+def test_a_lease_held_elsewhere_is_not_released(monkeypatch):
+    released = []
+
+    class Held(MemoryBackend):
+        def acquire(self, key, seconds):
+            return False
+
+        def release(self, key):
+            released.append(key)
+    set_backend(Held())
+    monkeypatch.setattr(sharedcache, "LEASE_SECONDS", 0.2)
+    value, calls = _counting(60)
+    assert value(1) == [1, 1]
+    assert released == []
@@ -0,0 +1,31 @@
+import threading
+import snapshot
+from providers import get_provider
+
+def test_entries_are_bounded_least_recently_used(monkeypatch):
+    monkeypatch.setattr(snapshot, "MAX_ENTRIES", 3)
+    snapshot._entries.clear()
+    for ticker in ["A", "B", "C"]:
+        snapshot.get_info(ticker)
+    snapshot.get_info("A")
+    snapshot.get_info("D")
+    assert list(snapshot._entries) == [("C", "info"), ("A", "info"), ("D", "info")]
+    assert snapshot.age("B", "info") is None
+
+def test_fresh_fields_are_fetched_once(monkeypatch):
+    snapshot._entries.clear()
+    calls = []
+    provider = get_provider()
+    info = provider.info
+
+    def counting(ticker):
+        calls.append(ticker)
+        return info(ticker)
+    monkeypatch.setattr(provider, "info", counting)
+    threads = [threading.Thread(target=snapshot.get_info, args=("ONCE",)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    snapshot.get_info("ONCE")
+    assert calls == ["ONCE"]
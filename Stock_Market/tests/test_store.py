@@ -0,0 +1,79 @@
+import threading
+import numpy as np
+import pandas as pd
+import data
+import store
+from providers import combine
+from store import covers, load_bars, merge_bars, save_bars
+
+def _bars(start, periods, close=100.0):
+    index = pd.date_range(start, periods=periods, freq="D", tz="UTC")
+    values = np.full(periods, close)
+    return pd.DataFrame({"Open": values, "High": values, "Low": values, "Close": values,
+                         "Volume": np.ones(periods)}, index=index)
+
+def test_merge_appends_new_bars_and_overwrites_the_forming_one():
+    stored = _bars("2026-01-01", 10)
+    fresh = _bars("2026-01-10", 3, close=105.0)
+    merged = merge_bars(stored, fresh)
+    assert len(merged) == 12
+    assert merged.index.is_monotonic_increasing
+    # The last stored bar was still forming; the re-downloaded copy wins.
+    assert merged.loc["2026-01-10", "Close"].item() == 105.0
+    assert merged.loc["2026-01-09", "Close"].item() == 100.0
+
+def test_save_and_load_keep_coverage():
+    save_bars("KEEP", "1d", _bars("2026-01-01", 5), "2026-01-01T00:00:00+00:00")
+    loaded = load_bars("KEEP", "1d")
+    assert len(loaded) == 5
+    assert covers(loaded, pd.Timestamp("2026-01-02", tz="UTC"))
+    assert not covers(loaded, pd.Timestamp("2025-12-01", tz="UTC"))
+    assert not covers(loaded, None)
+
+def test_concurrent_saves_of_one_ticker():
+    errors = []
+
+    def save():
+        try:
+            for _ in range(10):
+                save_bars("RACE", "1d", _bars("2026-01-01", 50), "max")
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=save) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(load_bars("RACE", "1d")) == 50
+
+def test_bars_lock_excludes_other_holders():
+    order = []
+
+    def hold(name):
+        with store.bars_lock("LOCK", "1d"):
+            order.append(name)
+            threading.Event().wait(0.05)
+            order.append(name)
+    threads = [threading.Thread(target=hold, args=(name,)) for name in "ab"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert order in (list("aabb"), list("bbaa"))
+
+def test_fetch_downloads_only_the_delta(monkeypatch):
+    calls = []
+    history = combine({"DELTA": _bars("2026-01-01", 20)})
+
+    class Provider:
+        def download(self, tickers, start=None, interval="1d"):
+            calls.append(start or "max")
+            frame = history if start is None else history[history.index >= pd.Timestamp(start, tz="UTC")]
+            return frame.copy()
+    monkeypatch.setattr(data, "get_provider", Provider)
+
+    data.fetch_stock_data("DELTA", period="max")
+    data.fetch_series.clear()
+    data.fetch_stock_data("DELTA", period="max")
+    assert calls == ["max", "2026-01-20"]
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import streaming
+from indicators import compute_indicators
+from providers import synthetic_bars
+from streaming import IndicatorState, update_indicators
+
+SPECS = ["SMA20", "EMA12", "BB50", "RSI14", "MACD"]
+
+def _bars(n=400, ticker="STREAM"):
+    bars = synthetic_bars(n, "1d", seed=3, end="2026-01-16")
+    bars.attrs.update(ticker=ticker, interval="1d")
+    return bars
+
+def _check(actual, expected):
+    pd.testing.assert_index_equal(actual.index, expected.index)
+    np.testing.assert_allclose(actual.to_numpy(), expected[actual.columns].to_numpy(),
+                               rtol=1e-9, atol=1e-9, equal_nan=True)
+
+def test_appended_bars_match_a_batch_computation():
+    bars = _bars()
+    state = IndicatorState(SPECS)
+    for end in (300, 301, 301, 350, 400):
+        _check(state.update(bars.iloc[:end]), compute_indicators(bars.iloc[:end], SPECS))
+
+def test_revised_forming_bar_is_recomputed():
+    bars = _bars()
+    state = IndicatorState(SPECS)
+    state.update(bars.iloc[:300])
+    revised = bars.iloc[:300].copy()
+    revised.iloc[-1, revised.columns.get_loc("Close")] += 5
+    _check(state.update(revised), compute_indicators(revised, SPECS))
+
+def test_moving_window_start_reuses_the_state(monkeypatch):
+    bars = _bars()
+    state = IndicatorState(SPECS)
+    state.update(bars.iloc[:300])
+    monkeypatch.setattr(state, "_rebuild", lambda *args: (_ for _ in ()).throw(AssertionError))
+    # The window slides by ten bars: its rows continue the longer history.
+    _check(state.update(bars.iloc[10:310]), compute_indicators(bars.iloc[:310], SPECS).iloc[10:])
+    _check(state.update(bars.iloc[20:320]), compute_indicators(bars.iloc[:320], SPECS).iloc[20:])
+
+def test_dropped_rows_are_released_by_a_rebuild():
+    bars = _bars()
+    state = IndicatorState(SPECS)
+    state.update(bars.iloc[:100])
+    _check(state.update(bars.iloc[150:250]), compute_indicators(bars.iloc[150:250], SPECS))
+    assert state.offset == 0
+
+def test_result_is_a_view_of_the_state():
+    bars = _bars()
+    state = IndicatorState(SPECS)
+    result = state.update(bars.iloc[:300])
+    assert np.shares_memory(result.to_numpy(), state.block)
+
+def test_state_is_shared_across_window_starts():
+    streaming._states.clear()
+    bars = _bars(ticker="SLIDE")
+    update_indicators(bars.iloc[:300], SPECS)
+    update_indicators(bars.iloc[5:305], SPECS)
+    assert [key for key in streaming._states if key[0] == "SLIDE"] == [("SLIDE", "1d", tuple(SPECS))]
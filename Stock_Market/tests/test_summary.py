@@ -0,0 +1,53 @@
+import os
+import re
+import numpy as np
+from streamlit.testing.v1 import AppTest
+from conftest import APP_DIR
+from data import fetch_stock_data
+
+def _analysis(ticker="AAPL"):
+    app = AppTest.from_file(os.path.join(APP_DIR, "Summary.py"), default_timeout=120)
+    app.secrets["NEWS_API_KEY"] = "test"
+    app.session_state["app_started"] = True
+    app.session_state["selected_ticker"] = ticker
+    app.run()
+    assert not app.exception
+    return app
+
+def test_live_fragments_render_price_and_chart():
+    app = _analysis()
+    assert [metric.label for metric in app.metric] == ["AAPL Synthetic"]
+    assert len(app.get("plotly_chart")) == 1
+    assert any(caption.value.startswith("Last updated") for caption in app.caption)
+
+def test_days_range_is_rendered_from_float32_bars():
+    bars = fetch_stock_data("AAPL", period="1y")
+    assert bars["Low"].dtype == bars["High"].dtype == np.float32
+    markdown = [element.value for element in _analysis().markdown]
+    days_range = next(value for value in markdown if value.startswith("**Day's Range**"))
+    assert re.fullmatch(r"\*\*Day's Range\*\*<br>\d+\.\d\d - \d+\.\d\d", days_range)
+
+def _elements(node):
+    children = getattr(node, "children", None)
+    if children is None:
+        return [node]
+    return [element for key in sorted(children) for element in _elements(children[key])]
+
+def test_header_reads_the_metrics_lookup_started_by_the_run(monkeypatch):
+    import metrics
+    calls = []
+    fetch = metrics.fetch_stock_metrics
+
+    def counting(ticker):
+        calls.append(ticker)
+        return fetch(ticker)
+    monkeypatch.setattr(metrics, "fetch_stock_metrics", counting)
+    _analysis()
+    assert calls == ["AAPL"]
+
+def test_news_error_renders_after_the_chart(monkeypatch):
+    import news
+    monkeypatch.setattr(news, "fetch_news_and_sentiment",
+                        lambda ticker, company, key: (None, None, "News is unavailable."))
+    types = [element.type for element in _elements(_analysis().main)]
+    assert types.index("plotly_chart") < types.index("error")
@@ -0,0 +1,28 @@
+import pytest
+import telemetry
+from telemetry import STAGE_ERRORS, STAGE_SECONDS, Histogram, render, span
+
+def _count(counter, *values):
+    return counter._values.get(values, 0)
+
+def test_span_times_and_counts_errors():
+    with span("test.ok"):
+        pass
+    with pytest.raises(KeyError):
+        with span("test.fails"):
+            raise KeyError("x")
+    assert STAGE_SECONDS._series[("test.ok",)][2] == 1
+    assert STAGE_SECONDS._series[("test.fails",)][2] == 1
+    assert _count(STAGE_ERRORS, "test.fails", "KeyError") == 1
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_seconds", "Test.", ["stage"], buckets=(1, 2))
+    for value in (0.5, 1.5, 3):
+        histogram.observe(value, "a")
+    lines = histogram.render()
+    assert 'test_seconds_bucket{stage="a",le="1"} 1' in lines
+    assert 'test_seconds_bucket{stage="a",le="2"} 2' in lines
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{stage="a"} 3' in lines
+    assert "# TYPE stock_stage_seconds histogram" in render()
+    assert telemetry._server is None
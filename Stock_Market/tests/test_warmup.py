@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+from conftest import APP_DIR
+from warmup import Warmup
+
+def test_steps_run_once_in_order_and_failures_are_skipped():
+    ran = []
+
+    def fails():
+        ran.append("fails")
+        raise ImportError("missing")
+    warmup = Warmup({"a": lambda: ran.append("a"), "fails": fails, "b": lambda: ran.append("b")})
+    warmup.start()
+    warmup.start()
+    assert warmup.done.wait(5)
+    assert ran == ["a", "fails", "b"]
+    assert sorted(warmup.seconds) == ["a", "b"]
+
+def test_slow_dependencies_are_not_imported_up_front():
+    code = ("import sys, data, providers, sentiment, news, metrics; "
+            "print(sorted(m for m in ('yfinance', 'newsapi', 'textblob', 'sklearn') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=APP_DIR, env=dict(os.environ),
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"